@@ -19,6 +19,18 @@ ALLOWED_HOSTS = []
 # Secondary authentication passphrase (for reveal/Vault). Defaults to requested phrase.
 SECONDARY_PASSPHRASE = config('SECONDARY_PASSPHRASE', default='the rooster crows at dawn')
 
+# Master key wrapping the per-item data keys of Vault secrets (32 bytes, urlsafe base64).
+# When unset it is derived from SECRET_KEY, so rotating SECRET_KEY would lock existing secrets.
+VAULT_MASTER_KEY = config('VAULT_MASTER_KEY', default='')
+
+# Background tasks: run side effects inline on commit instead of via `manage.py run_tasks`.
+# Useful for local development without a worker process.
+TASKS_EAGER = config('TASKS_EAGER', default=False, cast=bool)
+
+# Real-time push broker. LocalBroker serves a single ASGI worker; use
+# 'api.realtime.PostgresBroker' when running several workers against Postgres.
+REALTIME_BROKER = config('REALTIME_BROKER', default='api.realtime.LocalBroker')
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -93,6 +105,21 @@ database_url = config('DATABASE_URL', default=None)
 if database_url:
     DATABASES['default'] = dj_database_url.config(default=database_url, conn_max_age=600, ssl_require=True)
 
+# Cache
+# Per-process memory cache by default; set REDIS_URL to share cached read models across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+redis_url = config('REDIS_URL', default=None)
+if redis_url:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': redis_url,
+    }
+
 # Password validation & Hashing
 # Using bcrypt as requested
 PASSWORD_HASHERS = [
@@ -5,6 +5,7 @@ from django.views.generic import TemplateView
 
 # Custom JWT View
 from users.views import MyTokenObtainPairView
+from api.views import event_stream
 
 from rest_framework_simplejwt.views import (
     TokenRefreshView,
@@ -23,6 +24,9 @@ urlpatterns = [
     path('api/auth/token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
+    # Real-time event stream (Server-Sent Events; requires ASGI)
+    path('api/events/stream/', event_stream, name='event-stream'),
+
     # App-specific API endpoints
     path('api/lineage/', include('lineage.urls')),
     path('api/scales/', include('scales.urls')),
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api'
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        # Register background task handlers declared in each app's tasks.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import tasks
+
+
+class Command(BaseCommand):
+    help = "Runs background task workers that drain the database-backed task queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=10, help='Tasks claimed per poll.')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain due tasks once and exit.')
+
+    def handle(self, *args, **options):
+        worker = tasks.worker_id()
+        batch = max(1, options['batch'])
+        idle_sleep = max(0.1, options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Task worker {worker} started.'))
+
+        processed = failed = 0
+        last_maintenance = 0.0
+        try:
+            while True:
+                close_old_connections()
+                # Periodic housekeeping: recover tasks from crashed workers, trim history
+                if time.monotonic() - last_maintenance > 60:
+                    tasks.requeue_stale()
+                    tasks.purge_finished()
+                    last_maintenance = time.monotonic()
+
+                claimed = tasks.claim(worker, limit=batch)
+                for bg_task in claimed:
+                    if tasks.execute(bg_task):
+                        processed += 1
+                    else:
+                        failed += 1
+
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(idle_sleep)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Task worker {worker} stopped: {processed} done, {failed} failed.'))
@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class BackgroundTask(models.Model):
+    """A unit of deferred work (notifications, audit writes, snapshots) run by `run_tasks` workers."""
+    class Status(models.TextChoices):
+        QUEUED = 'QUEUED', 'Queued'
+        RUNNING = 'RUNNING', 'Running'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    name = models.CharField(max_length=100, help_text='Registered task name, e.g. codex.notify_roles')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Workers poll for due work with (status, run_after); keep that path index-only.
+            models.Index(fields=['status', 'run_after'], name='api_task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.name} [{self.status}]"
@@ -0,0 +1,191 @@
+"""Publish/subscribe broker behind the real-time event stream (`/api/events/stream/`).
+
+Events are published to named channels:
+
+- ``all``            — everyone (site status, bulletins for ALL)
+- ``role:<ROLE>``    — every user whose profile role is ROLE
+- ``user:<id>``      — a single user
+- ``operation:<id>`` — live log entries of one operation
+
+`LocalBroker` keeps subscribers in-process and is enough for a single ASGI worker.
+With several workers (or a separate `run_tasks` process publishing) set
+``REALTIME_BROKER = 'api.realtime.PostgresBroker'`` so events travel through
+Postgres LISTEN/NOTIFY. Any class implementing `publish` and `subscribe` can be
+plugged in the same way.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+ALL_CHANNEL = 'all'
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def role_channel(role):
+    return f"role:{role}"
+
+
+def operation_channel(operation_id):
+    return f"operation:{operation_id}"
+
+
+def channels_for(user):
+    """Channels a user may subscribe to: their own, their role(s) and the global channel."""
+    from .permissions import get_user_role
+    channels = {ALL_CHANNEL, user_channel(user.id)}
+    base_role = getattr(getattr(user, 'profile', None), 'role', None)
+    for role in (base_role, get_user_role(user)):
+        if role:
+            channels.add(role_channel(role))
+    return sorted(channels)
+
+
+class Subscription:
+    """A bounded, per-connection queue fed by the broker from any thread."""
+
+    def __init__(self, broker, channels, maxsize=100):
+        self.broker = broker
+        self.channels = list(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        if self.queue.full():
+            # Slow consumer: drop the oldest event rather than block publishers
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process broker; subscribers only see events published in the same process."""
+
+    def __init__(self):
+        self._subs = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event, data=None):
+        self._dispatch(channel, {'event': event, 'data': data or {}})
+
+    def subscribe(self, channels):
+        sub = Subscription(self, channels)
+        with self._lock:
+            for ch in sub.channels:
+                self._subs.setdefault(ch, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for ch in sub.channels:
+                subs = self._subs.get(ch)
+                if subs:
+                    subs.discard(sub)
+                    if not subs:
+                        self._subs.pop(ch, None)
+
+    def _dispatch(self, channel, message):
+        with self._lock:
+            targets = list(self._subs.get(channel, ()))
+        for sub in targets:
+            try:
+                sub.push(message)
+            except RuntimeError:
+                # Event loop already closed; the connection is going away
+                self.unsubscribe(sub)
+
+
+class PostgresBroker(LocalBroker):
+    """Fans events out across processes with Postgres LISTEN/NOTIFY."""
+    PG_CHANNEL = 'abacus_events'
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, event, data=None):
+        payload = json.dumps({'channel': channel, 'event': event, 'data': data or {}}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", [self.PG_CHANNEL, payload])
+
+    def subscribe(self, channels):
+        self._ensure_listener()
+        return super().subscribe(channels)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='realtime-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+        import psycopg2.extensions
+        while True:
+            try:
+                params = connections['default'].get_connection_params()
+                conn = psycopg2.connect(**params)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.PG_CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        try:
+                            msg = json.loads(note.payload)
+                        except ValueError:
+                            continue
+                        self._dispatch(msg['channel'], {'event': msg['event'], 'data': msg.get('data') or {}})
+            except Exception:
+                logger.exception("Realtime listener lost its connection; reconnecting")
+                time.sleep(2)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'REALTIME_BROKER', 'api.realtime.LocalBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish(channel, event, data=None):
+    """Publish once the current transaction commits; never let push failures break a request."""
+    def _send():
+        try:
+            get_broker().publish(channel, event, data)
+        except Exception:
+            logger.exception("Failed to publish %s on %s", event, channel)
+    transaction.on_commit(_send)
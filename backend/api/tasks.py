@@ -0,0 +1,169 @@
+"""Lightweight database-backed task queue.
+
+Side effects (notification fan-out, audit writes, history snapshots) are registered
+as named tasks and enqueued with `enqueue(...)`. Rows are only inserted once the
+surrounding transaction commits, so a rolled-back request never leaves work behind.
+Workers (`python manage.py run_tasks`) claim due rows with
+`select_for_update(skip_locked=True)` and retry failures with exponential backoff.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# Retry delay = BACKOFF_BASE * 2 ** (attempts - 1), capped at BACKOFF_MAX.
+BACKOFF_BASE = timedelta(seconds=5)
+BACKOFF_MAX = timedelta(minutes=30)
+# A RUNNING task whose worker has not finished within this window is re-queued.
+LEASE_TIMEOUT = timedelta(minutes=10)
+
+
+def task(name, max_attempts=5):
+    """Register a function as a background task under `name`.
+
+    Task functions receive the enqueued payload as keyword arguments, so payloads
+    must be JSON-serializable (pass ids, not model instances).
+    """
+    def decorator(fn):
+        _registry[name] = {'fn': fn, 'max_attempts': max_attempts}
+        return fn
+    return decorator
+
+
+def get_task(name):
+    return _registry.get(name)
+
+
+def enqueue(name, payload=None, delay=None, coalesce=False):
+    """Schedule task `name` to run after the current transaction commits.
+
+    With settings.TASKS_EAGER the task runs inline on commit instead of being stored,
+    which keeps local development usable without a worker process. With `coalesce`,
+    nothing is stored while an identical task (same name and payload) is still
+    queued, so a burst of triggers results in one run.
+    """
+    payload = payload or {}
+    entry = _registry.get(name)
+    if entry is None:
+        raise KeyError(f"Unknown background task '{name}'")
+
+    if getattr(settings, 'TASKS_EAGER', False):
+        def _run_inline():
+            try:
+                entry['fn'](**payload)
+            except Exception:
+                logger.exception("Eager task %s failed", name)
+        transaction.on_commit(_run_inline)
+        return
+
+    def _insert():
+        from .models import BackgroundTask
+        if coalesce and BackgroundTask.objects.filter(
+            name=name, payload=payload, status=BackgroundTask.Status.QUEUED
+        ).exists():
+            return
+        BackgroundTask.objects.create(
+            name=name,
+            payload=payload,
+            max_attempts=entry['max_attempts'],
+            run_after=timezone.now() + (delay or timedelta(0)),
+        )
+    transaction.on_commit(_insert)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker, limit=10):
+    """Atomically claim up to `limit` due tasks for `worker`."""
+    from .models import BackgroundTask
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            BackgroundTask.objects.select_for_update(skip_locked=True)
+            .filter(status=BackgroundTask.Status.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')[:limit]
+        )
+        if not rows:
+            return []
+        ids = [t.id for t in rows]
+        BackgroundTask.objects.filter(id__in=ids).update(
+            status=BackgroundTask.Status.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+        )
+        for t in rows:
+            t.status = BackgroundTask.Status.RUNNING
+            t.locked_by = worker
+            t.locked_at = now
+        return rows
+
+
+def execute(bg_task):
+    """Run one claimed task and record the outcome (done, retry with backoff, or failed)."""
+    from .models import BackgroundTask
+    entry = _registry.get(bg_task.name)
+    attempts = bg_task.attempts + 1
+    try:
+        if entry is None:
+            raise KeyError(f"Unknown background task '{bg_task.name}'")
+        with transaction.atomic():
+            entry['fn'](**(bg_task.payload or {}))
+    except Exception as e:
+        logger.exception("Task %s (%s) failed on attempt %s", bg_task.name, bg_task.id, attempts)
+        if attempts >= bg_task.max_attempts:
+            BackgroundTask.objects.filter(pk=bg_task.pk).update(
+                status=BackgroundTask.Status.FAILED,
+                attempts=attempts,
+                last_error=repr(e),
+                finished_at=timezone.now(),
+                locked_by='',
+                locked_at=None,
+            )
+        else:
+            delay = min(BACKOFF_BASE * (2 ** (attempts - 1)), BACKOFF_MAX)
+            BackgroundTask.objects.filter(pk=bg_task.pk).update(
+                status=BackgroundTask.Status.QUEUED,
+                attempts=attempts,
+                last_error=repr(e),
+                run_after=timezone.now() + delay,
+                locked_by='',
+                locked_at=None,
+            )
+        return False
+    BackgroundTask.objects.filter(pk=bg_task.pk).update(
+        status=BackgroundTask.Status.DONE,
+        attempts=attempts,
+        finished_at=timezone.now(),
+        locked_by='',
+        locked_at=None,
+    )
+    return True
+
+
+def requeue_stale():
+    """Return tasks abandoned by crashed workers to the queue."""
+    from .models import BackgroundTask
+    cutoff = timezone.now() - LEASE_TIMEOUT
+    return BackgroundTask.objects.filter(
+        status=BackgroundTask.Status.RUNNING, locked_at__lt=cutoff
+    ).update(status=BackgroundTask.Status.QUEUED, locked_by='', locked_at=None)
+
+
+def purge_finished(older_than=timedelta(days=7)):
+    """Delete completed tasks older than `older_than`; failed tasks are kept for inspection."""
+    from .models import BackgroundTask
+    cutoff = timezone.now() - older_than
+    count, _ = BackgroundTask.objects.filter(
+        status=BackgroundTask.Status.DONE, finished_at__lt=cutoff
+    ).delete()
+    return count
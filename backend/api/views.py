@@ -0,0 +1,90 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .realtime import channels_for, get_broker
+
+HEARTBEAT_SECONDS = 15
+
+
+def sse_event(event, data, event_id=None):
+    prefix = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def _authenticate(request):
+    """Resolve the user from a Bearer header or, for EventSource clients, a ?token= parameter."""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    raw = header.split(' ', 1)[1] if ' ' in header else request.GET.get('token')
+    if not raw:
+        return None, None
+    authenticator = JWTAuthentication()
+    validated = authenticator.get_validated_token(raw)
+    return authenticator.get_user(validated), validated.get('exp')
+
+
+async def authenticate_stream(request):
+    """(user, token expiry) for a streaming request, or (None, None) when unauthenticated."""
+    try:
+        user, expires_at = await sync_to_async(_authenticate)(request)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None, None
+    if user is None or not user.is_active:
+        return None, None
+    return user, expires_at
+
+
+def stream_response(subscription, expires_at, opening=(), transform=None):
+    """SSE response that yields `opening` chunks, then broker messages until the token expires.
+
+    `transform(message)` may turn a broker message into an SSE chunk, or None to skip it.
+    """
+    transform = transform or (lambda message: sse_event(message['event'], message['data']))
+
+    async def events():
+        try:
+            for chunk in opening:
+                yield chunk
+            while True:
+                timeout = HEARTBEAT_SECONDS
+                if expires_at:
+                    remaining = expires_at - time.time()
+                    if remaining <= 0:
+                        yield sse_event('token_expired', {})
+                        break
+                    timeout = min(timeout, remaining)
+                message = await subscription.get(timeout)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                chunk = transform(message)
+                if chunk:
+                    yield chunk
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def event_stream(request):
+    """Server-Sent Events feed of notifications, bulletins, panic alerts and site status.
+
+    Requires an ASGI server. The stream closes with a `token_expired` event when the
+    access token expires so the client can reconnect with a refreshed one.
+    """
+    user, expires_at = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    channels = await sync_to_async(channels_for)(user)
+    subscription = get_broker().subscribe(channels)
+    return stream_response(subscription, expires_at, opening=[sse_event('ready', {'channels': channels})])
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 class AuditLog(models.Model):
     """An immutable log of significant actions taken by users."""
@@ -16,7 +17,8 @@ class AuditLog(models.Model):
     action = models.CharField(max_length=255) # e.g., "Updated status of agent 'Spectre' to COMPROMISED."
 
     # When did they do it?
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set by log_action at request time; the row itself is written by a background task.
+    timestamp = models.DateTimeField(default=timezone.now)
 
     # (Optional but Recommended) Generic relation to the object that was affected.
     # This allows you to link an audit entry directly to, for example, the specific Agent object that was modified.
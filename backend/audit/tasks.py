@@ -0,0 +1,21 @@
+from django.utils.dateparse import parse_datetime
+
+from api.tasks import task
+from .models import AuditLog
+
+
+@task('audit.record')
+def record(user_id, role, action, content_type_id=None, object_id=None, details=None, timestamp=None):
+    """Persist an audit entry captured by `log_action` at request time."""
+    entry = AuditLog(
+        user_id=user_id,
+        role=role,
+        action=action,
+        content_type_id=content_type_id,
+        object_id=object_id,
+        details=details,
+    )
+    if timestamp:
+        # Keep the time the action happened, not the time the worker got to it
+        entry.timestamp = parse_datetime(timestamp)
+    entry.save()
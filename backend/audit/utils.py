@@ -1,13 +1,16 @@
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
-from .models import AuditLog
 from users.models import Mantle
 from django.utils import timezone
+from api.tasks import enqueue
 
 def log_action(user, action: str, target: models.Model = None, details: dict = None):
     """
     A centralized utility for creating audit log entries.
 
+    The role and timestamp are captured now; the AuditLog row is written by the
+    `audit.record` background task once the request's transaction commits.
+
     :param user: The user performing the action.
     :param action: A string describing the action (e.g., 'Created agent Spectre').
     :param target: The model instance being acted upon (optional).
@@ -26,10 +29,18 @@ def log_action(user, action: str, target: models.Model = None, details: dict = N
     except AttributeError:
         role = 'ANONYMOUS'  # Should not happen for authenticated users
 
-    AuditLog.objects.create(
-        user=user,
-        role=role,
-        action=action,
-        content_object=target,
-        details=details
-    )
+    content_type_id = None
+    object_id = None
+    if target is not None and target.pk is not None:
+        content_type_id = ContentType.objects.get_for_model(target).id
+        object_id = target.pk
+
+    enqueue('audit.record', {
+        'user_id': getattr(user, 'pk', None),
+        'role': role,
+        'action': action,
+        'content_type_id': content_type_id,
+        'object_id': object_id,
+        'details': details,
+        'timestamp': timezone.now().isoformat(),
+    })
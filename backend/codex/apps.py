@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class CodexConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'codex'
\ No newline at end of file
+    name = 'codex'
+
+    def ready(self):
+        # Import signal handlers
+        from . import signals  # noqa: F401
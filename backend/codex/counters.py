@@ -0,0 +1,194 @@
+"""Maintenance of UserCounter badge counts and task load.
+
+Writers call `adjust`/`adjust_where` inside the transaction that changes the counted
+rows; readers call `get_counter`, a primary-key lookup that lazily recounts users
+who have no row yet. `reconcile` rebuilds every row from the source tables.
+
+Bulletin visibility follows the effective role (`get_user_role`, so an Heir holding
+the Protector's Mantle counts Protector-visible bulletins). Each row records the
+role its bulletin count was computed for; when a mantle is granted, revoked or
+expires the roles differ and `get_counter` recounts that user.
+
+`least_loaded` picks a role's assignee from the indexed `open_tasks` column in one
+query, instead of counting each candidate's tasks.
+"""
+from django.contrib.auth.models import User
+from django.db.models import F, Count, Q
+from django.utils import timezone
+
+from .models import UserCounter, Notification, Bulletin, BulletinAck, BroadcastCursor, BroadcastNotification, Task
+
+
+def adjust(user_ids, field, delta):
+    """Add `delta` to `field` for the given users (missing rows are recounted on next read)."""
+    if not user_ids or not delta:
+        return 0
+    return UserCounter.objects.filter(user_id__in=list(user_ids)).update(**{field: F(field) + delta})
+
+
+def adjust_where(field, delta, **user_filter):
+    """Add `delta` to `field` for every counter whose user matches `user_filter` in one UPDATE."""
+    if not delta:
+        return 0
+    user_ids = User.objects.filter(**user_filter).values('id')
+    return UserCounter.objects.filter(user_id__in=user_ids).update(**{field: F(field) + delta})
+
+
+def _bulletin_recipients(bulletin):
+    roles = bulletin.recipient_roles()
+    if roles is None:
+        return User.objects.values('id')
+    audience = Q(profile__role__in=roles)
+    if 'PROTECTOR' in roles:
+        # Heirs holding an active mantle see what the Protector sees
+        audience |= Q(profile__role='HEIR', mantle__is_active=True, mantle__end_time__gt=timezone.now())
+    return User.objects.filter(audience).values('id')
+
+
+def bulletin_posted(bulletin):
+    """Increment unacked counts for everyone in the bulletin's audience who has not acknowledged it."""
+    acked = BulletinAck.objects.filter(bulletin=bulletin).values('user')
+    return (
+        UserCounter.objects.filter(user_id__in=_bulletin_recipients(bulletin))
+        .exclude(user_id__in=acked)
+        .update(unacked_bulletins=F('unacked_bulletins') + 1)
+    )
+
+
+def bulletin_removed(bulletin):
+    """Decrement unacked counts for recipients who had not acknowledged `bulletin` (call before deleting)."""
+    acked = BulletinAck.objects.filter(bulletin=bulletin).values('user')
+    return (
+        UserCounter.objects.filter(user_id__in=_bulletin_recipients(bulletin))
+        .exclude(user_id__in=acked)
+        .update(unacked_bulletins=F('unacked_bulletins') - 1)
+    )
+
+
+def reset(*fields):
+    """Zero the given counters for every user, e.g. after clearing all notifications."""
+    return UserCounter.objects.update(**{f: 0 for f in fields})
+
+
+def _count_unread(user):
+    from .notifications import unread_broadcasts
+    personal = Notification.objects.filter(user=user, read_at__isnull=True).count()
+    return personal + unread_broadcasts(user).count()
+
+
+def _role(user):
+    from api.permissions import get_user_role
+    return get_user_role(user)
+
+
+def _count_unacked(user, role):
+    return Bulletin.visible_to_role(role).exclude(acks__user=user).count()
+
+
+def _count_open_tasks(user):
+    return Task.objects.filter(assigned_to=user, status__in=Task.OPEN_STATUSES).count()
+
+
+def recount(user, role=None):
+    role = role or _role(user) or ''
+    counter, _ = UserCounter.objects.update_or_create(
+        user=user,
+        defaults={
+            'unread_notifications': _count_unread(user),
+            'unacked_bulletins': _count_unacked(user, role),
+            'counted_role': role,
+            'open_tasks': _count_open_tasks(user),
+        },
+    )
+    return counter
+
+
+def get_counter(user):
+    role = _role(user) or ''
+    try:
+        counter = UserCounter.objects.get(pk=user.pk)
+    except UserCounter.DoesNotExist:
+        return recount(user, role)
+    if counter.counted_role != role:
+        return recount(user, role)
+    return counter
+
+
+def least_loaded(role, now=None, lock=True):
+    """The active, available user of `role` with the fewest open tasks (lowest id on ties), or None.
+
+    With `lock`, the chosen counter row stays locked until the surrounding
+    transaction ends and rows locked by concurrent assignments are skipped, so
+    simultaneous role assignments spread over different users. When every
+    candidate is locked it waits for the least-loaded one instead, so None
+    only ever means the role has no available user. Call it inside
+    `transaction.atomic()` together with the task save that bumps `open_tasks`.
+    """
+    from users.models import Unavailability
+    candidates = User.objects.filter(profile__role=role, is_active=True)
+    # Users who never had a counter row get one (a one-off recount each)
+    for user in candidates.filter(counters__isnull=True):
+        recount(user)
+    qs = (
+        UserCounter.objects.filter(user__in=candidates)
+        .exclude(user_id__in=Unavailability.away_now(now or timezone.now()))
+        .order_by('open_tasks', 'user_id')
+    )
+    if not lock:
+        counter = qs.select_related('user').first()
+        return counter.user if counter else None
+    counter = qs.select_for_update(skip_locked=True, of=('self',)).select_related('user').first()
+    if counter is None:
+        # All candidates are mid-assignment elsewhere: queue behind the least-loaded one
+        counter = qs.select_for_update(of=('self',)).select_related('user').first()
+    return counter.user if counter else None
+
+
+def reconcile():
+    """Recompute every user's counters from source tables; returns the number of rows corrected."""
+    from .notifications import unread_broadcasts
+    personal = dict(
+        Notification.objects.filter(read_at__isnull=True)
+        .values('user').annotate(n=Count('id')).values_list('user', 'n')
+    )
+    by_audience = dict(Bulletin.objects.values('audience').annotate(n=Count('id')).values_list('audience', 'n'))
+    acked = {}
+    for user_id, audience, n in (
+        BulletinAck.objects.values('user', 'bulletin__audience').annotate(n=Count('id'))
+        .values_list('user', 'bulletin__audience', 'n')
+    ):
+        acked.setdefault(user_id, {})[audience] = n
+    open_tasks = dict(
+        Task.objects.filter(assigned_to__isnull=False, status__in=Task.OPEN_STATUSES)
+        .values('assigned_to').annotate(n=Count('id')).values_list('assigned_to', 'n')
+    )
+    has_broadcasts = BroadcastNotification.objects.exists()
+    cursors = {c.user_id: c for c in BroadcastCursor.objects.all()}
+    existing = {c.user_id: c for c in UserCounter.objects.all()}
+
+    corrected = 0
+    for user in User.objects.select_related('profile', 'mantle').all():
+        role = _role(user) or ''
+        unread = personal.get(user.id, 0)
+        if has_broadcasts:
+            unread += unread_broadcasts(user, cursors.get(user.id)).count()
+        audiences = Bulletin.audiences_for_role(role)
+        if audiences is None:
+            audiences = list(by_audience)
+        user_acks = acked.get(user.id, {})
+        unacked = sum(max(0, by_audience.get(a, 0) - user_acks.get(a, 0)) for a in audiences)
+        load = open_tasks.get(user.id, 0)
+        counter = existing.get(user.id)
+        if counter is None:
+            UserCounter.objects.create(
+                user=user, unread_notifications=unread, unacked_bulletins=unacked, counted_role=role, open_tasks=load,
+            )
+            corrected += 1
+        elif (counter.unread_notifications, counter.unacked_bulletins, counter.counted_role, counter.open_tasks) != (unread, unacked, role, load):
+            counter.unread_notifications = unread
+            counter.unacked_bulletins = unacked
+            counter.counted_role = role
+            counter.open_tasks = load
+            counter.save(update_fields=['unread_notifications', 'unacked_bulletins', 'counted_role', 'open_tasks', 'updated_at'])
+            corrected += 1
+    return corrected
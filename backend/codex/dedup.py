@@ -0,0 +1,207 @@
+"""Near-duplicate detection for Silo reports.
+
+Each echo's title and content are reduced to character 5-gram shingles of the
+normalised text (lower-cased words joined by single spaces, so rewording a few
+words only disturbs the shingles around them) and then to a MinHash signature
+of NUM_HASHES values, whose per-position agreement between two echoes estimates
+the Jaccard similarity of their shingle sets. The signature is cut
+into BANDS bands of ROWS values; each band is hashed into an indexed bucket row.
+Echoes sharing at least one bucket are candidates (the LSH S-curve makes pairs
+above ~0.5 similarity very likely to collide), so a lookup is an indexed probe
+of BANDS buckets plus a comparison against a handful of candidates, independent
+of how many reports exist.
+
+A new echo whose best candidate reaches DUPLICATE_THRESHOLD joins that echo's
+cluster: `duplicate_of` always points at the cluster's first report.
+"""
+import hashlib
+import re
+
+import numpy as np
+from django.apps import apps
+from django.db.models import Q
+
+from .models import Echo, EchoFingerprint, EchoBucket
+
+SHINGLE_SIZE = 5
+BANDS = 16
+ROWS = 4
+NUM_HASHES = BANDS * ROWS
+DUPLICATE_THRESHOLD = 0.6
+PROBE_CHUNK = 900
+INDEX_CHUNK = 500
+
+_PRIME = 4294967311  # smallest prime above 2**32
+_rng = np.random.RandomState(20261019)
+_A = _rng.randint(1, 2 ** 32 - 1, size=NUM_HASHES, dtype=np.uint64)
+_B = _rng.randint(0, 2 ** 32 - 1, size=NUM_HASHES, dtype=np.uint64)
+_WORD = re.compile(r'\w+')
+
+
+def shingles(text):
+    normalised = ' '.join(_WORD.findall((text or '').lower()))
+    if len(normalised) <= SHINGLE_SIZE:
+        return {normalised} if normalised else set()
+    return {normalised[i:i + SHINGLE_SIZE] for i in range(len(normalised) - SHINGLE_SIZE + 1)}
+
+
+def _hash32(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), 'little')
+
+
+def signature(title, content):
+    """MinHash signature (uint32 array) of an echo's title and content; None when there is no text."""
+    items = shingles(f"{title}\n{content}")
+    if not items:
+        return None
+    x = np.fromiter((_hash32(s) for s in items), dtype=np.uint64, count=len(items))
+    # (a * x + b) mod p fits in uint64 because a, x < 2**32
+    hashed = (np.outer(_A, x) + _B[:, None]) % np.uint64(_PRIME)
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def buckets(sig):
+    """One signed 64-bit bucket id per band."""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(), 'little', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a, b):
+    return float(np.mean(a == b))
+
+
+def _load(raw):
+    return np.frombuffer(bytes(raw), dtype=np.uint32)
+
+
+def store(echo_id, sig):
+    """Replace the stored fingerprint and bucket rows of one echo."""
+    EchoFingerprint.objects.update_or_create(echo_id=echo_id, defaults={'signature': sig.tobytes()})
+    EchoBucket.objects.filter(echo_id=echo_id).delete()
+    EchoBucket.objects.bulk_create([
+        EchoBucket(echo_id=echo_id, band=band, bucket=bucket) for band, bucket in enumerate(buckets(sig))
+    ])
+
+
+def _bucket_holders(probes, exclude):
+    """{(band, bucket): echo ids} for stored buckets matching any probe.
+
+    Probes are grouped per band (so every term can use the (band, bucket) index)
+    and OR-ed into queries of at most PROBE_CHUNK values; one echo is one query.
+    """
+    per_band = {}
+    for band, bucket in probes:
+        per_band.setdefault(band, []).append(bucket)
+    queries, query, size = [], Q(), 0
+    for band, values in sorted(per_band.items()):
+        for i in range(0, len(values), PROBE_CHUNK):
+            chunk = values[i:i + PROBE_CHUNK]
+            if size and size + len(chunk) > PROBE_CHUNK:
+                queries.append(query)
+                query, size = Q(), 0
+            query |= Q(band=band, bucket__in=chunk)
+            size += len(chunk)
+    queries.append(query)
+    holders = {}
+    for query in queries:
+        for echo_id, band, bucket in EchoBucket.objects.filter(query).exclude(echo_id__in=exclude).values_list('echo_id', 'band', 'bucket'):
+            holders.setdefault((band, bucket), set()).add(echo_id)
+    return holders
+
+
+def register_many(echoes):
+    """Fingerprint new echoes and attach each likely duplicate to its nearest match's cluster.
+
+    Echoes are processed in order, so later ones in the batch can match earlier
+    ones. The number of queries does not grow with the batch (bucket probes are
+    chunked). Returns {echo_id: root_id} for the echoes found to be duplicates.
+    """
+    sigs = {}
+    for echo in echoes:
+        sig = signature(echo.title, echo.content)
+        if sig is not None:
+            sigs[echo.pk] = (sig, list(enumerate(buckets(sig))))
+    if not sigs:
+        return {}
+    probes = {key for _, keys in sigs.values() for key in keys}
+    holders = _bucket_holders(probes, exclude=list(sigs))
+    known = set().union(*holders.values()) if holders else set()
+    stored = {pk: _load(raw) for pk, raw in EchoFingerprint.objects.filter(echo_id__in=known).values_list('echo_id', 'signature')}
+    roots = dict(Echo.objects.filter(pk__in=known, duplicate_of__isnull=False).values_list('pk', 'duplicate_of_id'))
+    matched = []
+    for echo in echoes:
+        if echo.pk not in sigs:
+            continue
+        sig, keys = sigs[echo.pk]
+        candidates = set().union(*(holders.get(key, set()) for key in keys))
+        best, best_score = None, 0.0
+        for candidate in sorted(candidates):
+            if candidate in stored:
+                score = similarity(sig, stored[candidate])
+                if score > best_score:
+                    best, best_score = candidate, score
+        if best is not None and best_score >= DUPLICATE_THRESHOLD:
+            roots[echo.pk] = roots.get(best, best)
+            echo.duplicate_of_id, echo.duplicate_similarity = roots[echo.pk], best_score
+            matched.append(echo)
+        stored[echo.pk] = sig
+        for key in keys:
+            holders.setdefault(key, set()).add(echo.pk)
+    EchoFingerprint.objects.bulk_create([EchoFingerprint(echo_id=pk, signature=sig.tobytes()) for pk, (sig, _) in sigs.items()])
+    EchoBucket.objects.bulk_create([
+        EchoBucket(echo_id=pk, band=band, bucket=bucket) for pk, (_, keys) in sigs.items() for band, bucket in keys
+    ])
+    if matched:
+        Echo.objects.bulk_update(matched, ['duplicate_of', 'duplicate_similarity'])
+    return {echo.pk: echo.duplicate_of_id for echo in matched}
+
+
+def register(echo):
+    """Fingerprint one new echo; returns the cluster's root echo when it is a likely duplicate, else None."""
+    root_id = register_many([echo]).get(echo.pk)
+    return Echo.objects.get(pk=root_id) if root_id else None
+
+
+def reindex(echo):
+    """Refresh the fingerprint of an edited echo; its cluster membership is left as decided."""
+    sig = signature(echo.title, echo.content)
+    if sig is None:
+        EchoFingerprint.objects.filter(echo_id=echo.pk).delete()
+        EchoBucket.objects.filter(echo_id=echo.pk).delete()
+        return
+    store(echo.pk, sig)
+
+
+def cluster(echo):
+    """The root report and every duplicate attached to it."""
+    root_id = echo.duplicate_of_id or echo.pk
+    return Echo.objects.filter(pk=root_id) | Echo.objects.filter(duplicate_of_id=root_id)
+
+
+def index_all(get_model=apps.get_model):
+    """Fingerprint every echo that has no fingerprint yet; returns the number of echoes fingerprinted.
+
+    Existing echoes are not matched against each other (clusters are only
+    decided when a report arrives). Rows are bulk-created per INDEX_CHUNK
+    echoes. `get_model` lets a data migration run this against its historical models.
+    """
+    echo_model = get_model('codex.Echo')
+    fingerprint_model, bucket_model = get_model('codex.EchoFingerprint'), get_model('codex.EchoBucket')
+    ids = list(echo_model.objects.filter(fingerprint__isnull=True).order_by('pk').values_list('pk', flat=True))
+    n = 0
+    for i in range(0, len(ids), INDEX_CHUNK):
+        sigs = {}
+        for pk, title, content in echo_model.objects.filter(pk__in=ids[i:i + INDEX_CHUNK]).values_list('pk', 'title', 'content'):
+            sig = signature(title, content)
+            if sig is not None:
+                sigs[pk] = sig
+        bucket_model.objects.filter(echo_id__in=list(sigs)).delete()
+        fingerprint_model.objects.bulk_create([fingerprint_model(echo_id=pk, signature=sig.tobytes()) for pk, sig in sigs.items()])
+        bucket_model.objects.bulk_create([
+            bucket_model(echo_id=pk, band=band, bucket=bucket)
+            for pk, sig in sigs.items() for band, bucket in enumerate(buckets(sig))
+        ])
+        n += len(sigs)
+    return n
@@ -0,0 +1,184 @@
+"""Pre-rendered, sectioned Codex documents.
+
+Entry content is written in a small Markdown subset (headings, paragraphs, lists,
+quotes, fenced code, rules, emphasis, inline code and links). It is rendered once
+when an entry is saved: the source is HTML-escaped before any markup is added, so
+the output only ever contains tags produced here and links with safe schemes.
+
+Headings of level 1-3 start a new section; text before the first one is the
+`intro` section. The rendered document, its table of contents and one row per
+section are stored, so lists can show the TOC and readers can fetch a single
+section by anchor instead of the whole document.
+"""
+import hashlib
+import html
+import re
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import CodexEntry, CodexSection
+
+RENDERER_VERSION = 1
+SECTION_LEVEL = 3
+INTRO_ANCHOR = 'intro'
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_FENCE = re.compile(r'^\s*(```|~~~)')
+_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_BULLET = re.compile(r'^\s*[-*+]\s+(.*)$')
+_NUMBERED = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+_QUOTE = re.compile(r'^\s*>\s?(.*)$')
+
+_CODE_SPAN = re.compile(r'`([^`]+)`')
+_LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+_STRONG = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+_EMPHASIS = re.compile(r'(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])')
+_SAFE_URL = re.compile(r'^(https?://|mailto:|/|#)', re.IGNORECASE)
+
+
+def digest(content):
+    return hashlib.sha256(f"{RENDERER_VERSION}\n{content}".encode()).hexdigest()
+
+
+def _inline(text):
+    """Escape `text`, then apply inline markup. Code spans are protected from further markup."""
+    spans = []
+
+    def stash(match):
+        spans.append(f'<code>{html.escape(match.group(1))}</code>')
+        return f'\x00{len(spans) - 1}\x00'
+
+    text = _CODE_SPAN.sub(stash, text)
+    text = html.escape(text)
+
+    def link(match):
+        label, url = match.group(1), html.unescape(match.group(2))
+        if not _SAFE_URL.match(url):
+            return label
+        return f'<a href="{html.escape(url)}" rel="noopener noreferrer">{label}</a>'
+
+    text = _LINK.sub(link, text)
+    text = _STRONG.sub(r'<strong>\2</strong>', text)
+    text = _EMPHASIS.sub(r'<em>\2</em>', text)
+    return re.sub(r'\x00(\d+)\x00', lambda m: spans[int(m.group(1))], text)
+
+
+def _blocks(lines):
+    """Yield ('heading', level, text) or ('html', fragment) for a list of source lines."""
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        if _FENCE.match(line):
+            fence = _FENCE.match(line).group(1)
+            body = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence):
+                body.append(lines[i])
+                i += 1
+            i += 1
+            yield ('html', f'<pre><code>{html.escape(chr(10).join(body))}</code></pre>')
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            yield ('heading', len(heading.group(1)), heading.group(2))
+            i += 1
+            continue
+        if _RULE.match(line):
+            yield ('html', '<hr>')
+            i += 1
+            continue
+        for pattern, tag in ((_BULLET, 'ul'), (_NUMBERED, 'ol')):
+            if pattern.match(line):
+                items = []
+                while i < len(lines) and pattern.match(lines[i]):
+                    items.append(f'<li>{_inline(pattern.match(lines[i]).group(1))}</li>')
+                    i += 1
+                yield ('html', f'<{tag}>{"".join(items)}</{tag}>')
+                break
+        else:
+            if _QUOTE.match(line):
+                quoted = []
+                while i < len(lines) and _QUOTE.match(lines[i]):
+                    quoted.append(_inline(_QUOTE.match(lines[i]).group(1)))
+                    i += 1
+                yield ('html', f'<blockquote><p>{"<br>".join(quoted)}</p></blockquote>')
+                continue
+            paragraph = []
+            while i < len(lines) and lines[i].strip() and not any(
+                p.match(lines[i]) for p in (_FENCE, _HEADING, _RULE, _BULLET, _NUMBERED, _QUOTE)
+            ):
+                paragraph.append(_inline(lines[i].strip()))
+                i += 1
+            yield ('html', f'<p>{"<br>".join(paragraph)}</p>')
+
+
+def render(content):
+    """Render `content` to sections: a list of {anchor, title, level, html} dicts in document order."""
+    sections = [{'anchor': INTRO_ANCHOR, 'title': '', 'level': 0, 'parts': []}]
+    used = {INTRO_ANCHOR}
+    for block in _blocks((content or '').replace('\r\n', '\n').split('\n')):
+        if block[0] == 'html':
+            sections[-1]['parts'].append(block[1])
+            continue
+        _, level, title = block
+        anchor = slugify(title)[:100] or 'section'
+        base, n = anchor, 2
+        while anchor in used:
+            anchor = f'{base}-{n}'
+            n += 1
+        used.add(anchor)
+        heading = f'<h{level} id="{anchor}">{_inline(title)}</h{level}>'
+        if level <= SECTION_LEVEL:
+            sections.append({'anchor': anchor, 'title': title, 'level': level, 'parts': [heading]})
+        else:
+            sections[-1]['parts'].append(heading)
+    if not sections[0]['parts'] and len(sections) > 1:
+        sections.pop(0)
+    return [
+        {'anchor': s['anchor'], 'title': s['title'], 'level': s['level'], 'html': '\n'.join(s['parts'])}
+        for s in sections
+    ]
+
+
+def table_of_contents(sections):
+    return [
+        {'anchor': s['anchor'], 'title': s['title'], 'level': s['level'], 'size': len(s['html'].encode())}
+        for s in sections
+    ]
+
+
+def apply(entry, force=False):
+    """Render `entry` and store its HTML, TOC and sections unless its content is unchanged.
+
+    Returns True when the entry was (re)rendered.
+    """
+    content_digest = digest(entry.content)
+    if not force and entry.rendered_hash == content_digest:
+        return False
+    sections = render(entry.content)
+    entry.content_html = '\n'.join(s['html'] for s in sections)
+    entry.toc = table_of_contents(sections)
+    entry.rendered_hash = content_digest
+    with transaction.atomic():
+        CodexEntry.objects.filter(pk=entry.pk).update(
+            content_html=entry.content_html, toc=entry.toc, rendered_hash=entry.rendered_hash,
+        )
+        CodexSection.objects.filter(entry_id=entry.pk).delete()
+        CodexSection.objects.bulk_create([
+            CodexSection(entry_id=entry.pk, position=i, anchor=s['anchor'], title=s['title'][:255],
+                         level=s['level'], html=s['html'])
+            for i, s in enumerate(sections)
+        ])
+    return True
+
+
+def render_all(force=False):
+    """Render every entry whose stored output is missing or stale; returns how many were rendered."""
+    rendered = 0
+    for entry in CodexEntry.objects.only('id', 'content', 'rendered_hash').iterator():
+        rendered += apply(entry, force=force)
+    return rendered
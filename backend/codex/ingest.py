@@ -0,0 +1,154 @@
+"""Bulk Silo ingestion.
+
+Field teams upload queued reports as NDJSON (one echo object per line) or a JSON
+array. Items are validated individually, so one bad line does not sink the
+batch, and the valid ones are written with a fixed number of statements: one
+`bulk_create` for the echoes, then batched fingerprinting and triage indexing
+(the alias mention scan is queued as one background task). Leadership receives
+one digest notification per batch, skipping reports clustered as duplicates.
+
+Backpressure keeps bursts from starving interactive traffic: request bodies
+and item counts are capped, each user has a per-minute item budget, and only
+CONCURRENT_BATCHES ingests run at once across all workers. Requests over a
+limit get 429 with Retry-After instead of queueing.
+"""
+import json
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.parsers import BaseParser
+
+from api.tasks import enqueue
+from .models import Echo, Mention, Notification
+from .notifications import broadcast
+from .serializers import EchoSerializer
+from . import dedup, triage
+
+MAX_BYTES = 2 * 1024 * 1024
+MAX_ITEMS = 500
+ITEMS_PER_MINUTE = 2000
+CONCURRENT_BATCHES = 2
+SLOT_TTL = 120  # seconds; frees a slot held by a crashed worker
+
+
+class NDJSONParser(BaseParser):
+    """Newline-delimited JSON; parsing is left to `parse_lines` so errors can be reported per line."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read(MAX_BYTES + 1)
+
+
+class Rejected(Exception):
+    def __init__(self, message, status_code, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_lines(raw):
+    """[(line number, object or None, error or None)] for every non-blank line."""
+    if isinstance(raw, list):
+        return [(i, item, None) for i, item in enumerate(raw, start=1)]
+    if len(raw) > MAX_BYTES:
+        raise Rejected(f'Batch exceeds {MAX_BYTES} bytes.', 413)
+    items = []
+    for i, line in enumerate(raw.decode('utf-8', errors='replace').splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append((i, json.loads(line), None))
+        except ValueError as e:
+            items.append((i, None, f'Invalid JSON: {e}'))
+    return items
+
+
+def _take_budget(user_id, n):
+    """Spend `n` of the user's per-minute item budget; raises Rejected when it would overflow."""
+    now = time.time()
+    key = f'silo:ingest:items:{user_id}:{int(now // 60)}'
+    cache.add(key, 0, 120)
+    spent = cache.incr(key, n)
+    if spent > ITEMS_PER_MINUTE:
+        cache.decr(key, n)
+        raise Rejected('Ingest budget for this minute is used up.', 429, retry_after=int(60 - now % 60) + 1)
+
+
+class _Slot:
+    """One of CONCURRENT_BATCHES global ingest slots, held for the duration of a batch."""
+
+    def __enter__(self):
+        self.token = uuid.uuid4().hex
+        for slot in range(CONCURRENT_BATCHES):
+            key = f'silo:ingest:slot:{slot}'
+            if cache.add(key, self.token, SLOT_TTL):
+                self.key = key
+                return self
+        raise Rejected('Ingest capacity is busy.', 429, retry_after=5)
+
+    def __exit__(self, *exc):
+        if cache.get(self.key) == self.token:
+            cache.delete(self.key)
+        return False
+
+
+def _validate(items):
+    """Split parsed items into per-line errors and validated rows (line, data)."""
+    results, rows = {}, []
+    for line, item, error in items:
+        if error is None and not isinstance(item, dict):
+            error = 'Each line must be a JSON object.'
+        if error is not None:
+            results[line] = {'line': line, 'status': 'invalid', 'errors': {'non_field_errors': [error]}}
+            continue
+        serializer = EchoSerializer(data=item)
+        if serializer.is_valid():
+            rows.append((line, serializer.validated_data))
+        else:
+            results[line] = {'line': line, 'status': 'invalid', 'errors': serializer.errors}
+    return results, rows
+
+
+def ingest(user, raw):
+    """Validate and insert a batch; returns (summary counts, per-line results in input order, created echoes)."""
+    items = parse_lines(raw)
+    if len(items) > MAX_ITEMS:
+        raise Rejected(f'Batch exceeds {MAX_ITEMS} items; split it up.', 413)
+    if not items:
+        raise Rejected('Batch is empty.', 400)
+    _take_budget(user.pk, len(items))
+    with _Slot():
+        results, rows = _validate(items)
+        with transaction.atomic():
+            echoes = Echo.objects.bulk_create([Echo(created_by=user, **data) for _, data in rows])
+            roots = dedup.register_many(echoes)
+            triage.index_new(echoes)
+            if echoes:
+                # bulk_create skips post_save, so queue the mention scan the signal would have
+                enqueue('codex.index_mentions', {'source_kind': Mention.Source.ECHO, 'ids': [echo.pk for echo in echoes]})
+            fresh = [echo for echo in echoes if echo.pk not in roots]
+            if fresh:
+                message = (
+                    f"New Silo report: {fresh[0].title}" if len(fresh) == 1
+                    else f"{len(fresh)} new Silo reports from {user.username}"
+                )
+                broadcast(['PROTECTOR', 'HEIR'], Notification.Type.SILO_REPORT, message,
+                          {'echo_ids': [echo.pk for echo in fresh]})
+    for echo, (line, _) in zip(echoes, rows):
+        root = roots.get(echo.pk)
+        results[line] = {
+            'line': line,
+            'status': 'duplicate' if root else 'created',
+            'id': echo.pk,
+            'duplicate_of': root,
+        }
+    ordered = [results[line] for line, _, _ in items]
+    summary = {
+        'received': len(items),
+        'created': len(fresh),
+        'duplicates': len(roots),
+        'invalid': len(items) - len(echoes),
+    }
+    return summary, ordered, echoes
@@ -0,0 +1,117 @@
+"""Codex category landing data.
+
+Each category (an `entry_type`) carries its cover, description, entry count,
+latest entry and last-updated time. The statistics come from one grouped query
+and the assembled list is cached until a CodexEntry or CodexCategoryConfig
+changes, so a warm landing page does not touch the database.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from rest_framework import serializers
+
+from .models import CodexEntry, CodexCategoryConfig
+
+CACHE_KEY = 'codex:categories'
+CACHE_TTL = 600
+
+# Image URLs are static placeholders; replace with real assets as desired.
+DEFAULT_CATEGORIES = [
+    {
+        'name': 'Historic Events',
+        'image_url': '/static/images/codex_events.jpg',
+        'description': "Review major operations and outcomes.",
+    },
+    {
+        'name': 'Doctrine & Philosophy',
+        'image_url': '/static/images/codex_doctrine.jpg',
+        'description': "Study the core tenets and philosophy.",
+    },
+    {
+        'name': 'Biographies of the Lost',
+        'image_url': '/static/images/codex_biographies.jpg',
+        'description': "Honor agents who made the ultimate sacrifice.",
+    },
+    {
+        'name': 'Standard Operating Procedures (SOPs)',
+        'image_url': '/static/images/codex_sops.jpg',
+        'description': "Reference standard operating procedures.",
+    },
+    {
+        'name': 'Threat Analysis Reports',
+        'image_url': '/static/images/codex_threats.jpg',
+        'description': "Analyze hostile entities and vectors.",
+    },
+]
+
+_dt = serializers.DateTimeField()
+
+
+def _ts(value):
+    return _dt.to_representation(value) if value else None
+
+
+def entry_stats():
+    """{entry_type: row} with count, last update and latest entry, in one grouped query."""
+    latest = CodexEntry.objects.filter(entry_type=OuterRef('entry_type')).order_by('-created_at', '-id')
+    rows = (
+        CodexEntry.objects.order_by().values('entry_type')
+        .annotate(
+            count=Count('id'),
+            last_updated=Max('updated_at'),
+            latest_id=Subquery(latest.values('id')[:1]),
+            latest_title=Subquery(latest.values('title')[:1]),
+            latest_created_at=Subquery(latest.values('created_at')[:1]),
+        )
+    )
+    return {row['entry_type']: row for row in rows}
+
+
+def _category(name, image_url, description, stats):
+    row = stats.get(name)
+    return {
+        'name': name,
+        'image_url': image_url,
+        'description': description,
+        'entry_count': row['count'] if row else 0,
+        'last_updated': _ts(row['last_updated']) if row else None,
+        'latest_entry': {
+            'id': row['latest_id'],
+            'title': row['latest_title'],
+            'created_at': _ts(row['latest_created_at']),
+        } if row else None,
+    }
+
+
+def build():
+    stats = entry_stats()
+    configs = {c.name: c for c in CodexCategoryConfig.objects.all()}
+    out = []
+    for item in DEFAULT_CATEGORIES:
+        cfg = configs.get(item['name'])
+        out.append(_category(
+            item['name'],
+            (cfg.image_url if cfg else '') or item['image_url'],
+            (cfg.description if cfg else '') or item['description'],
+            stats,
+        ))
+    # Entry types outside the defaults still get a card
+    defaults = {item['name'] for item in DEFAULT_CATEGORIES}
+    for name in sorted(set(stats) - defaults):
+        cfg = configs.get(name)
+        out.append(_category(name, cfg.image_url if cfg else '', cfg.description if cfg else '', stats))
+    return out
+
+
+def get_categories():
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = build()
+        cache.set(CACHE_KEY, data, CACHE_TTL)
+    return data
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
+    # Drop again after commit in case a concurrent read re-cached the old list
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
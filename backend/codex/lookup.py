@@ -0,0 +1,264 @@
+"""Plate, VIN and address lookup across Vault, Index and Scales records.
+
+Identifiers are normalized once, on save, into indexed LookupKey rows:
+  - plates: upper-case alphanumerics ("ab-123 cd" -> "AB123CD"), from vehicle
+    plates and plate-like tokens in free-text `known_vehicles`;
+  - OCR-tolerant plates: the plate's skeleton (look-alike characters folded,
+    O/Q/D -> 0, I/L -> 1, Z -> 2, S -> 5, G -> 6, B -> 8) plus every skeleton
+    with one character deleted, so a query within one edit of a stored plate
+    shares a key with it (symmetric-delete matching);
+  - VINs: upper-case alphanumerics with I -> 1 and O/Q -> 0 (letters VINs never
+    contain), matched by prefix;
+  - addresses: lower-case tokens with common street words abbreviated.
+
+A lookup is then a couple of indexed probes plus an edit-distance check on a
+handful of candidates, regardless of how many records exist.
+"""
+import re
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import LookupKey
+
+Kind = LookupKey.Kind
+Source = LookupKey.Source
+PLATE_MIN, PLATE_MAX = 2, 10
+FUZZY_MIN = 4          # shorter plates match too much within one edit
+VIN_LENGTH = 17
+VIN_MIN_PREFIX = 5
+RESULT_LIMIT = 25
+
+_OCR = str.maketrans({'O': '0', 'Q': '0', 'D': '0', 'I': '1', 'L': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'})
+_VIN_OCR = str.maketrans({'I': '1', 'O': '0', 'Q': '0'})
+_NON_ALNUM = re.compile(r'[^A-Z0-9]')
+_TOKEN = re.compile(r'[A-Z0-9]+(?:-[A-Z0-9]+)*')
+_ADDRESS_TOKEN = re.compile(r'[a-z0-9]+')
+_ADDRESS_WORDS = {
+    'street': 'st', 'avenue': 'ave', 'av': 'ave', 'road': 'rd', 'boulevard': 'blvd', 'drive': 'dr', 'lane': 'ln',
+    'court': 'ct', 'place': 'pl', 'square': 'sq', 'highway': 'hwy', 'parkway': 'pkwy', 'terrace': 'ter',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w', 'apartment': 'apt', 'suite': 'ste', 'building': 'bldg',
+}
+
+# Fields scanned per source kind: (field, what it holds)
+SOURCES = {
+    Source.VEHICLE: ('codex.Vehicle', (('license_plate_clean', 'plate'), ('license_plate_cloned', 'plate'), ('vin', 'vin'))),
+    Source.PROPERTY: ('codex.PropertyDossier', (('address', 'address'),)),
+    Source.PROFILE: ('index.IndexProfile', (('known_vehicles', 'text'),)),
+    Source.SCALES_AGENT: ('scales.Agent', (('known_vehicles', 'text'),)),
+}
+
+
+def normalize_plate(value):
+    return _NON_ALNUM.sub('', (value or '').upper())
+
+
+def skeleton(plate):
+    return plate.translate(_OCR)
+
+
+def normalize_vin(value):
+    return normalize_plate(value).translate(_VIN_OCR)
+
+
+def address_tokens(value):
+    return [_ADDRESS_WORDS.get(t, t) for t in _ADDRESS_TOKEN.findall((value or '').lower())]
+
+
+def deletes(word):
+    """`word` and every string obtained by deleting one of its characters."""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def edit_distance(a, b):
+    """Optimal string alignment distance (substitutions, insertions, deletions, adjacent swaps)."""
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def plates_in_text(text):
+    """Plate-like strings in free text: alphanumeric groups (joined across up to three short
+    space-separated parts, e.g. "AB 123 CD") that contain a digit."""
+    tokens = [t.replace('-', '') for t in _TOKEN.findall((text or '').upper())]
+    found = set()
+    for i in range(len(tokens)):
+        joined = ''
+        for j in range(i, min(i + 3, len(tokens))):
+            if j > i and len(tokens[j]) > 4:
+                break
+            joined += tokens[j]
+            if FUZZY_MIN <= len(joined) <= PLATE_MAX and any(c.isdigit() for c in joined):
+                found.add(joined)
+    return found
+
+
+def vins_in_text(text):
+    return {
+        normalize_vin(t) for t in _TOKEN.findall((text or '').upper())
+        if len(t.replace('-', '')) == VIN_LENGTH and any(c.isdigit() for c in t) and any(c.isalpha() for c in t)
+    }
+
+
+def _plate_keys(field, plate):
+    keys = {(Kind.PLATE, plate, field, plate)}
+    if len(plate) >= FUZZY_MIN:
+        keys |= {(Kind.PLATE_FUZZY, d, field, plate) for d in deletes(skeleton(plate))}
+    return keys
+
+
+def extract(source_kind, obj):
+    """{(kind, key, field, value)} for one record; soft-deleted records have none."""
+    if obj is None or getattr(obj, 'deleted_at', None):
+        return set()
+    keys = set()
+    for field, holds in SOURCES[source_kind][1]:
+        value = getattr(obj, field) or ''
+        if holds == 'plate':
+            plate = normalize_plate(value)
+            if PLATE_MIN <= len(plate) <= PLATE_MAX:
+                keys |= _plate_keys(field, plate)
+        elif holds == 'vin':
+            vin = normalize_vin(value)
+            if vin:
+                keys.add((Kind.VIN, vin[:64], field, vin[:64]))
+        elif holds == 'address':
+            keys |= {(Kind.ADDRESS, t[:64], field, t[:64]) for t in address_tokens(value)}
+        else:
+            for plate in plates_in_text(value):
+                keys |= _plate_keys(field, plate)
+            keys |= {(Kind.VIN, vin, field, vin) for vin in vins_in_text(value)}
+    return keys
+
+
+def sync(source_kind, obj):
+    """Write only the difference between a record's stored and current keys."""
+    wanted = extract(source_kind, obj)
+    with transaction.atomic():
+        current = {
+            (kind, key, field, value): pk
+            for pk, kind, key, field, value in LookupKey.objects.filter(source_kind=source_kind, source_id=obj.pk)
+            .values_list('pk', 'kind', 'key', 'field', 'value')
+        }
+        stale = [pk for row, pk in current.items() if row not in wanted]
+        if stale:
+            LookupKey.objects.filter(pk__in=stale).delete()
+        LookupKey.objects.bulk_create([
+            LookupKey(kind=kind, key=key, source_kind=source_kind, source_id=obj.pk, field=field, value=value)
+            for kind, key, field, value in wanted - set(current)
+        ])
+
+
+def forget(source_kind, source_id):
+    return LookupKey.objects.filter(source_kind=source_kind, source_id=source_id).delete()[0]
+
+
+def rebuild(get_model=apps.get_model):
+    """Re-derive the keys of every record; returns the number of records processed.
+
+    `get_model` lets a data migration run this against its historical models.
+    """
+    key_model = get_model('codex.LookupKey')
+    n = 0
+    for source_kind, (label, fields) in SOURCES.items():
+        model = get_model(label)
+        key_model.objects.filter(source_kind=source_kind).delete()
+        rows = []
+        for obj in model._base_manager.iterator():
+            rows += [
+                key_model(kind=kind, key=key, source_kind=source_kind, source_id=obj.pk, field=field, value=value)
+                for kind, key, field, value in extract(source_kind, obj)
+            ]
+            n += 1
+        key_model.objects.bulk_create(rows, batch_size=1000)
+    return n
+
+
+def _labels(source_kind, ids):
+    label, _ = SOURCES[source_kind]
+    qs = apps.get_model(label)._base_manager.filter(pk__in=ids)
+    if source_kind == Source.VEHICLE:
+        return {
+            v['id']: ' '.join(str(p) for p in (v['year'], v['make'], v['model']) if p) or f"Vehicle #{v['id']}"
+            for v in qs.values('id', 'year', 'make', 'model')
+        }
+    if source_kind == Source.PROPERTY:
+        return {p['id']: f"{p['name']} — {p['address']}" for p in qs.values('id', 'name', 'address')}
+    if source_kind == Source.PROFILE:
+        return dict(qs.values_list('id', 'full_name'))
+    return dict(qs.values_list('id', 'alias'))
+
+
+def plate_match(stored, query):
+    """(match type, score) of a stored plate against a normalized query plate, or None."""
+    if stored == query:
+        return 'exact', 1.0
+    if skeleton(stored) == skeleton(query):
+        return 'ocr', 0.9
+    if edit_distance(skeleton(stored), skeleton(query)) <= 1:
+        return 'near', 0.7
+    return None
+
+
+def search(query, kinds=None):
+    """Records whose plates, VINs or addresses match `query`, best first.
+
+    Plates match exactly (score 1.0), up to OCR look-alikes (0.9) or within one
+    edit of the folded plate (0.7); VINs match by prefix (0.95, 1.0 when whole);
+    addresses by the share of query tokens the record contains.
+    """
+    kinds = set(kinds or ('plate', 'vin', 'address'))
+    plate, vin = normalize_plate(query), normalize_vin(query)
+    probe = Q()
+    if 'plate' in kinds and PLATE_MIN <= len(plate) <= PLATE_MAX:
+        probe |= Q(kind=Kind.PLATE, key=plate)
+        if len(plate) >= FUZZY_MIN:
+            probe |= Q(kind=Kind.PLATE_FUZZY, key__in=deletes(skeleton(plate)))
+    if 'vin' in kinds and len(vin) >= VIN_MIN_PREFIX:
+        probe |= Q(kind=Kind.VIN, key__startswith=vin[:VIN_LENGTH])
+    best = {}
+
+    def offer(hit):
+        ident = (hit['source'], hit['id'], hit['field'], hit['kind'])
+        if ident not in best or best[ident]['score'] < hit['score']:
+            best[ident] = hit
+
+    if probe:
+        for kind, source_kind, source_id, field, value in LookupKey.objects.filter(probe).values_list(
+            'kind', 'source_kind', 'source_id', 'field', 'value'
+        )[:RESULT_LIMIT * 20]:
+            hit = {'source': source_kind, 'id': source_id, 'field': field, 'value': value}
+            if kind == Kind.VIN:
+                offer({**hit, 'kind': 'VIN', 'match': 'exact' if value == vin else 'prefix', 'score': 1.0 if value == vin else 0.95})
+            else:
+                matched = plate_match(value, plate)
+                if matched:
+                    offer({**hit, 'kind': 'PLATE', 'match': matched[0], 'score': matched[1]})
+    tokens = set(address_tokens(query)) if 'address' in kinds else set()
+    if tokens:
+        needed = max(1, len(tokens) - 1)
+        rows = (
+            LookupKey.objects.filter(kind=Kind.ADDRESS, key__in=tokens)
+            .values('source_kind', 'source_id', 'field')
+            .annotate(n=Count('key', distinct=True)).filter(n__gte=needed)
+            .order_by('-n')[:RESULT_LIMIT]
+        )
+        for row in rows:
+            offer({
+                'source': row['source_kind'], 'id': row['source_id'], 'field': row['field'], 'value': ' '.join(sorted(tokens)),
+                'kind': 'ADDRESS', 'match': 'address', 'score': round(row['n'] / len(tokens), 2),
+            })
+    hits = sorted(best.values(), key=lambda h: (-h['score'], h['source'], h['id']))[:RESULT_LIMIT]
+    by_source = {}
+    for hit in hits:
+        by_source.setdefault(hit['source'], set()).add(hit['id'])
+    labels = {source_kind: _labels(source_kind, ids) for source_kind, ids in by_source.items()}
+    return [{**hit, 'label': labels[hit['source']].get(hit['id'])} for hit in hits]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import dedup
+
+
+class Command(BaseCommand):
+    help = "Computes MinHash fingerprints for echoes that have none, so new reports can be matched against them"
+
+    def handle(self, *args, **options):
+        indexed = dedup.index_all()
+        self.stdout.write(self.style.SUCCESS(f'Successfully fingerprinted {indexed} echoes.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import mentions
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the alias matcher and rescans echoes, Silo comments, Codex entries and operation logs for mentions"
+
+    def handle(self, *args, **options):
+        scanned = mentions.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Successfully scanned {scanned} texts for mentions.'))
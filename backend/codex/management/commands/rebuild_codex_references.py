@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import references
+
+
+class Command(BaseCommand):
+    help = "Re-extracts links and mentions from every Codex entry into the reference table"
+
+    def handle(self, *args, **options):
+        processed = references.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Successfully extracted references from {processed} codex entries.'))
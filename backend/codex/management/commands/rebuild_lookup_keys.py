@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import lookup
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the plate, VIN and address lookup keys of vehicles, properties, Index profiles and Scales agents"
+
+    def handle(self, *args, **options):
+        indexed = lookup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {indexed} records for lookup.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import triage
+
+
+class Command(BaseCommand):
+    help = "Re-derives involved entities of every echo and recomputes their triage priorities"
+
+    def handle(self, *args, **options):
+        processed = triage.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Successfully re-scored {processed} echoes.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from codex import counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes per-user unread notification and unacked bulletin counters from source tables"
+
+    def handle(self, *args, **options):
+        corrected = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Successfully reconciled counters ({corrected} rows corrected).'))
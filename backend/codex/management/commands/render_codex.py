@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from codex import documents
+
+
+class Command(BaseCommand):
+    help = "Renders Codex entries to sectioned HTML (only missing or stale ones unless --force)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render every entry')
+
+    def handle(self, *args, **options):
+        rendered = documents.render_all(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully rendered {rendered} codex entries.'))
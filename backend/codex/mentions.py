@@ -0,0 +1,344 @@
+"""Alias mention tagging.
+
+Every name and alias of Index profiles, Lineage agents, Scales agents and
+factions is compiled into one Aho–Corasick automaton, so scanning a text costs
+one pass over it regardless of how many names exist. Matches must sit on word
+boundaries and overlapping matches resolve leftmost-longest ("Black Tide Cell"
+beats "Black Tide"). Results are stored as Mention rows, so "everything that
+mentions X" is an indexed lookup on (entity_kind, entity_id).
+
+Echoes, Silo comments, Codex entries and operation logs are scanned in the
+background when saved. When an entity's names change, the automaton is patched
+in place (only the changed names are added to or dropped from the trie; links
+are recomputed on the next scan) and just the affected texts are rescanned:
+those already mentioning the entity plus those containing one of its new names.
+A version number in the cache tells other processes their automaton is stale.
+"""
+import re
+import threading
+from collections import Counter, deque
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Mention
+
+Source = Mention.Source
+Entity = Mention.Entity
+MIN_NAME_LENGTH = 3
+VERSION_KEY = 'codex:mentions:version'
+SCAN_CHUNK = 500
+LIST_LIMIT = 50
+
+# Model and text fields scanned for each source kind
+SOURCES = {
+    Source.ECHO: ('codex.Echo', ('title', 'content')),
+    Source.SILO_COMMENT: ('codex.SiloComment', ('message',)),
+    Source.CODEX_ENTRY: ('codex.CodexEntry', ('title', 'content')),
+    Source.OPERATION_LOG: ('loom.OperationLog', ('message',)),
+}
+# Model and name fields of each entity kind; IndexProfile.aliases is a free-text list
+ENTITIES = {
+    Entity.PROFILE: ('index.IndexProfile', ('full_name', 'aliases')),
+    Entity.LINEAGE_AGENT: ('lineage.Agent', ('alias',)),
+    Entity.SCALES_AGENT: ('scales.Agent', ('alias', 'name')),
+    Entity.FACTION: ('scales.Faction', ('name',)),
+}
+_ALIAS_SEPARATORS = re.compile(r'[,;\n/|]+')
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class Automaton:
+    """Aho–Corasick matcher over lower-cased names that supports adding and removing names."""
+
+    def __init__(self):
+        self._next = [{}]     # trie edges per node
+        self._word = [None]   # name ending at the node, if any
+        self._fail = [0]
+        self._out = [0]       # nearest proper suffix node that ends a name (0 = none)
+        self._stale = False
+
+    def add(self, word):
+        node = 0
+        for ch in word:
+            child = self._next[node].get(ch)
+            if child is None:
+                child = len(self._next)
+                self._next.append({})
+                self._word.append(None)
+                self._next[node][ch] = child
+            node = child
+        self._word[node] = word
+        self._stale = True
+
+    def discard(self, word):
+        node = 0
+        for ch in word:
+            node = self._next[node].get(ch)
+            if node is None:
+                return
+        self._word[node] = None
+        self._stale = True
+
+    def _link(self):
+        size = len(self._next)
+        fail, out = [0] * size, [0] * size
+        queue = deque(self._next[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._next[node].items():
+                f = fail[node]
+                while f and ch not in self._next[f]:
+                    f = fail[f]
+                target = self._next[f].get(ch, 0) if node else 0
+                fail[child] = target if target != child else 0
+                out[child] = fail[child] if self._word[fail[child]] is not None else out[fail[child]]
+                queue.append(child)
+        self._fail, self._out, self._stale = fail, out, False
+
+    def finditer(self, text):
+        """(start, end, name) for every occurrence of every name in `text` (already lower-cased)."""
+        if self._stale:
+            self._link()
+        nxt, fail, out, words = self._next, self._fail, self._out, self._word
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in nxt[node]:
+                node = fail[node]
+            node = nxt[node].get(ch, 0)
+            hit = node if words[node] is not None else out[node]
+            while hit:
+                word = words[hit]
+                yield i - len(word) + 1, i + 1, word
+                hit = out[hit]
+
+
+class Matcher:
+    """The automaton plus which entities each name belongs to."""
+
+    def __init__(self):
+        self.automaton = Automaton()
+        self.entities = {}   # name -> {(entity_kind, entity_id)}
+        self.names = {}      # (entity_kind, entity_id) -> {name}
+
+    def replace(self, entity, names):
+        """Set the names of one entity; returns the names that were added."""
+        old = self.names.pop(entity, set())
+        for name in old - names:
+            owners = self.entities.get(name, set())
+            owners.discard(entity)
+            if not owners:
+                self.entities.pop(name, None)
+                self.automaton.discard(name)
+        for name in names - old:
+            if name not in self.entities:
+                self.automaton.add(name)
+            self.entities.setdefault(name, set()).add(entity)
+        if names:
+            self.names[entity] = names
+        return names - old
+
+    def scan(self, text):
+        """Counter of (entity_kind, entity_id) mentioned in `text`."""
+        lowered = (text or '').lower()
+        spans = sorted(
+            (start, -end, word) for start, end, word in self.automaton.finditer(lowered)
+            if (start == 0 or not _is_word(lowered[start - 1])) and (end == len(lowered) or not _is_word(lowered[end]))
+        )
+        counts, covered = Counter(), 0
+        for start, neg_end, word in spans:
+            if start < covered:
+                continue
+            for entity in self.entities.get(word, ()):
+                counts[entity] += 1
+            covered = -neg_end
+        return counts
+
+
+def names_of(entity_kind, obj):
+    """Lower-cased names an entity can be mentioned by; soft-deleted entities have none."""
+    if obj is None or getattr(obj, 'deleted_at', None):
+        return set()
+    _, fields = ENTITIES[entity_kind]
+    found = set()
+    for field in fields:
+        value = getattr(obj, field) or ''
+        parts = _ALIAS_SEPARATORS.split(value) if field == 'aliases' else [value]
+        for part in parts:
+            name = ' '.join(part.split()).lower()
+            if len(name) >= MIN_NAME_LENGTH:
+                found.add(name)
+    return found
+
+
+def build(get_model=apps.get_model):
+    matcher = Matcher()
+    for entity_kind, (label, fields) in ENTITIES.items():
+        model = get_model(label)
+        for obj in model._base_manager.only('id', *fields, *(['deleted_at'] if hasattr(model, 'deleted_at') else [])).iterator():
+            names = names_of(entity_kind, obj)
+            if names:
+                matcher.replace((entity_kind, obj.pk), names)
+    return matcher
+
+
+_state = {'matcher': None, 'version': None}
+_lock = threading.Lock()
+
+
+def matcher():
+    """This process's matcher, rebuilt when another process has changed names since it was built."""
+    version = cache.get(VERSION_KEY, 0)
+    with _lock:
+        if _state['matcher'] is None or _state['version'] != version:
+            _state['matcher'], _state['version'] = build(), version
+        return _state['matcher']
+
+
+def _bump(previous):
+    cache.add(VERSION_KEY, 0, None)
+    version = cache.incr(VERSION_KEY)
+    with _lock:
+        # Another process changed names in between: rebuild on next use instead of guessing
+        _state['version'] = version if version == previous + 1 else None
+
+
+def _texts(source_kind, ids):
+    label, fields = SOURCES[source_kind]
+    rows = apps.get_model(label)._base_manager.filter(pk__in=ids).values_list('pk', *fields)
+    return {row[0]: '\n'.join(value or '' for value in row[1:]) for row in rows}
+
+
+def index_sources(source_kind, ids, current_matcher=None):
+    """Rescan the given texts and write only the changed Mention rows; returns the number scanned."""
+    ids = list(set(ids))
+    if not ids:
+        return 0
+    current_matcher = current_matcher or matcher()
+    texts = _texts(source_kind, ids)
+    wanted = {}
+    for source_id, text in texts.items():
+        for (entity_kind, entity_id), count in current_matcher.scan(text).items():
+            wanted[(source_id, entity_kind, entity_id)] = count
+    with transaction.atomic():
+        stored = {
+            (source_id, entity_kind, entity_id): (pk, count)
+            for pk, source_id, entity_kind, entity_id, count in Mention.objects.filter(
+                source_kind=source_kind, source_id__in=ids
+            ).values_list('pk', 'source_id', 'entity_kind', 'entity_id', 'count')
+        }
+        stale = [pk for key, (pk, _) in stored.items() if key not in wanted]
+        if stale:
+            Mention.objects.filter(pk__in=stale).delete()
+        Mention.objects.bulk_create([
+            Mention(source_kind=source_kind, source_id=source_id, entity_kind=entity_kind, entity_id=entity_id, count=count)
+            for (source_id, entity_kind, entity_id), count in wanted.items() if (source_id, entity_kind, entity_id) not in stored
+        ], ignore_conflicts=True)
+        changed = [
+            Mention(pk=stored[key][0], count=count)
+            for key, count in wanted.items() if key in stored and stored[key][1] != count
+        ]
+        if changed:
+            Mention.objects.bulk_update(changed, ['count'])
+    return len(texts)
+
+
+def forget_source(source_kind, source_id):
+    return Mention.objects.filter(source_kind=source_kind, source_id=source_id).delete()[0]
+
+
+def entity_changed(entity_kind, entity_id):
+    """Patch the automaton after an entity's names changed and rescan the texts that are affected."""
+    label, _ = ENTITIES[entity_kind]
+    obj = apps.get_model(label)._base_manager.filter(pk=entity_id).first()
+    names = names_of(entity_kind, obj)
+    current = matcher()
+    with _lock:
+        previous = _state['version']
+        if current.names.get((entity_kind, entity_id), set()) == names:
+            return 0
+        added = current.replace((entity_kind, entity_id), names)
+    _bump(previous or 0)
+    affected = {}
+    for source_kind, source_id in Mention.objects.filter(entity_kind=entity_kind, entity_id=entity_id).values_list('source_kind', 'source_id'):
+        affected.setdefault(source_kind, set()).add(source_id)
+    if added:
+        for source_kind, (source_label, fields) in SOURCES.items():
+            query = Q()
+            for name in added:
+                for field in fields:
+                    query |= Q(**{f'{field}__icontains': name})
+            affected.setdefault(source_kind, set()).update(
+                apps.get_model(source_label)._base_manager.filter(query).values_list('pk', flat=True)
+            )
+    return sum(index_sources(source_kind, ids, current) for source_kind, ids in affected.items())
+
+
+def rebuild():
+    """Rebuild the automaton from scratch and rescan every source text; returns the number scanned."""
+    with _lock:
+        _state['matcher'], _state['version'] = build(), cache.get(VERSION_KEY, 0)
+    current = _state['matcher']
+    n = 0
+    for source_kind, (label, _) in SOURCES.items():
+        ids = list(apps.get_model(label)._base_manager.order_by('pk').values_list('pk', flat=True))
+        for i in range(0, len(ids), SCAN_CHUNK):
+            n += index_sources(source_kind, ids[i:i + SCAN_CHUNK], current)
+        Mention.objects.filter(source_kind=source_kind).exclude(source_id__in=ids).delete()
+    return n
+
+
+def backfill(get_model):
+    """Index every source text from scratch with the given model registry (used by a data migration)."""
+    mention_model = get_model('codex.Mention')
+    current = build(get_model)
+    mention_model.objects.all().delete()
+    for source_kind, (label, fields) in SOURCES.items():
+        rows = []
+        for row in get_model(label)._base_manager.values_list('pk', *fields).iterator(chunk_size=SCAN_CHUNK):
+            text = '\n'.join(value or '' for value in row[1:])
+            rows += [
+                mention_model(source_kind=source_kind, source_id=row[0], entity_kind=entity_kind, entity_id=entity_id, count=count)
+                for (entity_kind, entity_id), count in current.scan(text).items()
+            ]
+        mention_model.objects.bulk_create(rows, batch_size=1000)
+
+
+def _describe(source_kind, ids):
+    """{source id: display fields} for a page of mentioning texts."""
+    label, _ = SOURCES[source_kind]
+    qs = apps.get_model(label)._base_manager.filter(pk__in=ids)
+    if source_kind == Source.ECHO:
+        rows = qs.values('id', 'title', 'status', 'created_at')
+    elif source_kind == Source.SILO_COMMENT:
+        rows = qs.values('id', 'echo_id', 'message', 'created_at')
+    elif source_kind == Source.CODEX_ENTRY:
+        rows = qs.values('id', 'title', 'entry_type')
+    else:
+        rows = qs.values('id', 'operation_id', 'message', 'timestamp')
+    out = {}
+    for row in rows:
+        if 'message' in row:
+            row['message'] = row['message'][:200]
+        out[row['id']] = row
+    return out
+
+
+def mentioning(entity_kind, entity_id, source_kinds=None, limit=LIST_LIMIT):
+    """Latest texts mentioning an entity, grouped by source kind, with mention counts."""
+    out = {}
+    for source_kind in source_kinds or Source.values:
+        rows = list(
+            Mention.objects.filter(entity_kind=entity_kind, entity_id=entity_id, source_kind=source_kind)
+            .order_by('-source_id').values_list('source_id', 'count')[:limit]
+        )
+        described = _describe(source_kind, [source_id for source_id, _ in rows]) if rows else {}
+        out[source_kind] = [
+            {**described[source_id], 'mentions': count} for source_id, count in rows if source_id in described
+        ]
+    return out
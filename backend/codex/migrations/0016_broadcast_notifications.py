@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('codex', '0015_alter_notification_notif_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastCursor',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='broadcast_cursor', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_read_id', models.BigIntegerField(default=0)),
+                ('read_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BroadcastNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience', models.CharField(help_text='UserProfile role that receives this notification', max_length=20)),
+                ('notif_type', models.CharField(choices=[('SILO_REPORT', 'New Silo Report'), ('TASK_ASSIGNED', 'Task Assigned'), ('OPERATION_STATUS', 'Operation Status Changed'), ('MANTLE', "Protector's Mantle"), ('BULLETIN_ACK', 'Bulletin Acknowledged')], max_length=40)),
+                ('message', models.CharField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('metadata', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['audience', 'id'], name='codex_bcast_audience_idx')],
+            },
+        ),
+    ]
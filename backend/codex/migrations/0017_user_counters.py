@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('codex', '0016_broadcast_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_notifications', models.IntegerField(default=0)),
+                ('unacked_bulletins', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
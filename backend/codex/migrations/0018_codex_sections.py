@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def render_entries(apps, schema_editor):
+    from codex.documents import digest, render, table_of_contents
+    CodexEntry = apps.get_model('codex', 'CodexEntry')
+    CodexSection = apps.get_model('codex', 'CodexSection')
+    for entry in CodexEntry.objects.only('id', 'content').iterator():
+        sections = render(entry.content)
+        CodexEntry.objects.filter(pk=entry.pk).update(
+            content_html='\n'.join(s['html'] for s in sections),
+            toc=table_of_contents(sections),
+            rendered_hash=digest(entry.content),
+        )
+        CodexSection.objects.bulk_create([
+            CodexSection(entry_id=entry.pk, position=i, anchor=s['anchor'], title=s['title'][:255],
+                         level=s['level'], html=s['html'])
+            for i, s in enumerate(sections)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0017_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codexentry',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='codexentry',
+            name='rendered_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='codexentry',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.CreateModel(
+            name='CodexSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('anchor', models.SlugField(max_length=120)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('level', models.PositiveSmallIntegerField(default=0)),
+                ('html', models.TextField(blank=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='codex.codexentry')),
+            ],
+            options={
+                'ordering': ['entry', 'position'],
+                'unique_together': {('entry', 'anchor')},
+            },
+        ),
+        migrations.RunPython(render_entries, migrations.RunPython.noop),
+    ]
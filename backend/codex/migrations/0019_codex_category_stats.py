@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    CodexEntry = apps.get_model('codex', 'CodexEntry')
+    CodexEntry.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0018_codex_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codexentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='codexentry',
+            index=models.Index(fields=['entry_type', '-created_at'], name='codex_entry_type_recent_idx'),
+        ),
+    ]
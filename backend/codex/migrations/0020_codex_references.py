@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0019_codex_category_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodexReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_kind', models.CharField(choices=[('ENTRY', 'Codex Entry'), ('OPERATION', 'Operation'), ('FACTION', 'Faction')], max_length=12)),
+                ('target_id', models.IntegerField()),
+                ('via', models.CharField(choices=[('LINK', 'Link'), ('MENTION', 'Mention')], max_length=10)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='references', to='codex.codexentry')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_kind', 'target_id'], name='codex_ref_target_idx')],
+                'unique_together': {('source', 'target_kind', 'target_id', 'via')},
+            },
+        ),
+    ]
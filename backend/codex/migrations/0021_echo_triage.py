@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0020_codex_references'),
+        ('lineage', '0008_agent_order_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EchoEntity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=220)),
+                ('threat', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='echo',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='echoes_claimed', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='echo',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='echo',
+            name='priority',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='echo',
+            index=models.Index(fields=['status', '-priority'], name='codex_echo_triage_idx'),
+        ),
+        migrations.AddField(
+            model_name='echoentity',
+            name='echo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entities', to='codex.echo'),
+        ),
+        migrations.AddIndex(
+            model_name='echoentity',
+            index=models.Index(fields=['key', 'echo'], name='codex_echoentity_key_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='echoentity',
+            unique_together={('echo', 'key')},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0021_echo_triage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EchoFingerprint',
+            fields=[
+                ('echo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='codex.echo')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='echo',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='codex.echo'),
+        ),
+        migrations.AddField(
+            model_name='echo',
+            name='duplicate_similarity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='EchoBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('echo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='codex.echo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='codex_echobucket_probe_idx')],
+            },
+        ),
+    ]
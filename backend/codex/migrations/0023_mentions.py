@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0022_echo_dedup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_kind', models.CharField(choices=[('ECHO', 'Silo Report'), ('SILO_COMMENT', 'Silo Comment'), ('CODEX_ENTRY', 'Codex Entry'), ('OPERATION_LOG', 'Operation Log')], max_length=16)),
+                ('source_id', models.IntegerField()),
+                ('entity_kind', models.CharField(choices=[('PROFILE', 'Index Profile'), ('LINEAGE_AGENT', 'Lineage Agent'), ('SCALES_AGENT', 'Scales Agent'), ('FACTION', 'Faction')], max_length=16)),
+                ('entity_id', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity_kind', 'entity_id', 'source_kind', 'source_id'], name='codex_mention_entity_idx')],
+                'unique_together': {('source_kind', 'source_id', 'entity_kind', 'entity_id')},
+            },
+        ),
+    ]
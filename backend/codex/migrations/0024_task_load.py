@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_open_tasks(apps, schema_editor):
+    Task = apps.get_model('codex', 'Task')
+    UserCounter = apps.get_model('codex', 'UserCounter')
+    loads = (
+        Task.objects.filter(assigned_to__isnull=False, status__in=['OPEN', 'IN_PROGRESS'])
+        .values('assigned_to').annotate(n=Count('id')).values_list('assigned_to', 'n')
+    )
+    for user_id, n in loads:
+        UserCounter.objects.filter(user_id=user_id).update(open_tasks=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0023_mentions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounter',
+            name='open_tasks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='usercounter',
+            index=models.Index(fields=['open_tasks', 'user'], name='codex_counter_load_idx'),
+        ),
+        migrations.RunPython(count_open_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0024_task_load'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['related_app', 'related_id', 'status'], name='codex_task_related_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:12
+
+from django.db import migrations, models
+
+
+def seal_existing_secrets(apps, schema_editor):
+    from codex.vault import sealed_fields
+    VaultItem = apps.get_model('codex', 'VaultItem')
+    for item in VaultItem.objects.exclude(secret=''):
+        for field, value in sealed_fields(item.secret).items():
+            setattr(item, field, value)
+        item.save(update_fields=['secret_ciphertext', 'wrapped_key', 'key_id', 'has_secret'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0025_task_related_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vaultitem',
+            name='has_secret',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vaultitem',
+            name='key_id',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='vaultitem',
+            name='secret_ciphertext',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vaultitem',
+            name='wrapped_key',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(seal_existing_secrets, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='vaultitem',
+            name='secret',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0026_vault_envelope'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LookupKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PLATE', 'License Plate'), ('PLATE_FUZZY', 'License Plate (OCR-tolerant)'), ('VIN', 'VIN'), ('ADDRESS', 'Address Token')], max_length=12)),
+                ('key', models.CharField(max_length=64)),
+                ('source_kind', models.CharField(choices=[('VEHICLE', 'Vehicle'), ('PROPERTY', 'Property Dossier'), ('PROFILE', 'Index Profile'), ('SCALES_AGENT', 'Scales Agent')], max_length=16)),
+                ('source_id', models.IntegerField()),
+                ('field', models.CharField(max_length=32)),
+                ('value', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'key'], name='codex_lookup_key_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']), models.Index(fields=['source_kind', 'source_id'], name='codex_lookup_source_idx')],
+            },
+        ),
+    ]
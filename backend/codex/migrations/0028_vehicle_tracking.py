@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0027_lookup_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationPing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField()),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reported_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pings', to='codex.vehicle')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VehiclePosition',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='position', serialize=False, to='codex.vehicle')),
+                ('recorded_at', models.DateTimeField()),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ping', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='codex.locationping')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='locationping',
+            index=models.Index(fields=['vehicle', 'recorded_at', 'id'], name='codex_ping_track_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleposition',
+            index=models.Index(fields=['recorded_at'], name='codex_position_recent_idx'),
+        ),
+    ]
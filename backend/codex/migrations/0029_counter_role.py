@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0028_vehicle_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounter',
+            name='counted_role',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def index_existing(apps, schema_editor):
+    from codex import lookup
+    lookup.rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0029_counter_role'),
+        ('index', '0003_indexaffiliation_alter_indexprofile_affiliations'),
+        ('scales', '0010_history_capture_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def index_existing(apps, schema_editor):
+    from codex import mentions
+    mentions.backfill(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0030_backfill_lookup_keys'),
+        ('index', '0003_indexaffiliation_alter_indexprofile_affiliations'),
+        ('lineage', '0008_agent_order_index'),
+        ('loom', '0011_operation_filters'),
+        ('scales', '0010_history_capture_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing, migrations.RunPython.noop),
+    ]
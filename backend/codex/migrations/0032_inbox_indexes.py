@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0031_backfill_mentions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='broadcastnotification',
+            index=models.Index(fields=['audience', '-created_at', '-id'], name='codex_bcast_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='codex_notif_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def seed_positions(apps, schema_editor):
+    from codex import tracking
+    tracking.backfill(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0032_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def extract_existing(apps, schema_editor):
+    from codex import references
+    references.rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0033_backfill_vehicle_positions'),
+        ('loom', '0011_operation_filters'),
+        ('scales', '0010_history_capture_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(extract_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def score_existing(apps, schema_editor):
+    from codex import triage
+    triage.rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0034_backfill_codex_references'),
+        ('index', '0003_indexaffiliation_alter_indexprofile_affiliations'),
+        ('scales', '0010_history_capture_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(score_existing, migrations.RunPython.noop),
+    ]
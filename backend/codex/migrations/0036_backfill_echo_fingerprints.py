@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def fingerprint_existing(apps, schema_editor):
+    from codex import dedup
+    dedup.index_all(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0035_backfill_triage'),
+    ]
+
+    operations = [
+        migrations.RunPython(fingerprint_existing, migrations.RunPython.noop),
+    ]
@@ -9,13 +9,61 @@ class CodexEntry(models.Model):
     entry_type = models.CharField(max_length=50, default='Historical') # e.g., Historical, Philosophical
     image_urls = models.TextField(blank=True, help_text='Comma-separated image URLs for gallery')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Rendered on save by codex.documents
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    rendered_hash = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         verbose_name_plural = "Codex entries"
+        indexes = [
+            models.Index(fields=['entry_type', '-created_at'], name='codex_entry_type_recent_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+class CodexSection(models.Model):
+    """One rendered section of a Codex entry, fetched on its own by anchor."""
+    entry = models.ForeignKey(CodexEntry, on_delete=models.CASCADE, related_name='sections')
+    position = models.PositiveIntegerField()
+    anchor = models.SlugField(max_length=120)
+    title = models.CharField(max_length=255, blank=True)
+    level = models.PositiveSmallIntegerField(default=0)
+    html = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['entry', 'position']
+        unique_together = ('entry', 'anchor')
+
+    def __str__(self):
+        return f"{self.entry_id}#{self.anchor}"
+
+class CodexReference(models.Model):
+    """Edge from a Codex entry to an entry, operation or faction it links to or mentions."""
+    class Kind(models.TextChoices):
+        ENTRY = 'ENTRY', 'Codex Entry'
+        OPERATION = 'OPERATION', 'Operation'
+        FACTION = 'FACTION', 'Faction'
+    class Via(models.TextChoices):
+        LINK = 'LINK', 'Link'
+        MENTION = 'MENTION', 'Mention'
+
+    source = models.ForeignKey(CodexEntry, on_delete=models.CASCADE, related_name='references')
+    target_kind = models.CharField(max_length=12, choices=Kind.choices)
+    target_id = models.IntegerField()
+    via = models.CharField(max_length=10, choices=Via.choices)
+
+    class Meta:
+        unique_together = ('source', 'target_kind', 'target_id', 'via')
+        indexes = [
+            models.Index(fields=['target_kind', 'target_id'], name='codex_ref_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_id} → {self.target_kind}:{self.target_id} ({self.via})"
+
 class Echo(models.Model):
     class Target(models.TextChoices):
         LINEAGE = 'LINEAGE', 'Lineage'
@@ -44,25 +92,76 @@ class Echo(models.Model):
     decided_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='echoes_decided')
     created_at = models.DateTimeField(auto_now_add=True)
     decided_at = models.DateTimeField(null=True, blank=True)
+    # Triage ordering key and reviewer lease, maintained by codex.triage
+    priority = models.FloatField(default=0)
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='echoes_claimed')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Near-duplicate cluster (the cluster's first report) detected by codex.dedup
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
+    duplicate_similarity = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority'], name='codex_echo_triage_idx'),
+        ]
 
     def __str__(self):
         return f"Echo: {self.title} ({self.status})"
 
+class EchoFingerprint(models.Model):
+    """MinHash signature of an echo's title and content (uint32 values)."""
+    echo = models.OneToOneField(Echo, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+
+class EchoBucket(models.Model):
+    """One LSH band bucket of an echo's signature; echoes sharing a bucket are duplicate candidates."""
+    echo = models.ForeignKey(Echo, on_delete=models.CASCADE, related_name='buckets')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='codex_echobucket_probe_idx'),
+        ]
+
+class EchoEntity(models.Model):
+    """An entity named by an echo (`faction:<id>`, `agent:<id>`, `profile:<id>` or `name:<text>`)."""
+    echo = models.ForeignKey(Echo, on_delete=models.CASCADE, related_name='entities')
+    key = models.CharField(max_length=220)
+    threat = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('echo', 'key')
+        indexes = [
+            models.Index(fields=['key', 'echo'], name='codex_echoentity_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.echo_id} → {self.key}"
+
 class Task(models.Model):
     class Status(models.TextChoices):
         OPEN = 'OPEN', 'Open'
         IN_PROGRESS = 'IN_PROGRESS', 'In Progress'
         SUCCESS = 'SUCCESS', 'Success'
         FAILURE = 'FAILURE', 'Failure'
+    # Statuses that count towards the assignee's load
+    OPEN_STATUSES = (Status.OPEN, Status.IN_PROGRESS)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=12, choices=Status.choices, default=Status.OPEN)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tasks_created')
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tasks_assigned')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Generic link to the record the task is about, e.g. ('index', <IndexProfile id>)
     related_app = models.CharField(max_length=20, blank=True)
     related_id = models.IntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['related_app', 'related_id', 'status'], name='codex_task_related_idx'),
+        ]
+
     def __str__(self):
         return f"Task: {self.title} [{self.status}]"
 
@@ -75,6 +174,34 @@ class SiloComment(models.Model):
     class Meta:
         ordering = ['created_at']
 
+class Mention(models.Model):
+    """A person or faction named (by name or alias) in a piece of free text."""
+    class Source(models.TextChoices):
+        ECHO = 'ECHO', 'Silo Report'
+        SILO_COMMENT = 'SILO_COMMENT', 'Silo Comment'
+        CODEX_ENTRY = 'CODEX_ENTRY', 'Codex Entry'
+        OPERATION_LOG = 'OPERATION_LOG', 'Operation Log'
+    class Entity(models.TextChoices):
+        PROFILE = 'PROFILE', 'Index Profile'
+        LINEAGE_AGENT = 'LINEAGE_AGENT', 'Lineage Agent'
+        SCALES_AGENT = 'SCALES_AGENT', 'Scales Agent'
+        FACTION = 'FACTION', 'Faction'
+
+    source_kind = models.CharField(max_length=16, choices=Source.choices)
+    source_id = models.IntegerField()
+    entity_kind = models.CharField(max_length=16, choices=Entity.choices)
+    entity_id = models.IntegerField()
+    count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = ('source_kind', 'source_id', 'entity_kind', 'entity_id')
+        indexes = [
+            models.Index(fields=['entity_kind', 'entity_id', 'source_kind', 'source_id'], name='codex_mention_entity_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_kind}:{self.source_id} → {self.entity_kind}:{self.entity_id}"
+
 class VaultItem(models.Model):
     class ItemType(models.TextChoices):
         SHELL_CORP = 'SHELL_CORP', 'Shell Corporation'
@@ -86,10 +213,17 @@ class VaultItem(models.Model):
     name = models.CharField(max_length=255)
     identifier = models.CharField(max_length=255, blank=True)
     notes = models.TextField(blank=True)
-    secret = models.TextField(blank=True, help_text='Encrypted or protected secret payload')
+    # Envelope-encrypted secret (see codex.vault); decrypted only on an explicit reveal
+    has_secret = models.BooleanField(default=False, editable=False)
+    secret_ciphertext = models.BinaryField(null=True, blank=True, editable=False)
+    wrapped_key = models.BinaryField(null=True, blank=True, editable=False)
+    key_id = models.CharField(max_length=16, blank=True, editable=False)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Sealed columns skipped by lists and detail views
+    SEALED_FIELDS = ('secret_ciphertext', 'wrapped_key')
+
     def __str__(self):
         return f"{self.get_item_type_display()}: {self.name}"
 
@@ -128,6 +262,74 @@ class Vehicle(models.Model):
     def __str__(self):
         return f"Vehicle: {self.make} {self.model} ({self.license_plate_clean or 'N/A'})"
 
+class LocationPing(models.Model):
+    """One reported position of a vehicle; append-only movement history (see codex.tracking)."""
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='pings')
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Track playback: one vehicle's pings in a time range, keyset-paginated on (recorded_at, id)
+            models.Index(fields=['vehicle', 'recorded_at', 'id'], name='codex_ping_track_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ping {self.vehicle_id} @ {self.recorded_at:%Y-%m-%d %H:%M:%S}"
+
+class VehiclePosition(models.Model):
+    """The newest ping of each vehicle, kept current on ingest so fleet overviews never scan history."""
+    vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='position')
+    ping = models.ForeignKey(LocationPing, on_delete=models.SET_NULL, null=True, related_name='+')
+    recorded_at = models.DateTimeField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recorded_at'], name='codex_position_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Position {self.vehicle_id} @ {self.recorded_at:%Y-%m-%d %H:%M:%S}"
+
+class LookupKey(models.Model):
+    """A normalized plate, VIN or address token of a vehicle, property, profile or Scales agent (see codex.lookup)."""
+    class Kind(models.TextChoices):
+        PLATE = 'PLATE', 'License Plate'
+        PLATE_FUZZY = 'PLATE_FUZZY', 'License Plate (OCR-tolerant)'
+        VIN = 'VIN', 'VIN'
+        ADDRESS = 'ADDRESS', 'Address Token'
+    class Source(models.TextChoices):
+        VEHICLE = 'VEHICLE', 'Vehicle'
+        PROPERTY = 'PROPERTY', 'Property Dossier'
+        PROFILE = 'PROFILE', 'Index Profile'
+        SCALES_AGENT = 'SCALES_AGENT', 'Scales Agent'
+
+    kind = models.CharField(max_length=12, choices=Kind.choices)
+    key = models.CharField(max_length=64)
+    source_kind = models.CharField(max_length=16, choices=Source.choices)
+    source_id = models.IntegerField()
+    field = models.CharField(max_length=32)
+    # The full normalized plate/VIN the key was derived from (the token itself for addresses)
+    value = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            # Pattern ops so VIN prefix (LIKE 'ABC%') probes use the index on PostgreSQL too
+            models.Index(fields=['kind', 'key'], name='codex_lookup_key_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+            models.Index(fields=['source_kind', 'source_id'], name='codex_lookup_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} → {self.source_kind}:{self.source_id}"
+
 # --- Codex Category Configuration ---
 class CodexCategoryConfig(models.Model):
     """Optional per-category widget configuration (cover image, description)."""
@@ -153,9 +355,40 @@ class Bulletin(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='bulletins_posted')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Roles that see every bulletin regardless of audience
+    ALWAYS_VISIBLE_ROLES = ('PROTECTOR', 'HQ')
+    # Profile roles addressed by each targeted audience (OVERLOOKER is the legacy name for OBSERVER)
+    AUDIENCE_ROLES = {
+        'HEIR': ('HEIR',),
+        'OVERLOOKER': ('OBSERVER', 'OVERLOOKER'),
+    }
+
     def __str__(self):
         return f"Bulletin: {self.title} → {self.audience}"
 
+    @classmethod
+    def audiences_for_role(cls, role):
+        """Audience values visible to `role`, or None when the role sees every bulletin."""
+        if role in cls.ALWAYS_VISIBLE_ROLES:
+            return None
+        audiences = [cls.Audience.ALL]
+        for audience, roles in cls.AUDIENCE_ROLES.items():
+            if role in roles:
+                audiences.append(audience)
+        return audiences
+
+    @classmethod
+    def visible_to_role(cls, role, qs=None):
+        qs = cls.objects.all() if qs is None else qs
+        audiences = cls.audiences_for_role(role)
+        return qs if audiences is None else qs.filter(audience__in=audiences)
+
+    def recipient_roles(self):
+        """Profile roles that receive this bulletin, or None for everyone."""
+        if self.audience == self.Audience.ALL:
+            return None
+        return list(self.AUDIENCE_ROLES.get(self.audience, ())) + list(self.ALWAYS_VISIBLE_ROLES)
+
 class BulletinAck(models.Model):
     bulletin = models.ForeignKey(Bulletin, on_delete=models.CASCADE, related_name='acks')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bulletin_acks')
@@ -180,6 +413,68 @@ class Notification(models.Model):
     read_at = models.DateTimeField(null=True, blank=True)
     metadata = models.JSONField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='codex_notif_inbox_idx'),
+        ]
+
     @property
     def is_read(self):
         return self.read_at is not None
+
+
+class BroadcastNotification(models.Model):
+    """A notification addressed to every user of a role, stored once and fanned out on read."""
+    audience = models.CharField(max_length=20, help_text='UserProfile role that receives this notification')
+    notif_type = models.CharField(max_length=40, choices=Notification.Type.choices)
+    message = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+    metadata = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['audience', 'id'], name='codex_bcast_audience_idx'),
+            models.Index(fields=['audience', '-created_at', '-id'], name='codex_bcast_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"Broadcast → {self.audience}: {self.message}"
+
+
+class BroadcastCursor(models.Model):
+    """Per-user read state over broadcasts.
+
+    Every visible broadcast with id <= last_read_id is read; `read_ids` holds the
+    sparse set of broadcasts above the cursor that were read out of order, capped
+    at notifications.MAX_READ_IDS.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='broadcast_cursor')
+    last_read_id = models.BigIntegerField(default=0)
+    read_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"BroadcastCursor({self.user_id} @ {self.last_read_id})"
+
+
+class UserCounter(models.Model):
+    """Denormalized per-user badge counts, updated in the same transaction as the rows they count.
+
+    `reconcile_counters` recomputes them from source tables to correct any drift.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    unread_notifications = models.IntegerField(default=0)
+    unacked_bulletins = models.IntegerField(default=0)
+    # Effective role (mantle included) unacked_bulletins was counted for; a mismatch on read triggers a recount
+    counted_role = models.CharField(max_length=20, blank=True)
+    # Tasks assigned to the user that are OPEN or IN_PROGRESS; drives least-loaded role assignment
+    open_tasks = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['open_tasks', 'user'], name='codex_counter_load_idx'),
+        ]
+
+    def __str__(self):
+        return f"UserCounter({self.user_id}: {self.unread_notifications} unread, {self.unacked_bulletins} unacked, {self.open_tasks} open tasks)"
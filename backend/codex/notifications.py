@@ -0,0 +1,189 @@
+"""Inbox helpers: personal Notification rows merged with role broadcasts at read time."""
+from django.db import transaction
+from django.db.models import Q
+
+from api.realtime import publish, role_channel
+from . import counters
+from .models import Notification, BroadcastNotification, BroadcastCursor
+
+BROADCAST_PREFIX = 'b-'
+# Out-of-order reads kept above the cursor; past this, older unread broadcasts count as read
+MAX_READ_IDS = 100
+INBOX_LIMIT = 50
+INBOX_MAX_LIMIT = 200
+# Tie-break between sources sharing a created_at: personal rows sort above broadcasts
+_PERSONAL, _BROADCAST = 1, 0
+
+
+def notify(user, notif_type, message, metadata=None):
+    """Create a personal notification and bump the recipient's unread counter atomically."""
+    with transaction.atomic():
+        notification = Notification.objects.create(user=user, notif_type=notif_type, message=message, metadata=metadata)
+        counters.adjust([user.pk], 'unread_notifications', 1)
+    return notification
+
+
+def broadcast(roles, notif_type, message, metadata=None):
+    """Notify every user holding one of `roles` with one row per role, not per user."""
+    with transaction.atomic():
+        rows = BroadcastNotification.objects.bulk_create([
+            BroadcastNotification(audience=role, notif_type=notif_type, message=message, metadata=metadata)
+            for role in roles
+        ])
+        for row in rows:
+            counters.adjust_where('unread_notifications', 1, profile__role=row.audience, date_joined__lte=row.created_at)
+    for row in rows:
+        publish(role_channel(row.audience), 'notification', {
+            'id': f"{BROADCAST_PREFIX}{row.id}",
+            'notif_type': row.notif_type,
+            'message': row.message,
+            'metadata': row.metadata,
+        })
+    return rows
+
+
+def _base_role(user):
+    return getattr(getattr(user, 'profile', None), 'role', None)
+
+
+def visible_broadcasts(user):
+    """Broadcasts addressed to the user's base role, issued since the user joined."""
+    role = _base_role(user)
+    if not role:
+        return BroadcastNotification.objects.none()
+    return BroadcastNotification.objects.filter(audience=role, created_at__gte=user.date_joined)
+
+
+def get_cursor(user):
+    cursor, _ = BroadcastCursor.objects.get_or_create(user=user)
+    return cursor
+
+
+def unread_broadcasts(user, cursor=None):
+    cursor = cursor or get_cursor(user)
+    qs = visible_broadcasts(user).filter(id__gt=cursor.last_read_id)
+    if cursor.read_ids:
+        qs = qs.exclude(id__in=cursor.read_ids)
+    return qs
+
+
+def parse_item_id(raw):
+    """(source rank, id) of an inbox item id as rendered: '12' or 'b-12'. ValueError when malformed."""
+    raw = str(raw)
+    if raw.startswith(BROADCAST_PREFIX):
+        return _BROADCAST, int(raw[len(BROADCAST_PREFIX):])
+    return _PERSONAL, int(raw)
+
+
+def _older(qs, rank, before):
+    """Rows of one source that sort after the (created_at, source rank, id) keyset `before`."""
+    if before is None:
+        return qs
+    at, before_rank, before_id = before
+    q = Q(created_at__lt=at)
+    if rank < before_rank:
+        q |= Q(created_at=at)
+    elif rank == before_rank:
+        q |= Q(created_at=at, id__lt=before_id)
+    return qs.filter(q)
+
+
+def inbox(user, unread_only=False, before=None, limit=INBOX_LIMIT):
+    """One page of personal notifications and broadcasts, newest first.
+
+    Each source contributes at most `limit + 1` rows read through its
+    (owner, created_at, id) index, and the two are merged here. `before` is the
+    (created_at, source rank, id) of the last item already seen. Returns
+    (items, next cursor or None, the user's BroadcastCursor).
+    """
+    cursor = get_cursor(user)
+    personal = Notification.objects.filter(user=user)
+    if unread_only:
+        personal = personal.filter(read_at__isnull=True)
+    broadcasts = unread_broadcasts(user, cursor) if unread_only else visible_broadcasts(user)
+    order = ('-created_at', '-id')
+    items = [(n, _PERSONAL) for n in _older(personal, _PERSONAL, before).order_by(*order)[:limit + 1]]
+    items += [(b, _BROADCAST) for b in _older(broadcasts, _BROADCAST, before).order_by(*order)[:limit + 1]]
+    items.sort(key=lambda item: (item[0].created_at, item[1], item[0].id), reverse=True)
+    page = items[:limit]
+    next_cursor = None
+    if len(items) > limit:
+        last, rank = page[-1]
+        next_cursor = {
+            'before': last.created_at,
+            'before_id': f"{BROADCAST_PREFIX}{last.id}" if rank == _BROADCAST else str(last.id),
+        }
+    return [n for n, _ in page], next_cursor, cursor
+
+
+def is_broadcast_read(cursor, broadcast_id):
+    return broadcast_id <= cursor.last_read_id or broadcast_id in cursor.read_ids
+
+
+def split_ids(ids):
+    """Separate personal notification ids from 'b-<id>' broadcast ids."""
+    personal, broadcasts = [], []
+    for raw in ids:
+        if isinstance(raw, str) and raw.startswith(BROADCAST_PREFIX):
+            try:
+                broadcasts.append(int(raw[len(BROADCAST_PREFIX):]))
+            except ValueError:
+                continue
+        else:
+            try:
+                personal.append(int(raw))
+            except (TypeError, ValueError):
+                continue
+    return personal, broadcasts
+
+
+def mark_broadcasts_read(user, broadcast_ids):
+    """Record broadcasts as read and advance the cursor over any contiguous read run.
+
+    At most MAX_READ_IDS out-of-order reads are kept; beyond that the cursor
+    moves up to the oldest one kept and skipped unread broadcasts count as read.
+    """
+    if not broadcast_ids:
+        return
+    with transaction.atomic():
+        get_cursor(user)
+        cursor = BroadcastCursor.objects.select_for_update().get(user=user)
+        visible = set(visible_broadcasts(user).filter(id__in=broadcast_ids).values_list('id', flat=True))
+        newly_read = {i for i in visible if not is_broadcast_read(cursor, i)}
+        if not newly_read:
+            return
+        pending = {i for i in cursor.read_ids if i > cursor.last_read_id} | newly_read
+        # Walk visible broadcasts above the cursor; stop at the first one still unread
+        last = cursor.last_read_id
+        span = visible_broadcasts(user).filter(id__gt=last, id__lte=max(pending)).order_by('id').values_list('id', flat=True)
+        for bid in span:
+            if bid not in pending:
+                break
+            last = bid
+        read_ids = sorted(i for i in pending if i > last)
+        skipped = 0
+        if len(read_ids) > MAX_READ_IDS:
+            floor = read_ids[-MAX_READ_IDS - 1]
+            skipped = (
+                visible_broadcasts(user).filter(id__gt=last, id__lte=floor)
+                .exclude(id__in=[i for i in read_ids if i <= floor]).count()
+            )
+            last, read_ids = floor, read_ids[-MAX_READ_IDS:]
+        counters.adjust([user.pk], 'unread_notifications', -(len(newly_read) + skipped))
+        cursor.last_read_id = last
+        cursor.read_ids = read_ids
+        cursor.save(update_fields=['last_read_id', 'read_ids', 'updated_at'])
+
+
+def mark_read(user, notification_ids):
+    """Mark personal notifications read and decrement the unread counter by the rows changed."""
+    if not notification_ids:
+        return
+    from django.utils import timezone
+    with transaction.atomic():
+        changed = Notification.objects.filter(user=user, id__in=notification_ids, read_at__isnull=True).update(read_at=timezone.now())
+        counters.adjust([user.pk], 'unread_notifications', -changed)
+
+
+def unread_count(user):
+    return counters.get_counter(user).unread_notifications
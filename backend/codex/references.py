@@ -0,0 +1,229 @@
+"""Cross-references between Codex entries, operations and factions.
+
+When an entry is saved its content is scanned for
+  - links to other entries (`/codex/<id>`, `/codex/entries/<id>`) and `[[Name]]`
+    wiki links to an entry title, operation codename or faction name (LINK), and
+  - plain mentions of any of those names (MENTION),
+and the resulting edges are diffed against the stored ones, so only changed rows
+are written. Renaming (or deleting) an entry, operation or faction re-extracts
+just the entries that referenced the old name or contain the new one.
+
+Backlinks are one indexed lookup on (target_kind, target_id); "related entries"
+ranks entries by direct links plus targets they share with the entry.
+"""
+import re
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+
+from .models import CodexEntry, CodexReference
+
+Kind = CodexReference.Kind
+Via = CodexReference.Via
+MIN_NAME_LENGTH = 3
+DIRECT_WEIGHT = 3
+RELATED_LIMIT = 10
+_GROUPS = {Kind.ENTRY: 'entries', Kind.OPERATION: 'operations', Kind.FACTION: 'factions'}
+
+_ENTRY_URL = re.compile(r'\]\(\s*(?:https?://[^/\s)]+)?/codex/(?:entries/)?(\d+)/?[^)\s]*\)')
+_WIKI_LINK = re.compile(r'\[\[([^\[\]|]+)(?:\|[^\[\]]*)?\]\]')
+
+
+class Vocabulary:
+    """Names that count as references, compiled into one case-insensitive pattern."""
+
+    def __init__(self, names):
+        self.targets = {}
+        for kind, target_id, name in names:
+            name = (name or '').strip()
+            if len(name) >= MIN_NAME_LENGTH:
+                self.targets.setdefault(name.lower(), set()).add((kind, target_id))
+        # Longest names first so "Operation Black Tide" wins over "Black Tide"
+        alternatives = sorted(self.targets, key=len, reverse=True)
+        self.pattern = re.compile(
+            r'(?<!\w)(' + '|'.join(re.escape(n) for n in alternatives) + r')(?!\w)', re.IGNORECASE
+        ) if alternatives else None
+
+    @classmethod
+    def load(cls, get_model=apps.get_model):
+        names = [(Kind.ENTRY, pk, title) for pk, title in get_model('codex.CodexEntry').objects.values_list('pk', 'title')]
+        names += [(Kind.OPERATION, pk, codename) for pk, codename in get_model('loom.Operation').objects.values_list('pk', 'codename')]
+        names += [(Kind.FACTION, pk, name) for pk, name in get_model('scales.Faction').objects.values_list('pk', 'name')]
+        return cls(names)
+
+    def lookup(self, name):
+        return self.targets.get(name.strip().lower(), set())
+
+    def mentions(self, text):
+        found = set()
+        if self.pattern is not None:
+            for match in self.pattern.finditer(text):
+                found |= self.lookup(match.group(1))
+        return found
+
+
+def extract(entry, vocabulary, entry_model=CodexEntry):
+    """Edges {(target_kind, target_id, via)} found in `entry`'s content, self-references excluded."""
+    content = entry.content or ''
+    edges = set()
+    linked_ids = {int(pk) for pk in _ENTRY_URL.findall(content)}
+    if linked_ids:
+        for pk in entry_model.objects.filter(pk__in=linked_ids).values_list('pk', flat=True):
+            edges.add((Kind.ENTRY, pk, Via.LINK))
+    for name in _WIKI_LINK.findall(content):
+        edges |= {(kind, pk, Via.LINK) for kind, pk in vocabulary.lookup(name)}
+    # Text inside wiki links is not counted again as a plain mention
+    text = _WIKI_LINK.sub(' ', content)
+    edges |= {(kind, pk, Via.MENTION) for kind, pk in vocabulary.mentions(text)}
+    return {edge for edge in edges if edge[:2] != (Kind.ENTRY, entry.pk)}
+
+
+def sync_entry(entry, vocabulary=None):
+    """Re-extract one entry's references and write only the difference; returns (added, removed)."""
+    vocabulary = vocabulary or Vocabulary.load()
+    wanted = extract(entry, vocabulary)
+    with transaction.atomic():
+        current = {
+            (kind, target_id, via): pk
+            for pk, kind, target_id, via in CodexReference.objects.filter(source_id=entry.pk)
+            .values_list('pk', 'target_kind', 'target_id', 'via')
+        }
+        stale = [pk for edge, pk in current.items() if edge not in wanted]
+        if stale:
+            CodexReference.objects.filter(pk__in=stale).delete()
+        CodexReference.objects.bulk_create([
+            CodexReference(source_id=entry.pk, target_kind=kind, target_id=target_id, via=via)
+            for kind, target_id, via in wanted - set(current)
+        ], ignore_conflicts=True)
+    return len(wanted) - (len(current) - len(stale)), len(stale)
+
+
+def resync_name(kind, target_id, names):
+    """Re-extract entries affected by a name change of one target.
+
+    Those are the entries that currently reference the target, plus entries
+    whose content contains any of `names` (the old and the new name).
+    """
+    affected = set(
+        CodexReference.objects.filter(target_kind=kind, target_id=target_id).values_list('source_id', flat=True)
+    )
+    name_q = Q()
+    for name in names:
+        if name and len(name.strip()) >= MIN_NAME_LENGTH:
+            name_q |= Q(content__icontains=name.strip())
+    if name_q:
+        affected |= set(CodexEntry.objects.filter(name_q).values_list('pk', flat=True))
+    if not affected:
+        return 0
+    vocabulary = Vocabulary.load()
+    for entry in CodexEntry.objects.filter(pk__in=affected).only('id', 'content'):
+        sync_entry(entry, vocabulary)
+    return len(affected)
+
+
+def forget_target(kind, target_id):
+    """Drop every edge pointing at a deleted target."""
+    return CodexReference.objects.filter(target_kind=kind, target_id=target_id).delete()[0]
+
+
+def rebuild(get_model=apps.get_model):
+    """Re-extract every entry from scratch; returns the number of entries processed.
+
+    `get_model` lets a data migration run this against its historical models.
+    """
+    entry_model, reference_model = get_model('codex.CodexEntry'), get_model('codex.CodexReference')
+    vocabulary = Vocabulary.load(get_model)
+    rows, n = [], 0
+    for entry in entry_model.objects.only('id', 'content').iterator():
+        rows += [
+            reference_model(source_id=entry.pk, target_kind=kind, target_id=target_id, via=via)
+            for kind, target_id, via in extract(entry, vocabulary, entry_model)
+        ]
+        n += 1
+    with transaction.atomic():
+        reference_model.objects.all().delete()
+        reference_model.objects.bulk_create(rows, batch_size=1000)
+    return n
+
+
+def _labels(kind, ids):
+    if not ids:
+        return {}
+    if kind == Kind.ENTRY:
+        return dict(CodexEntry.objects.filter(pk__in=ids).values_list('pk', 'title'))
+    if kind == Kind.OPERATION:
+        from loom.models import Operation
+        return dict(Operation.objects.filter(pk__in=ids).values_list('pk', 'codename'))
+    from scales.models import Faction
+    return dict(Faction.objects.filter(pk__in=ids).values_list('pk', 'name'))
+
+
+def _merge(rows, key):
+    """Collapse LINK/MENTION rows of the same node into one item listing both."""
+    merged = {}
+    for row in rows:
+        item = merged.setdefault(row[key], set())
+        item.add(row['via'])
+    return merged
+
+
+def outgoing(entry_id):
+    """What this entry references, grouped by target kind."""
+    rows = CodexReference.objects.filter(source_id=entry_id).values('target_kind', 'target_id', 'via')
+    by_kind = {kind: [] for kind in Kind.values}
+    for row in rows:
+        by_kind[row['target_kind']].append(row)
+    out = {}
+    for kind, kind_rows in by_kind.items():
+        merged = _merge(kind_rows, 'target_id')
+        labels = _labels(kind, list(merged))
+        out[_GROUPS[kind]] = [
+            {'id': pk, 'label': labels[pk], 'via': sorted(via)}
+            for pk, via in sorted(merged.items(), key=lambda item: labels.get(item[0], '').lower())
+            if pk in labels
+        ]
+    return out
+
+
+def backlinks(kind, target_id):
+    """Entries that reference the given target."""
+    rows = CodexReference.objects.filter(target_kind=kind, target_id=target_id).values('source_id', 'via')
+    merged = _merge(rows, 'source_id')
+    entries = CodexEntry.objects.filter(pk__in=list(merged)).values('id', 'title', 'entry_type', 'summary')
+    return sorted(
+        ({**entry, 'via': sorted(merged[entry['id']])} for entry in entries),
+        key=lambda e: e['title'].lower(),
+    )
+
+
+def related(entry_id, limit=RELATED_LIMIT):
+    """Entries linked with this one in either direction or sharing targets with it, best first."""
+    targets = {}
+    neighbours = set()
+    for kind, target_id in CodexReference.objects.filter(source_id=entry_id).values_list('target_kind', 'target_id'):
+        targets.setdefault(kind, set()).add(target_id)
+        if kind == Kind.ENTRY:
+            neighbours.add(target_id)
+    neighbours |= set(
+        CodexReference.objects.filter(target_kind=Kind.ENTRY, target_id=entry_id).values_list('source_id', flat=True)
+    )
+    shared_q = Q()
+    for kind, ids in targets.items():
+        shared_q |= Q(target_kind=kind, target_id__in=ids)
+    shared = {}
+    if shared_q:
+        pairs = set(
+            CodexReference.objects.filter(shared_q).exclude(source_id=entry_id)
+            .values_list('source_id', 'target_kind', 'target_id')
+        )
+        for source_id, _, _ in pairs:
+            shared[source_id] = shared.get(source_id, 0) + 1
+    scores = {pk: shared.get(pk, 0) + (DIRECT_WEIGHT if pk in neighbours else 0) for pk in set(shared) | neighbours}
+    scores.pop(entry_id, None)
+    best = sorted(scores, key=lambda pk: (-scores[pk], pk))[:limit]
+    entries = {e['id']: e for e in CodexEntry.objects.filter(pk__in=best).values('id', 'title', 'entry_type', 'summary')}
+    return [
+        {**entries[pk], 'score': scores[pk], 'linked': pk in neighbours, 'shared_references': shared.get(pk, 0)}
+        for pk in best if pk in entries
+    ]
@@ -1,19 +1,29 @@
 from rest_framework import serializers
-from .models import CodexEntry, Echo, Task, SiloComment, VaultItem, PropertyDossier, Vehicle, Bulletin, BulletinAck, Notification
+from .notifications import is_broadcast_read
+from . import vault
+from .models import CodexEntry, Echo, Task, SiloComment, VaultItem, PropertyDossier, Vehicle, LocationPing, Bulletin, BulletinAck, Notification, BroadcastNotification
 
 class CodexEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = CodexEntry
-        fields = ['id', 'title', 'summary', 'content', 'entry_type', 'image_urls', 'created_at']
+        fields = ['id', 'title', 'summary', 'content', 'content_html', 'toc', 'entry_type', 'image_urls', 'created_at']
+        read_only_fields = ['content_html', 'toc', 'created_at']
+
+class CodexEntryListSerializer(serializers.ModelSerializer):
+    """List representation: the table of contents instead of the document body."""
+    class Meta:
+        model = CodexEntry
+        fields = ['id', 'title', 'summary', 'toc', 'entry_type', 'image_urls', 'created_at']
 
 class EchoSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     decided_by_username = serializers.CharField(source='decided_by.username', read_only=True)
+    claimed_by_username = serializers.CharField(source='claimed_by.username', read_only=True)
     assigned = serializers.SerializerMethodField()
     class Meta:
         model = Echo
-        fields = ['id', 'title', 'content', 'suggested_target', 'confidence', 'involved_entities', 'evidence_urls', 'status', 'created_by', 'created_by_username', 'decided_by', 'decided_by_username', 'created_at', 'decided_at', 'assigned']
-        read_only_fields = ['status', 'created_by', 'created_by_username', 'decided_by', 'decided_by_username', 'created_at', 'decided_at']
+        fields = ['id', 'title', 'content', 'suggested_target', 'confidence', 'involved_entities', 'evidence_urls', 'status', 'created_by', 'created_by_username', 'decided_by', 'decided_by_username', 'created_at', 'decided_at', 'assigned', 'priority', 'claimed_by', 'claimed_by_username', 'lease_expires_at', 'duplicate_of', 'duplicate_similarity']
+        read_only_fields = ['status', 'created_by', 'created_by_username', 'decided_by', 'decided_by_username', 'created_at', 'decided_at', 'priority', 'claimed_by', 'claimed_by_username', 'lease_expires_at', 'duplicate_of', 'duplicate_similarity']
     def get_assigned(self, obj):
         return [{'id': a.id, 'alias': a.alias} for a in obj.assigned_agents.all()]
 
@@ -34,10 +44,23 @@ class SiloCommentSerializer(serializers.ModelSerializer):
 
 class VaultItemSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    # Write-only: stored sealed and returned only by the reveal endpoint
+    secret = serializers.CharField(write_only=True, required=False, allow_blank=True)
     class Meta:
         model = VaultItem
-        fields = ['id', 'item_type', 'name', 'identifier', 'notes', 'secret', 'created_by', 'created_by_username', 'created_at']
-        read_only_fields = ['created_by', 'created_by_username', 'created_at']
+        fields = ['id', 'item_type', 'name', 'identifier', 'notes', 'secret', 'has_secret', 'created_by', 'created_by_username', 'created_at']
+        read_only_fields = ['has_secret', 'created_by', 'created_by_username', 'created_at']
+
+    def _seal(self, validated_data):
+        if 'secret' in validated_data:
+            validated_data.update(vault.sealed_fields(validated_data.pop('secret')))
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._seal(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self._seal(validated_data))
 
 class PropertyDossierSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
@@ -55,18 +78,45 @@ class VehicleSerializer(serializers.ModelSerializer):
         fields = ['id', 'make', 'model', 'year', 'vin', 'license_plate_clean', 'license_plate_cloned', 'modifications', 'last_known_location', 'picture_urls', 'assigned_agent', 'assigned_agent_alias', 'created_by', 'created_by_username', 'created_at']
         read_only_fields = ['created_by', 'created_by_username', 'created_at', 'assigned_agent_alias']
 
+class LocationPingSerializer(serializers.ModelSerializer):
+    # Plain id: ingest checks every vehicle of a batch in one query instead of one per ping
+    vehicle = serializers.IntegerField(source='vehicle_id')
+    recorded_at = serializers.DateTimeField(required=False)
+    latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180, max_value=180)
+
+    class Meta:
+        model = LocationPing
+        fields = ['id', 'vehicle', 'recorded_at', 'latitude', 'longitude', 'location', 'reported_by', 'created_at']
+        read_only_fields = ['reported_by', 'created_at']
+
+    def validate(self, attrs):
+        has_lat, has_lon = attrs.get('latitude') is not None, attrs.get('longitude') is not None
+        if has_lat != has_lon:
+            raise serializers.ValidationError('latitude and longitude must be given together.')
+        if not has_lat and not attrs.get('location'):
+            raise serializers.ValidationError('Give coordinates or a location.')
+        known = self.context.get('vehicle_ids')
+        if known is not None and attrs['vehicle_id'] not in known:
+            raise serializers.ValidationError({'vehicle': 'Unknown vehicle.'})
+        return attrs
+
 class BulletinSerializer(serializers.ModelSerializer):
     created_by_username = serializers.CharField(source='created_by.username', read_only=True)
     acknowledged = serializers.SerializerMethodField()
     acknowledged_by = serializers.SerializerMethodField()
+    ack_count = serializers.SerializerMethodField()
     total_users = serializers.SerializerMethodField()
 
     class Meta:
         model = Bulletin
-        fields = ['id', 'title', 'message', 'audience', 'created_by', 'created_by_username', 'created_at', 'acknowledged', 'acknowledged_by', 'total_users']
-        read_only_fields = ['created_by', 'created_by_username', 'created_at', 'acknowledged', 'acknowledged_by', 'total_users']
+        fields = ['id', 'title', 'message', 'audience', 'created_by', 'created_by_username', 'created_at', 'acknowledged', 'acknowledged_by', 'ack_count', 'total_users']
+        read_only_fields = ['created_by', 'created_by_username', 'created_at', 'acknowledged', 'acknowledged_by', 'ack_count', 'total_users']
 
     def get_acknowledged(self, obj):
+        # Prefer the Exists() annotation from BulletinViewSet.get_queryset
+        if hasattr(obj, 'is_acknowledged'):
+            return obj.is_acknowledged
         user = self.context.get('request').user if self.context.get('request') else None
         if not user or not user.is_authenticated:
             return False
@@ -76,13 +126,69 @@ class BulletinSerializer(serializers.ModelSerializer):
         # Return a list of usernames of all users who have acknowledged the bulletin.
         return [ack.user.username for ack in obj.acks.select_related('user').all()]
 
+    def get_ack_count(self, obj):
+        if hasattr(obj, 'ack_count'):
+            return obj.ack_count
+        return obj.acks.count()
+
     def get_total_users(self, obj):
+        # Audience sizes are computed once per request by the view; fall back to a direct count.
+        sizes = self.context.get('audience_sizes')
+        if sizes is not None:
+            return sizes.get(obj.audience, 0)
         from django.contrib.auth.models import User
-        # We count all active users as the potential audience for any bulletin.
-        return User.objects.filter(is_active=True).count()
+        users = User.objects.filter(is_active=True)
+        roles = obj.recipient_roles()
+        if roles is not None:
+            users = users.filter(profile__role__in=roles)
+        return users.count()
+
+class BulletinListSerializer(BulletinSerializer):
+    """List rows: acknowledgement state and counts only; the roster lives at bulletins/{id}/acks/."""
+    class Meta(BulletinSerializer.Meta):
+        fields = ['id', 'title', 'message', 'audience', 'created_by', 'created_by_username', 'created_at', 'acknowledged', 'ack_count', 'total_users']
+
+class BulletinAckSerializer(serializers.ModelSerializer):
+    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True)
+    display_name = serializers.CharField(source='user.profile.display_name', read_only=True, default='')
+
+    class Meta:
+        model = BulletinAck
+        fields = ['user_id', 'username', 'display_name', 'acknowledged_at']
 
 class NotificationSerializer(serializers.ModelSerializer):
+    read = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
-        fields = ['id', 'notif_type', 'message', 'created_at', 'read_at', 'metadata']
+        fields = ['id', 'notif_type', 'message', 'created_at', 'read', 'read_at', 'metadata']
         read_only_fields = ['id', 'created_at', 'read_at']
+
+    def get_read(self, obj):
+        return obj.read_at is not None
+
+class BroadcastNotificationSerializer(serializers.ModelSerializer):
+    """Renders a role broadcast in the same shape as a personal notification.
+
+    Ids are prefixed ('b-<id>') so clients can pass them back to mark-read unchanged.
+    Expects the reader's BroadcastCursor in context['cursor']. The cursor records
+    which broadcasts were read but not when, so `read_at` is always null; use `read`.
+    """
+    id = serializers.SerializerMethodField()
+    read = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BroadcastNotification
+        fields = ['id', 'notif_type', 'message', 'created_at', 'read', 'read_at', 'metadata']
+
+    def get_id(self, obj):
+        return f"b-{obj.id}"
+
+    def get_read(self, obj):
+        cursor = self.context.get('cursor')
+        return cursor is not None and is_broadcast_read(cursor, obj.id)
+
+    def get_read_at(self, obj):
+        return None
@@ -0,0 +1,244 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender='codex.Notification')
+def push_personal_notification(sender, instance, created, **kwargs):
+    if not created:
+        return
+    from api.realtime import publish, user_channel
+    publish(user_channel(instance.user_id), 'notification', {
+        'id': instance.id,
+        'notif_type': instance.notif_type,
+        'message': instance.message,
+        'metadata': instance.metadata,
+    })
+
+
+@receiver(post_save, sender='codex.CodexEntry')
+def process_codex_entry(sender, instance, created, raw=False, **kwargs):
+    # Render and extract references when the content changed. Fixture loads are
+    # skipped; `render_codex` and `rebuild_codex_references` cover them afterwards
+    if raw:
+        return
+    from .documents import apply
+    from .references import sync_entry
+    if apply(instance) or created:
+        sync_entry(instance)
+
+
+@receiver(post_save, sender='codex.CodexEntry')
+@receiver(post_delete, sender='codex.CodexEntry')
+@receiver(post_save, sender='codex.CodexCategoryConfig')
+@receiver(post_delete, sender='codex.CodexCategoryConfig')
+def invalidate_codex_categories(sender, **kwargs):
+    from .landing import invalidate
+    invalidate()
+
+
+
+# Name field of every model that Codex entries can reference, by reference kind
+_REFERENCE_NAMES = {
+    'codex.CodexEntry': ('ENTRY', 'title'),
+    'loom.Operation': ('OPERATION', 'codename'),
+    'scales.Faction': ('FACTION', 'name'),
+}
+
+
+def _reference_name(instance, field):
+    """The name other entries can mention; soft-deleted rows have none."""
+    return None if getattr(instance, 'deleted_at', None) else getattr(instance, field)
+
+
+def _remember_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Stash the stored name so post_save can tell whether it changed
+    _, field = _REFERENCE_NAMES[sender._meta.label]
+    instance._stored_reference_name = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {field, 'deleted_at'} & set(update_fields):
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).first()
+    if stored is not None:
+        instance._stored_reference_name = (_reference_name(stored, field),)
+
+
+def _name_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    kind, field = _REFERENCE_NAMES[sender._meta.label]
+    name = _reference_name(instance, field)
+    stored = getattr(instance, '_stored_reference_name', None)
+    if created:
+        names = [name]
+    elif stored is None or stored[0] == name:
+        return
+    else:
+        names = [stored[0], name]
+    from api.tasks import enqueue
+    enqueue('codex.resync_references', {'target_kind': kind, 'target_id': instance.pk, 'names': names})
+
+
+def _name_deleted(sender, instance, **kwargs):
+    kind, _ = _REFERENCE_NAMES[sender._meta.label]
+    from .references import forget_target
+    forget_target(kind, instance.pk)
+
+
+for _label in _REFERENCE_NAMES:
+    pre_save.connect(_remember_name, sender=_label, dispatch_uid=f'codex_reference_pre_save_{_label}')
+    post_save.connect(_name_saved, sender=_label, dispatch_uid=f'codex_reference_post_save_{_label}')
+    post_delete.connect(_name_deleted, sender=_label, dispatch_uid=f'codex_reference_post_delete_{_label}')
+
+
+@receiver(post_save, sender='codex.Echo')
+def echo_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    from . import dedup, triage
+    fields = set(update_fields or ())
+    if created:
+        dedup.register(instance)
+    elif update_fields is None or fields & {'title', 'content'}:
+        dedup.reindex(instance)
+    if created or update_fields is None or fields & {'involved_entities', 'confidence'}:
+        triage.index_echo(instance)
+    if not created and (update_fields is None or 'status' in fields):
+        triage.status_changed(instance)
+
+
+# Threat field of each entity kind an echo can name
+_THREAT_FIELDS = {
+    'scales.Faction': ('faction', 'threat_index'),
+    'scales.Agent': ('agent', 'threat_level'),
+    'index.IndexProfile': ('profile', 'threat_level'),
+}
+
+
+def _entity_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    kind, field = _THREAT_FIELDS[sender._meta.label]
+    if raw or created or (update_fields is not None and field not in update_fields):
+        return
+    from api.tasks import enqueue
+    enqueue('codex.entity_threat_changed', {'kind': kind, 'entity_id': instance.pk})
+
+
+for _label in _THREAT_FIELDS:
+    post_save.connect(_entity_saved, sender=_label, dispatch_uid=f'codex_triage_post_save_{_label}')
+
+
+# Free text scanned for alias mentions: source kind and the fields holding the text
+_MENTION_SOURCES = {
+    'codex.Echo': ('ECHO', {'title', 'content'}),
+    'codex.SiloComment': ('SILO_COMMENT', {'message'}),
+    'codex.CodexEntry': ('CODEX_ENTRY', {'title', 'content'}),
+    'loom.OperationLog': ('OPERATION_LOG', {'message'}),
+}
+# Profiles, agents and factions whose names and aliases are matched, with their name fields
+_MENTION_ENTITIES = {
+    'index.IndexProfile': ('PROFILE', {'full_name', 'aliases'}),
+    'lineage.Agent': ('LINEAGE_AGENT', {'alias', 'deleted_at'}),
+    'scales.Agent': ('SCALES_AGENT', {'alias', 'name', 'deleted_at'}),
+    'scales.Faction': ('FACTION', {'name', 'deleted_at'}),
+}
+
+
+def _mention_source_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    kind, fields = _MENTION_SOURCES[sender._meta.label]
+    if raw or (not created and update_fields is not None and not fields & set(update_fields)):
+        return
+    from api.tasks import enqueue
+    enqueue('codex.index_mentions', {'source_kind': kind, 'ids': [instance.pk]})
+
+
+def _mention_source_deleted(sender, instance, **kwargs):
+    from .mentions import forget_source
+    forget_source(_MENTION_SOURCES[sender._meta.label][0], instance.pk)
+
+
+def _mention_entity_changed(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    kind, fields = _MENTION_ENTITIES[sender._meta.label]
+    if raw or (update_fields is not None and not fields & set(update_fields)):
+        return
+    from api.tasks import enqueue
+    enqueue('codex.entity_names_changed', {'entity_kind': kind, 'entity_id': instance.pk})
+
+
+for _label in _MENTION_SOURCES:
+    post_save.connect(_mention_source_saved, sender=_label, dispatch_uid=f'codex_mention_post_save_{_label}')
+    post_delete.connect(_mention_source_deleted, sender=_label, dispatch_uid=f'codex_mention_post_delete_{_label}')
+for _label in _MENTION_ENTITIES:
+    post_save.connect(_mention_entity_changed, sender=_label, dispatch_uid=f'codex_mention_entity_post_save_{_label}')
+    post_delete.connect(_mention_entity_changed, sender=_label, dispatch_uid=f'codex_mention_entity_post_delete_{_label}')
+
+
+def _task_load(assigned_to_id, status):
+    """The user a task counts against, if it is open."""
+    from .models import Task
+    return assigned_to_id if assigned_to_id and status in Task.OPEN_STATUSES else None
+
+
+@receiver(pre_save, sender='codex.Task')
+def remember_task_load(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Stash who the stored row counts against so post_save can move the load
+    instance._stored_load = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'assigned_to', 'status'} & set(update_fields):
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).values_list('assigned_to_id', 'status').first()
+    if stored is not None:
+        instance._stored_load = (_task_load(*stored),)
+
+
+@receiver(post_save, sender='codex.Task')
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stored = getattr(instance, '_stored_load', None)
+    if not created and stored is None:
+        return
+    old = None if created else stored[0]
+    new = _task_load(instance.assigned_to_id, instance.status)
+    if old != new:
+        from . import counters
+        if old:
+            counters.adjust([old], 'open_tasks', -1)
+        if new:
+            counters.adjust([new], 'open_tasks', 1)
+
+
+@receiver(post_delete, sender='codex.Task')
+def task_deleted(sender, instance, **kwargs):
+    user_id = _task_load(instance.assigned_to_id, instance.status)
+    if user_id:
+        from . import counters
+        counters.adjust([user_id], 'open_tasks', -1)
+
+
+# Records carrying plates, VINs or addresses: lookup source kind and the fields the keys come from
+_LOOKUP_SOURCES = {
+    'codex.Vehicle': ('VEHICLE', {'license_plate_clean', 'license_plate_cloned', 'vin'}),
+    'codex.PropertyDossier': ('PROPERTY', {'address'}),
+    'index.IndexProfile': ('PROFILE', {'known_vehicles'}),
+    'scales.Agent': ('SCALES_AGENT', {'known_vehicles', 'deleted_at'}),
+}
+
+
+def _lookup_source_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    kind, fields = _LOOKUP_SOURCES[sender._meta.label]
+    if raw or (not created and update_fields is not None and not fields & set(update_fields)):
+        return
+    # Synchronous: a handful of indexed rows, and a record should be findable as soon as it is saved
+    from .lookup import sync
+    sync(kind, instance)
+
+
+def _lookup_source_deleted(sender, instance, **kwargs):
+    from .lookup import forget
+    forget(_LOOKUP_SOURCES[sender._meta.label][0], instance.pk)
+
+
+for _label in _LOOKUP_SOURCES:
+    post_save.connect(_lookup_source_saved, sender=_label, dispatch_uid=f'codex_lookup_post_save_{_label}')
+    post_delete.connect(_lookup_source_deleted, sender=_label, dispatch_uid=f'codex_lookup_post_delete_{_label}')
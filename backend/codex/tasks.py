@@ -0,0 +1,34 @@
+from api.tasks import task
+from . import references
+
+
+@task('codex.resync_references')
+def resync_references(target_kind, target_id, names):
+    """Re-extract entries affected by a renamed (or deleted) entry, operation or faction."""
+    references.resync_name(target_kind, target_id, names)
+
+
+@task('codex.entity_threat_changed')
+def entity_threat_changed(kind, entity_id):
+    """Re-score the echoes that name a faction, agent or profile whose threat may have changed."""
+    from scales.models import Faction, Agent as ScalesAgent
+    from index.models import IndexProfile
+    from . import triage
+    model = {'faction': Faction, 'agent': ScalesAgent, 'profile': IndexProfile}[kind]
+    obj = model._base_manager.filter(pk=entity_id).first()
+    if obj is not None:
+        triage.entity_threat_changed(kind, obj)
+
+
+@task('codex.index_mentions')
+def index_mentions(source_kind, ids):
+    """Scan saved echoes, comments, entries or operation logs for alias mentions."""
+    from . import mentions
+    mentions.index_sources(source_kind, ids)
+
+
+@task('codex.entity_names_changed')
+def entity_names_changed(entity_kind, entity_id):
+    """Patch the mention automaton for a renamed (or deleted) profile, agent or faction."""
+    from . import mentions
+    mentions.entity_changed(entity_kind, entity_id)
@@ -0,0 +1,211 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from . import dedup, lookup
+from .mentions import Automaton, Matcher
+
+FACTION, PROFILE = 'FACTION', 'PROFILE'
+
+
+class AutomatonTests(SimpleTestCase):
+    def matches(self, automaton, text):
+        return sorted(automaton.finditer(text))
+
+    def test_reports_every_occurrence_including_nested_names(self):
+        a = Automaton()
+        for word in ('he', 'she', 'hers', 'his'):
+            a.add(word)
+        self.assertEqual(
+            self.matches(a, 'ushers'),
+            [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')],
+        )
+
+    def test_discarded_name_is_not_reported_but_its_extensions_are(self):
+        a = Automaton()
+        a.add('tide')
+        a.add('black tide')
+        self.matches(a, 'black tide')  # links built before the removal
+        a.discard('tide')
+        self.assertEqual(self.matches(a, 'black tide'), [(0, 10, 'black tide')])
+        a.discard('black tide')
+        self.assertEqual(self.matches(a, 'black tide'), [])
+
+    def test_name_can_be_added_back_after_discard(self):
+        a = Automaton()
+        a.add('raven')
+        a.discard('raven')
+        a.add('raven')
+        self.assertEqual(self.matches(a, 'a raven'), [(2, 7, 'raven')])
+
+    def test_discarding_unknown_name_is_a_no_op(self):
+        a = Automaton()
+        a.add('raven')
+        a.discard('ravens')
+        a.discard('rav')
+        self.assertEqual(self.matches(a, 'raven'), [(0, 5, 'raven')])
+
+
+class MatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.matcher = Matcher()
+        self.matcher.replace((FACTION, 1), {'black tide'})
+        self.matcher.replace((FACTION, 2), {'black tide cell'})
+        self.matcher.replace((PROFILE, 7), {'jon doe', 'the raven'})
+
+    def test_overlapping_names_resolve_leftmost_longest(self):
+        self.assertEqual(self.matcher.scan('The Black Tide Cell struck.'), {(FACTION, 2): 1})
+
+    def test_shorter_name_still_counts_on_its_own(self):
+        self.assertEqual(
+            self.matcher.scan('Black Tide, then the Black Tide Cell'),
+            {(FACTION, 1): 1, (FACTION, 2): 1},
+        )
+
+    def test_matches_only_on_word_boundaries(self):
+        self.assertEqual(self.matcher.scan('jon doesnt know; ajon doe'), {})
+        self.assertEqual(self.matcher.scan('(Jon Doe) and jon doe_'), {(PROFILE, 7): 1})
+
+    def test_counts_repeated_mentions_case_insensitively(self):
+        self.assertEqual(self.matcher.scan('JON DOE met Jon Doe, aka The Raven'), {(PROFILE, 7): 3})
+
+    def test_removed_name_stops_matching_without_a_rebuild(self):
+        self.matcher.scan('warm up the links')
+        added = self.matcher.replace((PROFILE, 7), {'jon doe'})
+        self.assertEqual(added, set())
+        self.assertEqual(self.matcher.scan('the raven and jon doe'), {(PROFILE, 7): 1})
+
+    def test_renamed_entity_matches_only_its_new_name(self):
+        added = self.matcher.replace((FACTION, 1), {'grey tide'})
+        self.assertEqual(added, {'grey tide'})
+        self.assertEqual(self.matcher.scan('black tide and grey tide'), {(FACTION, 1): 1})
+
+    def test_shared_name_is_kept_until_its_last_owner_drops_it(self):
+        self.matcher.replace((PROFILE, 8), {'the raven'})
+        self.matcher.replace((PROFILE, 7), {'jon doe'})
+        self.assertEqual(self.matcher.scan('the raven'), {(PROFILE, 8): 1})
+        self.matcher.replace((PROFILE, 8), set())
+        self.assertEqual(self.matcher.scan('the raven'), {})
+        self.assertNotIn((PROFILE, 8), self.matcher.names)
+
+
+REPORT = (
+    'Convoy of three black vans seen leaving the harbour warehouse at dawn, '
+    'heading north on the coast road with two armed escorts on motorbikes.'
+)
+
+
+def shared_bands(a, b):
+    """Bands in which two signatures fall into the same bucket (EchoBucket rows are keyed by band and bucket)."""
+    return [band for band, (x, y) in enumerate(zip(dedup.buckets(a), dedup.buckets(b))) if x == y]
+
+
+class DedupTests(SimpleTestCase):
+    def test_shingles_ignore_case_punctuation_and_spacing(self):
+        self.assertEqual(dedup.shingles('Black  VANS, at dawn!'), dedup.shingles('black vans at dawn'))
+        self.assertEqual(dedup.shingles('abc'), {'abc'})
+        self.assertEqual(dedup.shingles(' ,. '), set())
+
+    def test_no_signature_without_text(self):
+        self.assertIsNone(dedup.signature('', '  '))
+
+    def test_identical_reports_match_exactly(self):
+        a = dedup.signature('Convoy', REPORT)
+        b = dedup.signature('convoy', REPORT.upper())
+        self.assertEqual(dedup.similarity(a, b), 1.0)
+        self.assertEqual(dedup.buckets(a), dedup.buckets(b))
+        self.assertEqual(len(dedup.buckets(a)), dedup.BANDS)
+
+    def test_reworded_report_is_a_duplicate_candidate(self):
+        a = dedup.signature('Convoy', REPORT)
+        b = dedup.signature('Convoy', REPORT.replace('three', 'four').replace('dawn', 'sunrise'))
+        self.assertGreaterEqual(dedup.similarity(a, b), dedup.DUPLICATE_THRESHOLD)
+        self.assertTrue(shared_bands(a, b))
+
+    def test_unrelated_report_is_not(self):
+        a = dedup.signature('Convoy', REPORT)
+        b = dedup.signature('Ledger', 'Accountant at the casino moved funds through a shell company in March.')
+        self.assertLess(dedup.similarity(a, b), dedup.DUPLICATE_THRESHOLD)
+        self.assertEqual(shared_bands(a, b), [])
+
+    def test_similarity_estimates_jaccard(self):
+        text_a = REPORT
+        text_b = REPORT[:len(REPORT) // 2] + ' Later sightings put them near the old rail depot instead.'
+        sa, sb = dedup.shingles(f'T\n{text_a}'), dedup.shingles(f'T\n{text_b}')
+        jaccard = len(sa & sb) / len(sa | sb)
+        estimate = dedup.similarity(dedup.signature('T', text_a), dedup.signature('T', text_b))
+        self.assertAlmostEqual(estimate, jaccard, delta=0.2)
+
+
+def vehicle(**fields):
+    return SimpleNamespace(**{'license_plate_clean': '', 'license_plate_cloned': '', 'vin': '', **fields})
+
+
+def fuzzy_keys(plate):
+    return lookup.deletes(lookup.skeleton(lookup.normalize_plate(plate)))
+
+
+class LookupTests(SimpleTestCase):
+    def test_plate_normalization_drops_case_spacing_and_punctuation(self):
+        self.assertEqual(lookup.normalize_plate(' ab-123 cd. '), 'AB123CD')
+
+    def test_ocr_look_alikes_fold_to_one_skeleton(self):
+        self.assertEqual(lookup.skeleton('O0DQ IL1 Z2 S5 G6 B8'), '0000 111 22 55 66 88')
+        self.assertEqual(lookup.skeleton('AB123CD'), lookup.skeleton('A8I23C0'))
+
+    def test_vin_folding_only_touches_letters_vins_never_use(self):
+        self.assertEqual(lookup.normalize_vin('1hgcm8263-3a0o4352'), '1HGCM82633A004352')
+        self.assertEqual(lookup.normalize_vin('WBA IQ'), 'WBA10')
+
+    def test_edit_distance(self):
+        cases = [
+            ('AB123CD', 'AB123CD', 0),
+            ('AB123CD', 'AB124CD', 1),   # substitution
+            ('AB123CD', 'AB13CD', 1),    # deletion
+            ('AB123CD', 'AB1223CD', 1),  # insertion
+            ('AB123CD', 'AB132CD', 1),   # adjacent swap
+            ('AB123CD', 'BA132CD', 2),
+            ('', 'ABC', 3),
+            ('ABC', '', 3),
+        ]
+        for a, b, expected in cases:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(lookup.edit_distance(a, b), expected)
+                self.assertEqual(lookup.edit_distance(b, a), expected)
+
+    def test_one_edit_plates_share_a_fuzzy_key(self):
+        for query in ('AB124CD', 'AB13CD', 'AB1223CD', 'AB132CD', 'A8I23C0'):
+            with self.subTest(query=query):
+                self.assertTrue(fuzzy_keys('AB123CD') & fuzzy_keys(query))
+
+    def test_plate_match_types(self):
+        self.assertEqual(lookup.plate_match('AB123CD', 'AB123CD'), ('exact', 1.0))
+        self.assertEqual(lookup.plate_match('AB123CD', 'A8I23C0'), ('ocr', 0.9))
+        self.assertEqual(lookup.plate_match('AB123CD', 'AB132CD'), ('near', 0.7))
+        self.assertEqual(lookup.plate_match('AB123CD', 'AB1X3CD'), ('near', 0.7))
+        # Sharing a fuzzy key is not enough: two edits apart is no match
+        self.assertIsNone(lookup.plate_match('AB123CD', 'AB1XYCD'))
+        self.assertIsNone(lookup.plate_match('AB123CD', 'ZZ999ZZ'))
+
+    def test_short_plates_get_no_fuzzy_keys(self):
+        kinds = {kind for kind, _, _, _ in lookup.extract(lookup.Source.VEHICLE, vehicle(license_plate_clean='A1'))}
+        self.assertEqual(kinds, {lookup.Kind.PLATE})
+
+    def test_vehicle_keys(self):
+        keys = lookup.extract(lookup.Source.VEHICLE, vehicle(license_plate_clean='ab-123 cd', vin='1HGCM82633A0O4352'))
+        self.assertIn((lookup.Kind.PLATE, 'AB123CD', 'license_plate_clean', 'AB123CD'), keys)
+        self.assertIn((lookup.Kind.PLATE_FUZZY, '8123C0', 'license_plate_clean', 'AB123CD'), keys)
+        self.assertIn((lookup.Kind.VIN, '1HGCM82633A004352', 'vin', '1HGCM82633A004352'), keys)
+
+    def test_soft_deleted_records_have_no_keys(self):
+        record = SimpleNamespace(known_vehicles='plate KL 4477 M', deleted_at='2026-01-01')
+        self.assertEqual(lookup.extract(lookup.Source.SCALES_AGENT, record), set())
+
+    def test_plates_and_vins_in_free_text(self):
+        text = 'Black van, plate KL 4477 M; also seen in WDB1234561N123456 and a blue car'
+        self.assertIn('KL4477M', lookup.plates_in_text(text))
+        self.assertNotIn('BLACK', lookup.plates_in_text(text))  # no digit
+        self.assertEqual(lookup.vins_in_text(text), {'WDB1234561N123456'})
+
+    def test_address_tokens_abbreviate_street_words(self):
+        self.assertEqual(lookup.address_tokens('12 North Harbor Street'), ['12', 'n', 'harbor', 'st'])
@@ -0,0 +1,191 @@
+"""Vehicle location history.
+
+Every reported position is appended as a LocationPing; nothing is overwritten.
+VehiclePosition holds each vehicle's newest ping and is advanced in the same
+transaction as the insert, so the fleet overview is one indexed read of a table
+with a row per vehicle, however long the history grows. Pings may arrive out
+of order (queued uploads): an older ping goes into the history without moving
+the position. Vehicle.last_known_location mirrors the position for existing
+clients; locations typed into a vehicle record are recorded as pings too, and
+vehicles that predate the history were seeded by migration.
+
+Track playback reads one vehicle's pings in time order through the
+(vehicle, recorded_at, id) index and pages with a (recorded_at, id) keyset,
+so later pages cost the same as the first.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ingest import Rejected
+from .models import LocationPing, Vehicle, VehiclePosition
+from .serializers import LocationPingSerializer
+
+MAX_PINGS = 1000
+TRACK_LIMIT = 1000
+TRACK_MAX_LIMIT = 5000
+FLEET_LIMIT = 500
+_POINT_FIELDS = ('id', 'recorded_at', 'latitude', 'longitude', 'location')
+
+
+def parse_time(value):
+    """Parse an ISO 8601 parameter into an aware datetime; None when absent, ValueError when malformed."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def describe(ping):
+    """Human-readable location of a ping: its text, else its coordinates."""
+    if ping.location:
+        return ping.location
+    return f'{ping.latitude:.5f}, {ping.longitude:.5f}'
+
+
+def _newer(ping, current):
+    """Whether `ping` is later than a (recorded_at, ping id) pair; ties on time go to the later insert."""
+    return current is None or (ping.recorded_at, ping.pk) > current
+
+
+def advance(pings):
+    """Move each vehicle's position to its newest ping if that is newer than the stored one.
+
+    Returns the ids of the vehicles whose position changed. Must run inside a transaction.
+    """
+    newest = {}
+    for ping in pings:
+        best = newest.get(ping.vehicle_id)
+        if _newer(ping, best and (best.recorded_at, best.pk)):
+            newest[ping.vehicle_id] = ping
+    if not newest:
+        return []
+    # Lock the vehicles so concurrent batches advance one position in order
+    list(Vehicle.objects.select_for_update().filter(pk__in=newest).order_by('pk').values_list('pk', flat=True))
+    current = {
+        vehicle_id: (recorded_at, ping_id or 0)
+        for vehicle_id, recorded_at, ping_id in VehiclePosition.objects.filter(vehicle_id__in=newest)
+        .values_list('vehicle_id', 'recorded_at', 'ping_id')
+    }
+    moved = [ping for vehicle_id, ping in newest.items() if _newer(ping, current.get(vehicle_id))]
+    if not moved:
+        return []
+    VehiclePosition.objects.bulk_create(
+        [
+            VehiclePosition(vehicle_id=p.vehicle_id, ping=p, recorded_at=p.recorded_at,
+                            latitude=p.latitude, longitude=p.longitude, location=p.location)
+            for p in moved
+        ],
+        update_conflicts=True, unique_fields=['vehicle'],
+        update_fields=['ping', 'recorded_at', 'latitude', 'longitude', 'location', 'updated_at'],
+    )
+    Vehicle.objects.bulk_update(
+        [Vehicle(pk=p.vehicle_id, last_known_location=describe(p)[:255]) for p in moved], ['last_known_location']
+    )
+    return [p.vehicle_id for p in moved]
+
+
+def record(user, items):
+    """Validate and store a batch of pings; returns (summary counts, per-item results in input order)."""
+    if not isinstance(items, list):
+        raise Rejected('pings must be a list.', 400)
+    if not items:
+        raise Rejected('Batch is empty.', 400)
+    if len(items) > MAX_PINGS:
+        raise Rejected(f'Batch exceeds {MAX_PINGS} pings; split it up.', 413)
+    ids = {str(item.get('vehicle')) for item in items if isinstance(item, dict)}
+    known = set(Vehicle.objects.filter(pk__in=[int(i) for i in ids if i.isdigit()]).values_list('pk', flat=True))
+    now = timezone.now()
+    results, rows = {}, []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 'invalid', 'errors': {'non_field_errors': ['Each ping must be an object.']}}
+            continue
+        serializer = LocationPingSerializer(data=item, context={'vehicle_ids': known})
+        if serializer.is_valid():
+            rows.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+    with transaction.atomic():
+        pings = LocationPing.objects.bulk_create([
+            LocationPing(reported_by=user, **{'recorded_at': now, **data}) for _, data in rows
+        ])
+        moved = advance(pings)
+    for ping, (index, _) in zip(pings, rows):
+        results[index] = {'index': index, 'status': 'created', 'id': ping.pk}
+    summary = {
+        'received': len(items),
+        'created': len(pings),
+        'invalid': len(items) - len(pings),
+        'vehicles_moved': len(moved),
+    }
+    return summary, [results[i] for i in range(len(items))]
+
+
+def record_location(user, vehicle, location):
+    """Append a text-only ping for a location typed into the vehicle record."""
+    with transaction.atomic():
+        ping = LocationPing.objects.create(vehicle=vehicle, recorded_at=timezone.now(), location=location[:255], reported_by=user)
+        advance([ping])
+    return ping
+
+
+def backfill(get_model=apps.get_model):
+    """Seed a ping and position for every vehicle with a location but no position yet; returns the count.
+
+    The vehicle's creation time stands in for the ping time, the only timestamp
+    a vehicle record carries. `get_model` lets a data migration run this against
+    its historical models.
+    """
+    vehicle_model = get_model('codex.Vehicle')
+    ping_model, position_model = get_model('codex.LocationPing'), get_model('codex.VehiclePosition')
+    vehicles = list(
+        vehicle_model.objects.exclude(last_known_location='').filter(position__isnull=True)
+        .values_list('pk', 'created_at', 'last_known_location')
+    )
+    pings = ping_model.objects.bulk_create(
+        [ping_model(vehicle_id=pk, recorded_at=created_at, location=location[:255]) for pk, created_at, location in vehicles],
+        batch_size=1000,
+    )
+    position_model.objects.bulk_create(
+        [position_model(vehicle_id=p.vehicle_id, ping=p, recorded_at=p.recorded_at, location=p.location) for p in pings],
+        batch_size=1000,
+    )
+    return len(pings)
+
+
+def track(vehicle_id, since=None, until=None, after=None, limit=TRACK_LIMIT):
+    """One vehicle's pings in time order; `after` is the (recorded_at, id) of the last point already seen.
+
+    Returns (points, next cursor or None).
+    """
+    qs = LocationPing.objects.filter(vehicle_id=vehicle_id)
+    if since:
+        qs = qs.filter(recorded_at__gte=since)
+    if until:
+        qs = qs.filter(recorded_at__lt=until)
+    if after:
+        qs = qs.filter(Q(recorded_at__gt=after[0]) | Q(recorded_at=after[0], id__gt=after[1]))
+    points = list(qs.order_by('recorded_at', 'id').values(*_POINT_FIELDS)[:limit + 1])
+    if len(points) <= limit:
+        return points, None
+    points = points[:limit]
+    return points, {'after': points[-1]['recorded_at'], 'after_id': points[-1]['id']}
+
+
+def fleet(since=None, limit=FLEET_LIMIT):
+    """Latest position of every vehicle (optionally only those reported since `since`), newest first."""
+    qs = VehiclePosition.objects.all()
+    if since:
+        qs = qs.filter(recorded_at__gte=since)
+    return list(
+        qs.order_by('-recorded_at').values(
+            'vehicle_id', 'recorded_at', 'latitude', 'longitude', 'location', 'ping_id',
+            make=F('vehicle__make'), model=F('vehicle__model'), license_plate=F('vehicle__license_plate_clean'),
+            assigned_agent_alias=F('vehicle__assigned_agent__alias'),
+        )[:limit]
+    )
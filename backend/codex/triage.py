@@ -0,0 +1,321 @@
+"""Silo triage queue.
+
+Open echoes (PENDING / UNDER_REVIEW) are ranked by an urgency score
+
+    score(t) = confidence + threat + corroboration + AGE_RATE * (t - created_at)
+
+where `threat` follows the most dangerous involved entity and `corroboration`
+grows with the number of other (non-dismissed) echoes naming the same entities.
+Every echo gains urgency at the same rate, so ordering by score(t) is ordering
+by `score(t) - AGE_RATE * t`, which does not depend on t. That value is stored
+in the indexed `Echo.priority` column; it only changes when an echo's own inputs
+change, never just because time passes.
+
+Involved entities are normalised into EchoEntity rows (one per entity key, with
+the entity's threat), so corroborating echoes and echoes affected by a threat
+change are index lookups, and only those echoes are re-scored.
+
+Reviewers claim echoes with a lease: claims skip rows locked or leased by
+someone else, so concurrent reviewers never receive the same echo, and an
+abandoned lease simply expires.
+"""
+import math
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Echo, EchoEntity
+
+OPEN_STATUSES = (Echo.Status.PENDING, Echo.Status.UNDER_REVIEW)
+CONFIDENCE_WEIGHT = {
+    Echo.Confidence.DIRECT: 40,
+    Echo.Confidence.VERIFIED: 30,
+    Echo.Confidence.CORROBORATED: 20,
+    Echo.Confidence.UNVERIFIED: 10,
+}
+THREAT_WEIGHT = 0.4          # per threat point (0-100)
+CORROBORATION_WEIGHT = 10    # per doubling of corroborating echoes
+CORROBORATION_CAP = 30
+AGE_RATE = 1 / 3600          # one point per hour in the queue
+DEFAULT_LEASE = timedelta(minutes=15)
+MAX_LEASE = timedelta(hours=2)
+MAX_CLAIM = 20
+REBUILD_CHUNK = 500
+
+# Index profile threat levels on the 0-100 scale used by factions and agents
+PROFILE_THREAT = {'NONE': 0, 'LOW': 25, 'MEDIUM': 50, 'HIGH': 75, 'CRITICAL': 100}
+_KINDS = {
+    'faction': 'faction', 'factions': 'faction',
+    'agent': 'agent', 'agents': 'agent', 'scales': 'agent',
+    'profile': 'profile', 'profiles': 'profile', 'individual': 'profile', 'index': 'profile', 'person': 'profile',
+}
+
+
+def parse_entities(raw):
+    """Normalise `involved_entities` into (kind, id) and ('name', text) pairs.
+
+    Accepts a list of names or {type, id | name} objects, or a mapping of type to
+    such lists; anything unrecognised is ignored.
+    """
+    if isinstance(raw, dict):
+        items = []
+        for kind, values in raw.items():
+            for value in values if isinstance(values, list) else [values]:
+                items.append(value if isinstance(value, dict) else {'type': kind, 'ref': value})
+    elif isinstance(raw, list):
+        items = raw
+    else:
+        return set()
+    found = set()
+    for item in items:
+        if isinstance(item, str):
+            if item.strip():
+                found.add(('name', item.strip().lower()))
+            continue
+        if not isinstance(item, dict):
+            continue
+        kind = _KINDS.get(str(item.get('type') or item.get('kind') or '').lower())
+        ref = item.get('id', item.get('ref'))
+        if isinstance(ref, str) and ref.strip().isdigit():
+            ref = int(ref)
+        if kind and isinstance(ref, int) and not isinstance(ref, bool):
+            found.add((kind, ref))
+            continue
+        name = ref if isinstance(ref, str) else item.get('name')
+        if isinstance(name, str) and name.strip():
+            found.add(('name', name.strip().lower()))
+    return found
+
+
+def threat_of(kind, obj):
+    if kind == 'faction':
+        return obj.threat_index
+    if kind == 'agent':
+        return obj.threat_level
+    return PROFILE_THREAT.get(obj.threat_level or 'NONE')
+
+
+def resolve_many(pair_sets, get_model=apps.get_model):
+    """{entity key: threat} for each set of parsed pairs, resolved together in three queries.
+
+    Names are matched to factions, agents and profiles (in that order of preference);
+    unmatched names keep a `name:` key so identical free-text mentions still corroborate.
+    """
+    union = set().union(*pair_sets) if pair_sets else set()
+    names = {ref for kind, ref in union if kind == 'name'}
+    found = {}
+    for kind, manager, name_field in (
+        ('faction', get_model('scales.Faction').objects, 'name'),
+        ('agent', get_model('scales.Agent').objects, 'alias'),
+        ('profile', get_model('index.IndexProfile').objects, 'full_name'),
+    ):
+        ids = [ref for k, ref in union if k == kind]
+        if not ids and not names:
+            continue
+        query = Q(pk__in=ids)
+        for name in names:
+            query |= Q(**{f'{name_field}__iexact': name})
+        for obj in manager.filter(query):
+            entry = (f'{kind}:{obj.pk}', threat_of(kind, obj))
+            found[(kind, obj.pk)] = entry
+            found.setdefault(('name', (getattr(obj, name_field) or '').lower()), entry)
+    results = []
+    for pairs in pair_sets:
+        resolved = {}
+        for pair in pairs:
+            if pair in found:
+                key, threat = found[pair]
+                resolved[key] = threat
+            elif pair[0] == 'name':
+                resolved[f'name:{pair[1][:200]}'] = None
+        results.append(resolved)
+    return results
+
+
+def resolve(pairs):
+    return resolve_many([pairs])[0]
+
+
+def corroboration_points(n):
+    return min(CORROBORATION_WEIGHT * math.log2(1 + n), CORROBORATION_CAP)
+
+
+def _neighbours(keys, exclude=()):
+    """Open echoes that share any of `keys`."""
+    if not keys:
+        return set()
+    return set(
+        EchoEntity.objects.filter(key__in=keys, echo__status__in=OPEN_STATUSES)
+        .exclude(echo_id__in=list(exclude)).values_list('echo_id', flat=True)
+    )
+
+
+def refresh(echo_ids, get_model=apps.get_model):
+    """Recompute the stored priority of the given echoes; a constant number of queries."""
+    echo_ids = list(set(echo_ids))
+    if not echo_ids:
+        return 0
+    echo_model, entity_model = get_model('codex.Echo'), get_model('codex.EchoEntity')
+    echoes = {e['id']: e for e in echo_model.objects.filter(pk__in=echo_ids).values('id', 'confidence', 'created_at')}
+    keys, threat = {}, {}
+    for echo_id, key, value in entity_model.objects.filter(echo_id__in=echo_ids).values_list('echo_id', 'key', 'threat'):
+        keys.setdefault(echo_id, set()).add(key)
+        if value is not None:
+            threat[echo_id] = max(threat.get(echo_id, 0), value)
+    holders = {}
+    all_keys = set().union(*keys.values()) if keys else set()
+    if all_keys:
+        for echo_id, key in entity_model.objects.filter(key__in=all_keys).exclude(
+            echo__status=Echo.Status.DISMISSED
+        ).values_list('echo_id', 'key'):
+            holders.setdefault(key, set()).add(echo_id)
+    updates = []
+    for echo_id, echo in echoes.items():
+        corroborating = set().union(*(holders.get(k, set()) for k in keys.get(echo_id, ()))) - {echo_id}
+        base = (
+            CONFIDENCE_WEIGHT.get(echo['confidence'], 0)
+            + THREAT_WEIGHT * threat.get(echo_id, 0)
+            + corroboration_points(len(corroborating))
+        )
+        updates.append(echo_model(pk=echo_id, priority=base - AGE_RATE * echo['created_at'].timestamp()))
+    echo_model.objects.bulk_update(updates, ['priority'], batch_size=500)
+    return len(echoes)
+
+
+def index_echo(echo):
+    """Re-derive an echo's entity rows, then re-score it and the open echoes it corroborates."""
+    resolved = resolve(parse_entities(echo.involved_entities))
+    with transaction.atomic():
+        old = set(EchoEntity.objects.filter(echo=echo).values_list('key', flat=True))
+        EchoEntity.objects.filter(echo=echo).exclude(key__in=list(resolved)).delete()
+        for key, value in resolved.items():
+            EchoEntity.objects.update_or_create(echo=echo, key=key, defaults={'threat': value})
+    return refresh({echo.pk} | _neighbours(old | set(resolved), exclude=[echo.pk]))
+
+
+def index_new(echoes):
+    """Entity rows and priorities for freshly bulk-created echoes, in a constant number of queries."""
+    if not echoes:
+        return 0
+    resolved = resolve_many([parse_entities(echo.involved_entities) for echo in echoes])
+    EchoEntity.objects.bulk_create([
+        EchoEntity(echo_id=echo.pk, key=key, threat=threat)
+        for echo, entities in zip(echoes, resolved) for key, threat in entities.items()
+    ])
+    ids = [echo.pk for echo in echoes]
+    keys = set().union(*(set(entities) for entities in resolved))
+    return refresh(set(ids) | _neighbours(keys, exclude=ids))
+
+
+def status_changed(echo):
+    """Settled echoes give up their lease; dismissals change their neighbours' corroboration."""
+    if echo.status not in OPEN_STATUSES and echo.claimed_by_id:
+        Echo.objects.filter(pk=echo.pk).update(claimed_by=None, lease_expires_at=None)
+        echo.claimed_by, echo.lease_expires_at = None, None
+    keys = set(EchoEntity.objects.filter(echo=echo).values_list('key', flat=True))
+    return refresh(_neighbours(keys, exclude=[echo.pk]))
+
+
+def entity_threat_changed(kind, obj):
+    """Propagate a faction/agent/profile threat change to the echoes that name it."""
+    key = f'{kind}:{obj.pk}'
+    EchoEntity.objects.filter(key=key).update(threat=threat_of(kind, obj))
+    return refresh(_neighbours({key}))
+
+
+def _chunks(rows, size=REBUILD_CHUNK):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild(get_model=apps.get_model):
+    """Re-derive entity rows for every echo and re-score them; returns the number of echoes.
+
+    Works in chunks of REBUILD_CHUNK echoes with a constant number of queries per
+    chunk. Entity rows are all written before any echo is scored, since
+    corroboration counts other echoes' rows. `get_model` lets a data migration
+    run this against its historical models.
+    """
+    echo_model, entity_model = get_model('codex.Echo'), get_model('codex.EchoEntity')
+    rows = echo_model.objects.order_by('pk').values_list('pk', 'involved_entities')
+    ids = []
+    with transaction.atomic():
+        entity_model.objects.all().delete()
+        for chunk in _chunks(rows.iterator(chunk_size=REBUILD_CHUNK)):
+            resolved = resolve_many([parse_entities(raw) for _, raw in chunk], get_model)
+            entity_model.objects.bulk_create([
+                entity_model(echo_id=pk, key=key, threat=threat)
+                for (pk, _), entities in zip(chunk, resolved) for key, threat in entities.items()
+            ])
+            ids += [pk for pk, _ in chunk]
+        for chunk in _chunks(ids):
+            refresh(chunk, get_model)
+    return len(ids)
+
+
+def score(echo, now=None):
+    """The echo's current urgency, for display."""
+    now = now or timezone.now()
+    return round(echo.priority + AGE_RATE * now.timestamp(), 2)
+
+
+def queue(user=None, now=None, include_claimed=False):
+    """Open echoes, most urgent first. Echoes leased to someone else are hidden unless asked for."""
+    now = now or timezone.now()
+    qs = Echo.objects.filter(status__in=OPEN_STATUSES)
+    if not include_claimed:
+        free = Q(claimed_by__isnull=True) | Q(lease_expires_at__lte=now)
+        if user is not None:
+            free |= Q(claimed_by=user)
+        qs = qs.filter(free)
+    return qs.order_by('-priority', 'id')
+
+
+def lease_length(seconds):
+    if seconds in (None, ''):
+        return DEFAULT_LEASE
+    return min(max(timedelta(seconds=int(seconds)), timedelta(seconds=60)), MAX_LEASE)
+
+
+def claim(user, limit=1, lease=DEFAULT_LEASE, now=None):
+    """Lease up to `limit` of the most urgent unclaimed echoes to `user`.
+
+    Rows another reviewer is claiming at the same moment are skipped rather than
+    waited for, so concurrent claims return disjoint echoes.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(
+            Echo.objects.select_for_update(skip_locked=True)
+            .filter(Q(claimed_by__isnull=True) | Q(lease_expires_at__lte=now), status__in=OPEN_STATUSES)
+            .order_by('-priority', 'id')[:limit]
+        )
+        if not rows:
+            return []
+        Echo.objects.filter(pk__in=[e.pk for e in rows]).update(claimed_by=user, lease_expires_at=now + lease)
+        for echo in rows:
+            echo.claimed_by = user
+            echo.lease_expires_at = now + lease
+    return rows
+
+
+def renew(echo_id, user, lease=DEFAULT_LEASE, now=None):
+    """Extend `user`'s live lease; returns the echo, or None if the lease was lost."""
+    now = now or timezone.now()
+    updated = Echo.objects.filter(
+        pk=echo_id, claimed_by=user, lease_expires_at__gt=now, status__in=OPEN_STATUSES
+    ).update(lease_expires_at=now + lease)
+    return Echo.objects.get(pk=echo_id) if updated else None
+
+
+def release(echo_id, user):
+    return Echo.objects.filter(pk=echo_id, claimed_by=user).update(claimed_by=None, lease_expires_at=None) > 0
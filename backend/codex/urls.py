@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CodexEntryViewSet, EchoViewSet, TaskViewSet, VaultItemViewSet, PropertyDossierViewSet, VehicleViewSet, BulletinViewSet, NotificationViewSet, codex_categories, codex_set_category_cover
+from .views import CodexEntryViewSet, EchoViewSet, TaskViewSet, VaultItemViewSet, PropertyDossierViewSet, VehicleViewSet, BulletinViewSet, NotificationViewSet, codex_categories, codex_set_category_cover, codex_references_to, codex_mentions
 
 router = DefaultRouter()
 router.register(r'entries', CodexEntryViewSet, basename='codex-entry')
@@ -16,6 +16,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('categories/', codex_categories, name='codex-categories'),
     path('categories/set-cover/', codex_set_category_cover, name='codex-set-category-cover'),
+    path('references/', codex_references_to, name='codex-references'),
+    path('mentions/', codex_mentions, name='codex-mentions'),
 ]
 
 
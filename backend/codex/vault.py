@@ -0,0 +1,135 @@
+"""Envelope encryption for Vault secrets.
+
+Each secret is encrypted (AES-256-GCM) under its own random data key; the data
+key is stored wrapped (encrypted) by the master key, never in the clear. The
+master key comes from settings.VAULT_MASTER_KEY (32 bytes, urlsafe base64) or,
+when that is unset, is derived from SECRET_KEY with HKDF, in which case rotating
+SECRET_KEY makes existing secrets unreadable.
+
+Lists and detail views never decrypt; only an explicit reveal does. Unwrapped
+data keys are kept in a small per-process cache (bounded size, short TTL) so
+repeated reveals skip the unwrap. The cache is deliberately process memory,
+not the shared Django cache, so plaintext keys never leave the process.
+"""
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+NONCE_SIZE = 12
+KEY_SIZE = 32
+KEY_CACHE_SIZE = 256
+KEY_CACHE_TTL = 300  # seconds
+_WRAP_AAD = b'abacus-vault:data-key'
+_SECRET_AAD = b'abacus-vault:secret'
+
+
+class VaultError(Exception):
+    """A sealed secret could not be opened (wrong master key or corrupted data)."""
+
+
+@lru_cache(maxsize=1)
+def master_key():
+    configured = getattr(settings, 'VAULT_MASTER_KEY', '')
+    if configured:
+        try:
+            key = base64.urlsafe_b64decode(configured)
+        except ValueError:
+            key = b''
+        if len(key) != KEY_SIZE:
+            raise ImproperlyConfigured('VAULT_MASTER_KEY must be 32 bytes, urlsafe-base64 encoded.')
+        return key
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    return HKDF(algorithm=hashes.SHA256(), length=KEY_SIZE, salt=None, info=b'abacus-vault:master').derive(
+        settings.SECRET_KEY.encode()
+    )
+
+
+def master_key_id():
+    """Short fingerprint of the master key, stored with each secret to detect a key change."""
+    return hashlib.sha256(master_key()).hexdigest()[:16]
+
+
+def _encrypt(key, plaintext, aad):
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + AESGCM(key).encrypt(nonce, plaintext, aad)
+
+
+def _decrypt(key, blob, aad):
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    blob = bytes(blob)
+    try:
+        return AESGCM(key).decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], aad)
+    except InvalidTag as e:
+        raise VaultError('Secret could not be decrypted with the configured master key.') from e
+
+
+class _KeyCache:
+    """LRU map of wrapped data key -> unwrapped data key, entries expiring after KEY_CACHE_TTL."""
+
+    def __init__(self, size=KEY_CACHE_SIZE, ttl=KEY_CACHE_TTL):
+        self.size, self.ttl = size, ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wrapped):
+        with self._lock:
+            entry = self._items.get(wrapped)
+            if entry is None:
+                return None
+            key, expires = entry
+            if expires <= time.monotonic():
+                del self._items[wrapped]
+                return None
+            self._items.move_to_end(wrapped)
+            return key
+
+    def put(self, wrapped, key):
+        with self._lock:
+            self._items[wrapped] = (key, time.monotonic() + self.ttl)
+            self._items.move_to_end(wrapped)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+data_keys = _KeyCache()
+
+
+def sealed_fields(plaintext):
+    """VaultItem field values holding `plaintext` sealed under a fresh data key (or cleared when empty)."""
+    if not plaintext:
+        return {'secret_ciphertext': None, 'wrapped_key': None, 'key_id': '', 'has_secret': False}
+    data_key = os.urandom(KEY_SIZE)
+    return {
+        'secret_ciphertext': _encrypt(data_key, plaintext.encode(), _SECRET_AAD),
+        'wrapped_key': _encrypt(master_key(), data_key, _WRAP_AAD),
+        'key_id': master_key_id(),
+        'has_secret': True,
+    }
+
+
+def reveal(item):
+    """Decrypt an item's secret; '' when it has none."""
+    if not item.has_secret:
+        return ''
+    wrapped = bytes(item.wrapped_key)
+    data_key = data_keys.get(wrapped)
+    if data_key is None:
+        if item.key_id and item.key_id != master_key_id():
+            raise VaultError('Secret was sealed with a different master key.')
+        data_key = _decrypt(master_key(), wrapped, _WRAP_AAD)
+        data_keys.put(wrapped, data_key)
+    return _decrypt(data_key, item.secret_ciphertext, _SECRET_AAD).decode()
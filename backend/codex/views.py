@@ -2,63 +2,64 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import ValidationError
 
-from .models import CodexEntry, Echo, Task, PropertyDossier, Vehicle, Bulletin, BulletinAck, Notification, CodexCategoryConfig
+from .models import CodexEntry, CodexSection, CodexReference, Echo, Task, PropertyDossier, Vehicle, Bulletin, BulletinAck, Notification, CodexCategoryConfig, Mention, VaultItem
 from lineage.models import Agent as LineageAgent
-from .serializers import CodexEntrySerializer, EchoSerializer, TaskSerializer, SiloCommentSerializer, PropertyDossierSerializer, VehicleSerializer, BulletinSerializer, NotificationSerializer
+from .serializers import CodexEntrySerializer, CodexEntryListSerializer, EchoSerializer, TaskSerializer, SiloCommentSerializer, PropertyDossierSerializer, VehicleSerializer, BulletinSerializer, BulletinListSerializer, BulletinAckSerializer, NotificationSerializer, BroadcastNotificationSerializer
+from .notifications import broadcast, notify, inbox, parse_item_id, INBOX_LIMIT, INBOX_MAX_LIMIT, mark_read, mark_broadcasts_read, split_ids, unread_count as inbox_unread_count
+from . import counters, dedup, ingest, lookup, mentions, references, tracking, triage, vault
+from .landing import get_categories
 from api.permissions import IsProtector, IsProtectorOrHeir, get_user_role, IsTrueProtector, IsHQ
 from audit.utils import log_action
+from api.realtime import publish, user_channel, role_channel, ALL_CHANNEL
 from django.contrib.auth.models import User
-from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Q, F, Case, When, Count, Sum, Exists, OuterRef, Window
+from django.db.models.functions import RowNumber
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def codex_categories(request):
-    """Return Codex categories for landing widgets.
+    """Return Codex categories for landing widgets, with entry counts and the latest entry of each.
 
-    Uses entry_type as the category key. Image URLs are static placeholders; replace with real assets as desired.
+    Uses entry_type as the category key. Served from cache (see codex/landing.py).
     """
-    base_categories = [
-        {
-            'name': 'Historic Events',
-            'image_url': '/static/images/codex_events.jpg',
-            'description': "Review major operations and outcomes.",
-        },
-        {
-            'name': 'Doctrine & Philosophy',
-            'image_url': '/static/images/codex_doctrine.jpg',
-            'description': "Study the core tenets and philosophy.",
-        },
-        {
-            'name': 'Biographies of the Lost',
-            'image_url': '/static/images/codex_biographies.jpg',
-            'description': "Honor agents who made the ultimate sacrifice.",
-        },
-        {
-            'name': 'Standard Operating Procedures (SOPs)',
-            'image_url': '/static/images/codex_sops.jpg',
-            'description': "Reference standard operating procedures.",
-        },
-        {
-            'name': 'Threat Analysis Reports',
-            'image_url': '/static/images/codex_threats.jpg',
-            'description': "Analyze hostile entities and vectors.",
-        },
-    ]
-    # Apply overrides from DB config
-    configs = {c.name: c for c in CodexCategoryConfig.objects.all()}
-    out = []
-    for item in base_categories:
-        cfg = configs.get(item['name'])
-        if cfg:
-            out.append({
-                'name': item['name'],
-                'image_url': cfg.image_url or item['image_url'],
-                'description': cfg.description or item['description'],
-            })
-        else:
-            out.append(item)
-    return Response(out)
+    return Response(get_categories())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def codex_references_to(request):
+    """Codex entries that reference an operation or faction: ?kind=OPERATION|FACTION&id=<pk>."""
+    kind = (request.query_params.get('kind') or '').upper()
+    if kind not in (CodexReference.Kind.OPERATION, CodexReference.Kind.FACTION):
+        return Response({'error': 'kind must be OPERATION or FACTION'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        target_id = int(request.query_params.get('id'))
+    except (TypeError, ValueError):
+        return Response({'error': 'id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(references.backlinks(kind, target_id))
+
+@api_view(['GET'])
+@permission_classes([IsProtectorOrHeir])
+def codex_mentions(request):
+    """Texts that mention a person or faction: ?entity=PROFILE|LINEAGE_AGENT|SCALES_AGENT|FACTION&id=<pk>[&source=ECHO,...]."""
+    entity = (request.query_params.get('entity') or '').upper()
+    if entity not in Mention.Entity.values:
+        return Response({'error': f"entity must be one of {', '.join(Mention.Entity.values)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        entity_id = int(request.query_params.get('id'))
+    except (TypeError, ValueError):
+        return Response({'error': 'id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    sources = [s.strip().upper() for s in (request.query_params.get('source') or '').split(',') if s.strip()]
+    unknown = set(sources) - set(Mention.Source.values)
+    if unknown:
+        return Response({'error': f"Unknown source(s): {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(mentions.mentioning(entity, entity_id, sources or None))
 
 @api_view(['POST'])
 @permission_classes([IsHQ])
@@ -84,7 +85,7 @@ class CodexEntryViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Permissions: list/retrieve for any auth; create/update for Protector/HQ; delete for HQ only."""
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'section', 'outgoing_references', 'backlinks', 'related']:
             self.permission_classes = [IsAuthenticated]
         elif self.action in ['create', 'update', 'partial_update']:
             self.permission_classes = [IsProtector]  # IsProtector includes HQ in our policy
@@ -119,8 +120,57 @@ class CodexEntryViewSet(viewsets.ModelViewSet):
         if q:
             from django.db.models import Q
             qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
+        if self.action == 'list':
+            qs = qs.defer('content', 'content_html')
         return qs
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CodexEntryListSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, methods=['get'], url_path=r'sections/(?P<anchor>[-\w]+)')
+    def section(self, request, pk=None, anchor=None):
+        """One pre-rendered section of an entry, with the anchors of its neighbours."""
+        section = CodexSection.objects.filter(entry_id=pk, anchor=anchor).first()
+        if section is None:
+            return Response({'error': 'Section not found.'}, status=status.HTTP_404_NOT_FOUND)
+        neighbours = dict(
+            CodexSection.objects.filter(entry_id=pk, position__in=[section.position - 1, section.position + 1])
+            .values_list('position', 'anchor')
+        )
+        return Response({
+            'entry': section.entry_id,
+            'anchor': section.anchor,
+            'title': section.title,
+            'level': section.level,
+            'html': section.html,
+            'previous': neighbours.get(section.position - 1),
+            'next': neighbours.get(section.position + 1),
+        })
+
+    @action(detail=True, methods=['get'], url_path='references')
+    def outgoing_references(self, request, pk=None):
+        """Entries, operations and factions this entry links to or mentions."""
+        entry = get_object_or_404(CodexEntry.objects.only('id'), pk=pk)
+        return Response(references.outgoing(entry.pk))
+
+    @action(detail=True, methods=['get'], url_path='backlinks')
+    def backlinks(self, request, pk=None):
+        """Entries that reference this one, and operations that list it as a contingency."""
+        entry = get_object_or_404(CodexEntry.objects.only('id'), pk=pk)
+        from loom.models import Operation
+        operations = Operation.objects.filter(contingencies=entry).order_by('codename').values('id', 'codename', 'status')
+        return Response({
+            'entries': references.backlinks(CodexReference.Kind.ENTRY, entry.pk),
+            'operations': list(operations),
+        })
+
+    @action(detail=True, methods=['get'], url_path='related')
+    def related(self, request, pk=None):
+        entry = get_object_or_404(CodexEntry.objects.only('id'), pk=pk)
+        return Response(references.related(entry.pk))
+
 
 class EchoViewSet(viewsets.ModelViewSet):
     queryset = Echo.objects.all().order_by('-created_at')
@@ -130,25 +180,48 @@ class EchoViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         echo = serializer.save(created_by=self.request.user)
         log_action(self.request.user, f"Submitted echo '{echo.title}' targeting {echo.suggested_target}", target=echo)
-        # Notify leadership about new Silo report
+        if echo.duplicate_of_id:
+            # Likely a re-submission (clustered by codex.dedup on save); leadership was already notified
+            return
+        # Notify leadership about new Silo report (one broadcast row per role)
+        broadcast(['PROTECTOR', 'HEIR'], Notification.Type.SILO_REPORT, f"New Silo report: {echo.title}", {'echo_id': echo.id})
+
+    @action(detail=False, methods=['post'], url_path='ingest', parser_classes=[ingest.NDJSONParser, JSONParser])
+    def bulk_ingest(self, request):
+        """Bulk-submit echoes as NDJSON (one object per line) or a JSON array; results are reported per line."""
         try:
-            recipients = User.objects.filter(profile__role__in=['PROTECTOR', 'HEIR']).distinct()
-            Notification.objects.bulk_create([
-                Notification(
-                    user=u,
-                    notif_type=Notification.Type.SILO_REPORT,
-                    message=f"New Silo report: {echo.title}",
-                    metadata={'echo_id': echo.id}
-                ) for u in recipients
-            ])
-        except Exception:
-            pass
+            declared = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            declared = 0
+        if declared > ingest.MAX_BYTES:
+            return Response({'error': f'Batch exceeds {ingest.MAX_BYTES} bytes.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if not isinstance(request.data, (bytes, list)):
+            return Response({'error': 'Send NDJSON or a JSON array of echoes.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            summary, results, echoes = ingest.ingest(request.user, request.data)
+        except ingest.Rejected as e:
+            headers = {'Retry-After': str(e.retry_after)} if e.retry_after else None
+            return Response({'error': str(e)}, status=e.status_code, headers=headers)
+        if echoes:
+            log_action(request.user, f"Bulk-submitted {len(echoes)} echo(es)", details={
+                'echo_ids': [e.pk for e in echoes], 'duplicates': summary['duplicates'], 'invalid': summary['invalid'],
+            })
+        return Response({**summary, 'results': results})
 
     def get_queryset(self):
         qs = super().get_queryset()
         status_filter = self.request.query_params.get('status')
         if status_filter:
             qs = qs.filter(status=status_filter)
+        mentioned = self.request.query_params.get('mentions')
+        if mentioned:
+            # ?mentions=FACTION:12 -- reports naming an entity, via the mention index
+            entity_kind, _, entity_id = mentioned.upper().partition(':')
+            if entity_kind not in Mention.Entity.values or not entity_id.isdigit():
+                raise ValidationError({'error': 'mentions must look like FACTION:<id>'})
+            qs = qs.filter(Exists(Mention.objects.filter(
+                source_kind=Mention.Source.ECHO, source_id=OuterRef('pk'), entity_kind=entity_kind, entity_id=int(entity_id),
+            )))
         role = get_user_role(self.request.user)
         # Leadership: can see all (optionally filtered by status)
         if role in ['PROTECTOR', 'HEIR']:
@@ -156,6 +229,62 @@ class EchoViewSet(viewsets.ModelViewSet):
         # Overlooker and others: can only see their own submissions
         return qs.filter(created_by=self.request.user)
 
+    def _triage_items(self, echoes):
+        now = timezone.now()
+        data = self.get_serializer(echoes, many=True).data
+        for item, echo in zip(data, echoes):
+            item['score'] = triage.score(echo, now)
+        return data
+
+    @action(detail=False, methods=['get'], permission_classes=[IsProtectorOrHeir], url_path='triage')
+    def triage_queue(self, request):
+        """Open echoes by triage priority; echoes leased to other reviewers are hidden unless ?include_claimed=1."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        include_claimed = request.query_params.get('include_claimed') in ['1', 'true', 'True']
+        qs = triage.queue(request.user, include_claimed=include_claimed)
+        echoes = list(qs.select_related('created_by', 'decided_by', 'claimed_by').prefetch_related('assigned_agents')[:limit])
+        return Response(self._triage_items(echoes))
+
+    @action(detail=False, methods=['post'], permission_classes=[IsProtectorOrHeir], url_path='triage/claim')
+    def triage_claim(self, request):
+        """Lease the most urgent unclaimed echoes to the caller: {"count": 1-20, "lease_seconds": 60-7200}."""
+        try:
+            count = min(max(int(request.data.get('count', 1)), 1), triage.MAX_CLAIM)
+            lease = triage.lease_length(request.data.get('lease_seconds'))
+        except (TypeError, ValueError):
+            return Response({'error': 'count and lease_seconds must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        echoes = triage.claim(request.user, count, lease)
+        if echoes:
+            log_action(request.user, f"Claimed {len(echoes)} echo(es) for triage", details={'echo_ids': [e.pk for e in echoes]})
+        return Response(self._triage_items(echoes))
+
+    @action(detail=True, methods=['post'], permission_classes=[IsProtectorOrHeir], url_path='renew-claim')
+    def renew_claim(self, request, pk=None):
+        try:
+            lease = triage.lease_length(request.data.get('lease_seconds'))
+        except (TypeError, ValueError):
+            return Response({'error': 'lease_seconds must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        echo = triage.renew(pk, request.user, lease)
+        if echo is None:
+            return Response({'error': 'You do not hold a live claim on this echo.'}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(echo).data)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsProtectorOrHeir], url_path='release-claim')
+    def release_claim(self, request, pk=None):
+        if not triage.release(pk, request.user):
+            return Response({'error': 'You do not hold a claim on this echo.'}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'released'})
+
+    @action(detail=True, methods=['get'], permission_classes=[IsProtectorOrHeir], url_path='cluster')
+    def cluster(self, request, pk=None):
+        """The near-duplicate cluster this echo belongs to, first report first."""
+        echo = self.get_object()
+        members = dedup.cluster(echo).select_related('created_by', 'decided_by', 'claimed_by').prefetch_related('assigned_agents').order_by('created_at', 'id')
+        return Response(self.get_serializer(members, many=True).data)
+
     @action(detail=True, methods=['post'], permission_classes=[IsProtectorOrHeir])
     def dismiss(self, request, pk=None):
         echo = self.get_object()
@@ -237,6 +366,10 @@ class EchoViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(echo).data)
 
 
+TASK_SUMMARY_MAX_IDS = 200
+TASK_SUMMARY_LATEST = 3
+
+
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.select_related('assigned_to', 'created_by').all().order_by('-created_at')
     serializer_class = TaskSerializer
@@ -264,9 +397,56 @@ class TaskViewSet(viewsets.ModelViewSet):
         if related_app:
             qs = qs.filter(related_app=related_app)
         if related_id:
-            qs = qs.filter(related_id=related_id)
+            if not related_id.isdigit():
+                raise ValidationError({'error': 'related_id must be an integer'})
+            qs = qs.filter(related_id=int(related_id))
         return qs
 
+    @action(detail=False, methods=['get'], url_path='summary')
+    def summary(self, request):
+        """Open-task badges for many records at once: ?related_app=index&ids=1,2,3 (up to 200 ids).
+
+        One query: window functions count each record's open tasks and keep its
+        latest few, within the tasks the caller may see.
+        """
+        related_app = request.query_params.get('related_app')
+        if not related_app:
+            return Response({'error': 'related_app is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = list(dict.fromkeys(int(i) for i in (request.query_params.get('ids') or '').split(',') if i.strip()))
+        except ValueError:
+            return Response({'error': 'ids must be a comma-separated list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids or len(ids) > TASK_SUMMARY_MAX_IDS:
+            return Response({'error': f'Pass between 1 and {TASK_SUMMARY_MAX_IDS} ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = (
+            self.get_queryset().filter(related_app=related_app, related_id__in=ids, status__in=Task.OPEN_STATUSES)
+            .annotate(
+                open_count=Window(Count('id'), partition_by=[F('related_id')]),
+                in_progress_count=Window(
+                    Sum(Case(When(status=Task.Status.IN_PROGRESS, then=1), default=0)), partition_by=[F('related_id')]
+                ),
+                rank=Window(RowNumber(), partition_by=[F('related_id')], order_by=[F('created_at').desc(), F('id').desc()]),
+            )
+            .filter(rank__lte=TASK_SUMMARY_LATEST)
+            .values('id', 'title', 'status', 'related_id', 'assigned_to', 'assigned_to__username', 'created_at',
+                    'open_count', 'in_progress_count')
+        )
+        summary = {pk: {'related_id': pk, 'open_tasks': 0, 'in_progress': 0, 'latest': []} for pk in ids}
+        for row in rows:
+            item = summary[row['related_id']]
+            item['open_tasks'], item['in_progress'] = row['open_count'], row['in_progress_count']
+            item['latest'].append({
+                'id': row['id'],
+                'title': row['title'],
+                'status': row['status'],
+                'assigned_to': row['assigned_to'],
+                'assigned_to_username': row['assigned_to__username'],
+                'created_at': row['created_at'],
+            })
+        for item in summary.values():
+            item['latest'].sort(key=lambda t: (t['created_at'], t['id']), reverse=True)
+        return Response([summary[pk] for pk in ids])
+
     def perform_create(self, serializer):
         # Resolve assignee: either given id or by role hint
         assigned_user = None
@@ -277,21 +457,20 @@ class TaskViewSet(viewsets.ModelViewSet):
                 assigned_user = User.objects.get(pk=int(assigned_to))
             except Exception:
                 assigned_user = None
-        elif assigned_role:
-            try:
-                assigned_user = User.objects.filter(profile__role=assigned_role).first()
-            except Exception:
-                assigned_user = None
-        task = serializer.save(created_by=self.request.user, assigned_to=assigned_user)
+        with transaction.atomic():
+            if assigned_role and not assigned_to:
+                # Least-loaded available member of the role; the pick stays locked until the task is saved
+                assigned_user = counters.least_loaded(assigned_role)
+            task = serializer.save(created_by=self.request.user, assigned_to=assigned_user)
         log_action(self.request.user, f"Created task '{task.title}' for {task.assigned_to}", target=task)
         # Notify assignee if present
         try:
             if assigned_user:
-                Notification.objects.create(
-                    user=assigned_user,
-                    notif_type=Notification.Type.TASK_ASSIGNED,
-                    message=f"Task assigned: {task.title}",
-                    metadata={'task_id': task.id}
+                notify(
+                    assigned_user,
+                    Notification.Type.TASK_ASSIGNED,
+                    f"Task assigned: {task.title}",
+                    {'task_id': task.id},
                 )
         except Exception:
             pass
@@ -334,14 +513,51 @@ class BulletinViewSet(viewsets.ModelViewSet):
             self.permission_classes = [IsAuthenticated] # Permissions checked in methods
         return super().get_permissions()
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BulletinListSerializer
+        return BulletinSerializer
+
     def get_queryset(self):
         qs = super().get_queryset()
-        # Bulletins are for all authenticated users.
+        # Protector/HQ see every bulletin; others see ALL plus their own audience
+        qs = Bulletin.visible_to_role(get_user_role(self.request.user), qs)
+        if self.action in ['list', 'retrieve']:
+            qs = qs.annotate(
+                is_acknowledged=Exists(BulletinAck.objects.filter(bulletin=OuterRef('pk'), user=self.request.user)),
+                ack_count=Count('acks'),
+            )
         return qs
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            context['audience_sizes'] = self._audience_sizes()
+        return context
+
+    def _audience_sizes(self):
+        """Active users per bulletin audience, from one grouped query."""
+        by_role = dict(
+            User.objects.filter(is_active=True).values('profile__role')
+            .annotate(n=Count('id')).values_list('profile__role', 'n')
+        )
+        sizes = {Bulletin.Audience.ALL: sum(by_role.values())}
+        for audience, roles in Bulletin.AUDIENCE_ROLES.items():
+            sizes[audience] = sum(by_role.get(r, 0) for r in set(roles) | set(Bulletin.ALWAYS_VISIBLE_ROLES))
+        return sizes
+
     def perform_create(self, serializer):
-        bulletin = serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            bulletin = serializer.save(created_by=self.request.user)
+            counters.bulletin_posted(bulletin)
         log_action(self.request.user, f"Posted bulletin '{bulletin.title}' to {bulletin.audience}", target=bulletin)
+        event = {'id': bulletin.id, 'title': bulletin.title, 'audience': bulletin.audience}
+        roles = bulletin.recipient_roles()
+        if roles is None:
+            publish(ALL_CHANNEL, 'bulletin', event)
+        else:
+            for r in roles:
+                publish(role_channel(r), 'bulletin', event)
 
     def update(self, request, *args, **kwargs):
         bulletin = self.get_object()
@@ -350,19 +566,34 @@ class BulletinViewSet(viewsets.ModelViewSet):
             return Response({'error': 'You do not have permission to edit this bulletin.'}, status=status.HTTP_403_FORBIDDEN)
         return super().update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous = Bulletin.objects.select_for_update().get(pk=serializer.instance.pk)
+            moved = 'audience' in serializer.validated_data and serializer.validated_data['audience'] != previous.audience
+            if moved:
+                # Move the unacked count from the old audience to the new one
+                counters.bulletin_removed(previous)
+            bulletin = serializer.save()
+            if moved:
+                counters.bulletin_posted(bulletin)
+
     def destroy(self, request, *args, **kwargs):
         bulletin = self.get_object()
         role = get_user_role(request.user)
         if bulletin.created_by != request.user and role not in ['PROTECTOR', 'HQ']:
             return Response({'error': 'You do not have permission to delete this bulletin.'}, status=status.HTTP_403_FORBIDDEN)
-        return super().destroy(request, *args, **kwargs)
+        with transaction.atomic():
+            counters.bulletin_removed(bulletin)
+            return super().destroy(request, *args, **kwargs)
 
     @action(detail=False, methods=['post'], permission_classes=[IsHQ], url_path='clear')
     def clear_board(self, request):
         """HQ-only: remove all bulletins and acknowledgements."""
         try:
-            count = Bulletin.objects.count()
-            Bulletin.objects.all().delete()
+            with transaction.atomic():
+                count = Bulletin.objects.count()
+                Bulletin.objects.all().delete()
+                counters.reset('unacked_bulletins')
             log_action(request.user, f"Cleared bulletin board ({count} items)")
             return Response({'status': 'ok', 'removed': count})
         except Exception as e:
@@ -371,49 +602,88 @@ class BulletinViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], url_path='ack')
     def acknowledge(self, request, pk=None):
         bulletin = self.get_object()
-        _, created = BulletinAck.objects.get_or_create(bulletin=bulletin, user=request.user)
+        with transaction.atomic():
+            _, created = BulletinAck.objects.get_or_create(bulletin=bulletin, user=request.user)
+            if created:
+                counters.adjust([request.user.id], 'unacked_bulletins', -1)
         # Notify the creator of the bulletin on first acknowledgement
-        if created and bulletin.created_by != request.user:
-            Notification.objects.create(
-                user=bulletin.created_by,
-                notif_type=Notification.Type.BULLETIN_ACK,
-                message=f"{request.user.username} acknowledged your bulletin: '{bulletin.title}'",
-                metadata={'bulletin_id': bulletin.id, 'user_id': request.user.id}
+        if created and bulletin.created_by and bulletin.created_by != request.user:
+            notify(
+                bulletin.created_by,
+                Notification.Type.BULLETIN_ACK,
+                f"{request.user.username} acknowledged your bulletin: '{bulletin.title}'",
+                {'bulletin_id': bulletin.id, 'user_id': request.user.id},
             )
+        if created:
+            # Lets the acknowledging user's other sessions refresh their unacked badge
+            publish(user_channel(request.user.id), 'bulletin_ack', {'bulletin_id': bulletin.id})
         return Response({'status': 'acknowledged'})
 
+    @action(detail=True, methods=['get'], url_path='acks')
+    def acks(self, request, pk=None):
+        """Paginated acknowledgement roster for one bulletin (?page=, ?page_size=)."""
+        bulletin = self.get_object()
+        qs = BulletinAck.objects.filter(bulletin=bulletin).select_related('user__profile').order_by('acknowledged_at', 'id')
+        paginator = PageNumberPagination()
+        paginator.page_size = 50
+        paginator.page_size_query_param = 'page_size'
+        paginator.max_page_size = 500
+        page = paginator.paginate_queryset(qs, request, view=self)
+        return paginator.get_paginated_response(BulletinAckSerializer(page, many=True).data)
+
     @action(detail=False, methods=['get'], url_path='unacked-count')
     def unacked_count(self, request):
         role = get_user_role(request.user)
-        qs = self.get_queryset()
-        if role != 'PROTECTOR':
-            qs = qs.exclude(acks__user=request.user)
-        return Response({'count': qs.count()})
+        if role == 'PROTECTOR':
+            return Response({'count': self.get_queryset().count()})
+        return Response({'count': counters.get_counter(request.user).unacked_bulletins})
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Personal notifications merged with role broadcasts (ids 'b-<id>') at read time."""
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
 
+    def _unread_only(self):
+        return self.request.query_params.get('unread') in ['1', 'true', 'True']
+
     def get_queryset(self):
         qs = Notification.objects.filter(user=self.request.user).order_by('-created_at')
-        unread_only = self.request.query_params.get('unread')
-        if unread_only in ['1', 'true', 'True']:
+        if self._unread_only():
             qs = qs.filter(read_at__isnull=True)
         return qs
 
+    def list(self, request, *args, **kwargs):
+        """Newest first, ?limit= per page; pass the returned `before`/`before_id` for the next page."""
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get('limit') or INBOX_LIMIT), 1), INBOX_MAX_LIMIT)
+            before = tracking.parse_time(params.get('before'))
+            if before is not None:
+                before = (before, *parse_item_id(params.get('before_id') or 0))
+        except ValueError:
+            return Response({'error': 'before must be an ISO 8601 time, before_id a notification id and limit an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        items, next_cursor, cursor = inbox(request.user, self._unread_only(), before, limit)
+        data = []
+        for n in items:
+            if isinstance(n, Notification):
+                data.append(NotificationSerializer(n).data)
+            else:
+                data.append(BroadcastNotificationSerializer(n, context={'cursor': cursor}).data)
+        return Response({'results': data, 'next': next_cursor})
+
     @action(detail=False, methods=['post'], url_path='mark-read')
     def mark_read(self, request):
         ids = request.data.get('ids') or []
         if not isinstance(ids, list):
             return Response({'error': 'ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
-        from django.utils import timezone
-        Notification.objects.filter(user=request.user, id__in=ids, read_at__isnull=True).update(read_at=timezone.now())
+        personal_ids, broadcast_ids = split_ids(ids)
+        mark_read(request.user, personal_ids)
+        mark_broadcasts_read(request.user, broadcast_ids)
         return Response({'status': 'ok'})
 
     @action(detail=False, methods=['get'], url_path='unread-count')
     def unread_count(self, request):
-        count = Notification.objects.filter(user=request.user, read_at__isnull=True).count()
-        return Response({'count': count})
+        return Response({'count': inbox_unread_count(request.user)})
 
     def create(self, request, *args, **kwargs):
         # Translate assigned_to_role to assigned_to id before serializer validation
@@ -421,7 +691,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         if 'assigned_to' not in data and 'assigned_to_role' in data:
             role = data.get('assigned_to_role')
             try:
-                user = User.objects.filter(profile__role=role).first()
+                user = counters.least_loaded(role, lock=False)
                 if user:
                     data['assigned_to'] = user.id
             except Exception:
@@ -523,6 +793,8 @@ class VehicleViewSet(VaultAccessMixin, viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         v = serializer.save(created_by=self.request.user)
+        if v.last_known_location:
+            tracking.record_location(self.request.user, v, v.last_known_location)
         log_action(self.request.user, f"Created vehicle '{v.make} {v.model}'", target=v)
 
     def update(self, request, *args, **kwargs):
@@ -548,6 +820,60 @@ class VehicleViewSet(VaultAccessMixin, viewsets.ModelViewSet):
             pass
         return super().destroy(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        previous = serializer.instance.last_known_location
+        v = serializer.save()
+        # A location typed into the record becomes a ping, so it lands in the history too
+        if v.last_known_location and v.last_known_location != previous:
+            tracking.record_location(self.request.user, v, v.last_known_location)
+
+    @action(detail=False, methods=['post'], url_path='pings')
+    def pings(self, request):
+        """Append location pings for any number of vehicles: {"pings": [{vehicle, recorded_at?, latitude?, longitude?, location?}, ...]}."""
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Send {"pings": [...]}.'}, status=status.HTTP_400_BAD_REQUEST)
+        gate = self._enforce_vault_access(request)
+        if gate is not None:
+            return gate
+        try:
+            summary, results = tracking.record(request.user, request.data.get('pings'))
+        except ingest.Rejected as e:
+            return Response({'error': str(e)}, status=e.status_code)
+        if summary['created']:
+            log_action(request.user, f"Recorded {summary['created']} vehicle location ping(s)", details={
+                'invalid': summary['invalid'], 'vehicles_moved': summary['vehicles_moved'],
+            })
+        return Response({**summary, 'results': results})
+
+    @action(detail=False, methods=['get'], url_path='positions')
+    def positions(self, request):
+        """Latest known position of every vehicle, newest first; ?since=<ISO time> drops stale ones."""
+        gate = self._enforce_vault_access(request)
+        if gate is not None:
+            return gate
+        try:
+            since = tracking.parse_time(request.query_params.get('since'))
+        except ValueError:
+            return Response({'error': 'since must be an ISO 8601 time'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(tracking.fleet(since))
+
+    @action(detail=True, methods=['get'], url_path='track')
+    def track(self, request, pk=None):
+        """Pings of one vehicle in time order for playback: ?since=&until=&limit=, then ?after=&after_id= for the next page."""
+        gate = self._enforce_vault_access(request)
+        if gate is not None:
+            return gate
+        vehicle = get_object_or_404(Vehicle, pk=pk)
+        params = request.query_params
+        try:
+            since, until, after = (tracking.parse_time(params.get(name)) for name in ('since', 'until', 'after'))
+            after_id = int(params.get('after_id') or 0)
+            limit = min(max(int(params.get('limit') or tracking.TRACK_LIMIT), 1), tracking.TRACK_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'since, until and after must be ISO 8601 times; after_id and limit integers'}, status=status.HTTP_400_BAD_REQUEST)
+        points, cursor = tracking.track(vehicle.pk, since, until, (after, after_id) if after else None, limit)
+        return Response({'vehicle': vehicle.pk, 'points': points, 'next': cursor})
+
 class VaultItemViewSet(viewsets.ModelViewSet):
     queryset = __import__('codex.models', fromlist=['VaultItem']).VaultItem.objects.select_related('created_by').all().order_by('-created_at')
     serializer_class = __import__('codex.serializers', fromlist=['VaultItemSerializer']).VaultItemSerializer
@@ -557,6 +883,10 @@ class VaultItemViewSet(viewsets.ModelViewSet):
         # Restrict to Protector or Heir
         return super().get_permissions()
 
+    def get_queryset(self):
+        # Sealed secrets are only loaded by `reveal`
+        return super().get_queryset().defer(*VaultItem.SEALED_FIELDS)
+
     def list(self, request, *args, **kwargs):
         role = get_user_role(request.user)
         if role not in ['PROTECTOR', 'HEIR', 'HQ']:
@@ -637,3 +967,35 @@ class VaultItemViewSet(viewsets.ModelViewSet):
         except Exception:
             pass
         return super().destroy(request, *args, **kwargs)
+
+    @action(detail=True, methods=['post'], url_path='reveal')
+    def reveal(self, request, pk=None):
+        """Decrypt and return one item's secret; every reveal is audited."""
+        gate = self._enforce_vault_access(request)
+        if gate is not None:
+            return gate
+        item = get_object_or_404(VaultItem, pk=pk)
+        try:
+            secret = vault.reveal(item)
+        except vault.VaultError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        log_action(request.user, f"Revealed secret of vault item '{item.name}'", target=item)
+        return Response({'id': item.id, 'secret': secret})
+
+    @action(detail=False, methods=['get'], url_path='lookup')
+    def lookup(self, request):
+        """Find vehicles, properties, profiles and Scales agents by plate, VIN or address.
+
+        Query params: q (required), kind=plate,vin,address (default: all).
+        """
+        gate = self._enforce_vault_access(request)
+        if gate is not None:
+            return gate
+        q = (request.query_params.get('q') or '').strip()
+        if not q:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [k.strip().lower() for k in (request.query_params.get('kind') or '').split(',') if k.strip()]
+        unknown = set(kinds) - {'plate', 'vin', 'address'}
+        if unknown:
+            return Response({'error': f"Unknown kind: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'query': q, 'results': lookup.search(q[:200], kinds or None)})
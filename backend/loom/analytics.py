@@ -0,0 +1,235 @@
+"""After-action analytics rollups.
+
+Outcome counts and durations per faction targeted, per agent, per month and
+overall, plus requisition outcomes and allocated time per asset, are kept in
+rollup tables. When an operation ends only the rows it contributes to are
+recomputed, each with one grouped aggregate query, so the analytics endpoint
+reads precomputed rows instead of scanning operation history. Recomputing a
+row from source (rather than adding deltas) keeps refreshes idempotent, so a
+retried task can never double count. `rebuild` recomputes everything. Faction
+and agent rows carry the name as a label, which is updated in place on rename.
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Sum, Min, Q, F, DurationField, ExpressionWrapper
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Operation, OutcomeRollup, AssetUtilizationRollup
+
+ENDED_STATUSES = ('CONCLUDED - SUCCESS', 'CONCLUDED - FAILURE', 'COMPROMISED')
+Dimension = OutcomeRollup.Dimension
+
+
+def _duration(prefix=''):
+    return ExpressionWrapper(F(f'{prefix}ended_at') - F(f'{prefix}started_at'), output_field=DurationField())
+
+
+def _outcome_aggregates():
+    timed = Q(started_at__isnull=False, ended_at__isnull=False)
+    return {
+        'total': Count('id', distinct=True),
+        'successes': Count('id', filter=Q(status='CONCLUDED - SUCCESS'), distinct=True),
+        'failures': Count('id', filter=Q(status='CONCLUDED - FAILURE'), distinct=True),
+        'compromised': Count('id', filter=Q(status='COMPROMISED'), distinct=True),
+        'timed': Count('id', filter=timed, distinct=True),
+        'duration': Sum(_duration(), filter=timed),
+    }
+
+
+def _ended(get_model=apps.get_model):
+    return get_model('loom.Operation').objects.filter(status__in=ENDED_STATUSES)
+
+
+def _row_values(agg):
+    duration = agg.get('duration')
+    return {
+        'total': agg['total'],
+        'successes': agg['successes'],
+        'failures': agg['failures'],
+        'compromised': agg['compromised'],
+        'timed': agg['timed'],
+        'duration_seconds': duration.total_seconds() if duration else 0.0,
+    }
+
+
+def _month_key(value):
+    return value.strftime('%Y-%m')
+
+
+def _grouped(dimension, keys=None, get_model=apps.get_model):
+    """{key: aggregates} for one dimension, optionally restricted to `keys`."""
+    aggregates = _outcome_aggregates()
+    if dimension == Dimension.OVERALL:
+        return {'all': _ended(get_model).aggregate(**aggregates)}
+    if dimension == Dimension.MONTH:
+        qs = _ended(get_model).filter(ended_at__isnull=False)
+        if keys is not None:
+            month_q = Q()
+            for key in keys:
+                year, month = (int(part) for part in key.split('-'))
+                month_q |= Q(ended_at__year=year, ended_at__month=month)
+            qs = qs.filter(month_q)
+        rows = qs.annotate(month=TruncMonth('ended_at')).values('month').annotate(**aggregates)
+        return {_month_key(r['month']): r for r in rows}
+    field = 'targets' if dimension == Dimension.FACTION else 'personnel'
+    # One filter() call so both conditions share a single join
+    if keys is None:
+        qs = _ended(get_model).filter(**{f'{field}__isnull': False})
+    else:
+        qs = _ended(get_model).filter(**{f'{field}__in': [int(k) for k in keys]})
+    return {str(r[field]): r for r in qs.values(field).annotate(**aggregates)}
+
+
+def _labels(dimension, keys, get_model=apps.get_model):
+    if dimension == Dimension.FACTION:
+        factions = get_model('scales.Faction')._base_manager
+        return {str(pk): name for pk, name in factions.filter(pk__in=keys).values_list('pk', 'name')}
+    if dimension == Dimension.AGENT:
+        agents = get_model('lineage.Agent')._base_manager
+        return {str(pk): alias or '' for pk, alias in agents.filter(pk__in=keys).values_list('pk', 'alias')}
+    if dimension == Dimension.OVERALL:
+        return {'all': 'All operations'}
+    return {key: key for key in keys}
+
+
+def refresh_outcomes(dimension, keys=None, get_model=apps.get_model):
+    """Recompute rollup rows of `dimension` for `keys` (every key when None)."""
+    rollup_model = get_model('loom.OutcomeRollup')
+    grouped = _grouped(dimension, keys, get_model)
+    wanted = set(grouped) if keys is None else {str(k) for k in keys}
+    labels = _labels(dimension, wanted, get_model)
+    with transaction.atomic():
+        stale = rollup_model.objects.filter(dimension=dimension)
+        if keys is not None:
+            stale = stale.filter(key__in=wanted)
+        stale.exclude(key__in=[k for k in wanted if grouped.get(k, {}).get('total')]).delete()
+        for key in wanted:
+            agg = grouped.get(key)
+            if not agg or not agg['total']:
+                continue
+            rollup_model.objects.update_or_create(
+                dimension=dimension, key=key,
+                defaults={'label': labels.get(key, ''), **_row_values(agg)},
+            )
+
+
+def refresh_assets(asset_ids=None, get_model=apps.get_model):
+    """Recompute utilization rows for the given assets (every asset with requisitions when None)."""
+    rollup_model = get_model('loom.AssetUtilizationRollup')
+    approved = Q(status='APPROVED')
+    served = approved & Q(operation__status__in=ENDED_STATUSES)
+    timed = served & Q(operation__started_at__isnull=False, operation__ended_at__isnull=False)
+    qs = get_model('loom.AssetRequisition').objects.all()
+    if asset_ids is not None:
+        qs = qs.filter(asset_id__in=asset_ids)
+    rows = qs.values('asset').annotate(
+        n_requisitions=Count('id'),
+        n_approved=Count('id', filter=approved),
+        n_denied=Count('id', filter=Q(status='DENIED')),
+        n_served=Count('operation', filter=served, distinct=True),
+        allocated=Sum(_duration('operation__'), filter=timed),
+        first_allocated=Min('operation__started_at', filter=approved),
+    )
+    with transaction.atomic():
+        seen = set()
+        for r in rows:
+            seen.add(r['asset'])
+            rollup_model.objects.update_or_create(
+                asset_id=r['asset'],
+                defaults={
+                    'requisitions': r['n_requisitions'],
+                    'approved': r['n_approved'],
+                    'denied': r['n_denied'],
+                    'operations_served': r['n_served'],
+                    'allocated_seconds': r['allocated'].total_seconds() if r['allocated'] else 0.0,
+                    'first_allocated_at': r['first_allocated'],
+                },
+            )
+        stale = rollup_model.objects.exclude(asset_id__in=seen)
+        if asset_ids is not None:
+            stale = stale.filter(asset_id__in=asset_ids)
+        stale.delete()
+
+
+def record_operation(operation_id):
+    """Refresh every rollup row an ended operation contributes to."""
+    op = Operation.objects.filter(pk=operation_id).first()
+    if op is None:
+        return
+    refresh_outcomes(Dimension.OVERALL)
+    faction_ids = list(op.targets.through.objects.filter(operation_id=op.pk).values_list('faction_id', flat=True))
+    if faction_ids:
+        refresh_outcomes(Dimension.FACTION, faction_ids)
+    agent_ids = list(op.personnel.through.objects.filter(operation_id=op.pk).values_list('agent_id', flat=True))
+    if agent_ids:
+        refresh_outcomes(Dimension.AGENT, agent_ids)
+    if op.ended_at:
+        refresh_outcomes(Dimension.MONTH, [_month_key(timezone.localtime(op.ended_at))])
+    asset_ids = list(op.requisitions.values_list('asset_id', flat=True).distinct())
+    if asset_ids:
+        refresh_assets(asset_ids)
+
+
+def rebuild(get_model=apps.get_model):
+    """Recompute every rollup row from history; `get_model` lets a data migration pass its historical models."""
+    for dimension in Dimension.values:
+        refresh_outcomes(dimension, get_model=get_model)
+    refresh_assets(get_model=get_model)
+
+
+def relabel(dimension, key, label):
+    """Update the label of one faction or agent row after a rename."""
+    return OutcomeRollup.objects.filter(dimension=dimension, key=str(key)).exclude(label=label or '').update(label=label or '')
+
+
+def _outcome_dict(row):
+    total = row.total or 0
+    return {
+        'key': row.key,
+        'label': row.label,
+        'total': total,
+        'successes': row.successes,
+        'failures': row.failures,
+        'compromised': row.compromised,
+        'success_rate': round(row.successes / total, 4) if total else None,
+        'failure_rate': round((row.failures + row.compromised) / total, 4) if total else None,
+        'mean_duration_seconds': round(row.duration_seconds / row.timed, 1) if row.timed else None,
+        'updated_at': row.updated_at,
+    }
+
+
+def _asset_dict(row, now):
+    span = (now - row.first_allocated_at).total_seconds() if row.first_allocated_at else 0
+    return {
+        'asset': row.asset_id,
+        'asset_name': row.asset.name,
+        'asset_type': row.asset.type,
+        'requisitions': row.requisitions,
+        'approved': row.approved,
+        'denied': row.denied,
+        'operations_served': row.operations_served,
+        'allocated_seconds': row.allocated_seconds,
+        # Share of time since the asset was first allocated that it spent on ended operations
+        'utilization': round(min(row.allocated_seconds / span, 1.0), 4) if span > 0 else None,
+        'updated_at': row.updated_at,
+    }
+
+
+def summary():
+    """The analytics payload, read entirely from rollup tables."""
+    grouped = {dimension: [] for dimension in Dimension.values}
+    for row in OutcomeRollup.objects.order_by('dimension', '-total', 'key'):
+        grouped[row.dimension].append(_outcome_dict(row))
+    now = timezone.now()
+    overall = grouped[Dimension.OVERALL]
+    return {
+        'overall': overall[0] if overall else None,
+        'factions': grouped[Dimension.FACTION],
+        'agents': grouped[Dimension.AGENT],
+        'months': sorted(grouped[Dimension.MONTH], key=lambda r: r['key']),
+        'assets': [
+            _asset_dict(row, now)
+            for row in AssetUtilizationRollup.objects.select_related('asset').order_by('-allocated_seconds')
+        ],
+    }
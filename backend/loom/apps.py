@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LoomConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'loom'
+
+    def ready(self):
+        # Import signals that keep dossiers, conflict indexes and log streams in sync
+        from . import signals  # noqa: F401
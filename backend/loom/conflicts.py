@@ -0,0 +1,246 @@
+"""Scheduling conflicts between open operations.
+
+Every agent and asset committed to an open (PLANNING/ACTIVE) operation gets an
+IntervalIndex over the windows of those operations. An operation's window runs
+from `started_at` (or `planned_start`) to `ended_at` (or `planned_end`); an
+operation without an end is treated as open-ended. Operations with no start at
+all are unscheduled and never conflict.
+
+The indexes are built in one pass over the database and kept per process. Any
+change to an operation's schedule, its personnel or its requisitions bumps the
+version in the SchedulingState row in the same transaction; each process reads
+that version (one primary-key lookup) and rebuilds once it moves, so every
+worker sees a write as soon as it commits, whatever cache backend is configured.
+"""
+import bisect
+import heapq
+import math
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import F
+
+from .models import Operation, AssetRequisition, SchedulingState
+
+OPEN_STATUSES = ('PLANNING', 'ACTIVE')
+# Requisitions that hold an asset for the operation's window
+HOLDING_STATUSES = ('PENDING', 'APPROVED')
+# Operation fields the indexes are built from
+SCHEDULING_FIELDS = ('codename', 'status', 'started_at', 'ended_at', 'planned_start', 'planned_end')
+INF = math.inf
+
+
+def _epoch(value):
+    return value.timestamp() if value else None
+
+
+def iso(ts):
+    if ts is None or ts == INF:
+        return None
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def window(started_at=None, ended_at=None, planned_start=None, planned_end=None):
+    """Return the (start, end) epoch window of an operation, or None if unscheduled."""
+    start = _epoch(started_at or planned_start)
+    if start is None:
+        return None
+    end = _epoch(ended_at or planned_end)
+    if end is None or end <= start:
+        end = INF
+    return start, end
+
+
+def booking_span(start, end):
+    """Epoch span of a reservation [start, end); None when the window is empty."""
+    t1 = start.timestamp()
+    t2 = end.timestamp() if end else INF
+    return (t1, t2) if t2 > t1 else None
+
+
+def operation_window(op):
+    return window(op.started_at, op.ended_at, op.planned_start, op.planned_end)
+
+
+class IntervalIndex:
+    """Static index of half-open intervals [start, end) tagged with a key.
+
+    Intervals are sorted by start and a segment tree keeps the maximum end of
+    every range, so "is [t1, t2) free" is a binary search plus an O(log n) range
+    maximum, and listing overlaps costs O(log n) per reported interval.
+    """
+
+    def __init__(self, intervals):
+        self.items = sorted(intervals, key=lambda it: (it[0], it[1]))
+        self.starts = [it[0] for it in self.items]
+        size = 1
+        while size < len(self.items):
+            size *= 2
+        self.size = size
+        tree = [-INF] * (2 * size)
+        for i, (_, end, _) in enumerate(self.items):
+            tree[size + i] = end
+        for i in range(size - 1, 0, -1):
+            tree[i] = max(tree[2 * i], tree[2 * i + 1])
+        self.tree = tree
+
+    def __len__(self):
+        return len(self.items)
+
+    def _max_end(self, lo, hi):
+        """Maximum end among items[lo:hi]."""
+        best = -INF
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                best = max(best, self.tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = max(best, self.tree[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+    def is_free(self, t1, t2):
+        # Only intervals starting before t2 can overlap; of those, one must end after t1
+        candidates = bisect.bisect_left(self.starts, t2)
+        return self._max_end(0, candidates) <= t1
+
+    def overlapping(self, t1, t2):
+        """Intervals overlapping [t1, t2), in start order."""
+        limit = bisect.bisect_left(self.starts, t2)
+        found = []
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self.tree[node] <= t1:
+                continue
+            if hi - lo == 1:
+                found.append(self.items[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return found
+
+    def overlapping_pairs(self):
+        """Every pair of overlapping intervals, found with one sweep over start order."""
+        pairs = []
+        running = []  # heap of (end, position) for intervals still open at the sweep line
+        for pos, (start, end, key) in enumerate(self.items):
+            while running and running[0][0] <= start:
+                heapq.heappop(running)
+            for _, other in running:
+                pairs.append((self.items[other], self.items[pos]))
+            heapq.heappush(running, (end, pos))
+        return pairs
+
+
+class ConflictEngine:
+    """Interval indexes of open operations per agent and per asset."""
+
+    def __init__(self):
+        self.operations = {}
+        for row in Operation.objects.filter(status__in=OPEN_STATUSES).values(
+            'id', 'codename', 'status', 'started_at', 'ended_at', 'planned_start', 'planned_end'
+        ):
+            span = window(row['started_at'], row['ended_at'], row['planned_start'], row['planned_end'])
+            if span is not None:
+                self.operations[row['id']] = {
+                    'id': row['id'], 'codename': row['codename'], 'status': row['status'], 'window': span,
+                }
+
+        personnel = Operation.personnel.through.objects.filter(
+            operation__status__in=OPEN_STATUSES
+        ).values_list('agent_id', 'operation_id')
+        holds = []
+        for asset_id, op_id, start, end in AssetRequisition.objects.filter(
+            operation__status__in=OPEN_STATUSES, status__in=HOLDING_STATUSES
+        ).values_list('asset_id', 'operation_id', 'reserved_from', 'reserved_until'):
+            # Asset holds use the requisition's own booking window when it has one
+            span = booking_span(start, end) if start else None
+            if start is None or span is not None:
+                holds.append((asset_id, op_id, span))
+        self.agents = self._build((agent_id, op_id, None) for agent_id, op_id in personnel)
+        self.assets = self._build(holds)
+        self.conflicts = {
+            'personnel': self._pairs(self.agents, 'agent_id'),
+            'assets': self._pairs(self.assets, 'asset_id'),
+        }
+
+    def _build(self, rows):
+        grouped = {}
+        for resource_id, op_id, span in rows:
+            op = self.operations.get(op_id)
+            if op is not None:
+                start, end = span or op['window']
+                grouped.setdefault(resource_id, []).append((start, end, op_id))
+        return {resource_id: IntervalIndex(spans) for resource_id, spans in grouped.items()}
+
+    def _summary(self, op_id):
+        op = self.operations[op_id]
+        start, end = op['window']
+        return {
+            'id': op['id'], 'codename': op['codename'], 'status': op['status'],
+            'window_start': iso(start), 'window_end': iso(end),
+        }
+
+    def _pairs(self, indexes, label):
+        conflicts = []
+        for resource_id, index in indexes.items():
+            for a, b in index.overlapping_pairs():
+                conflicts.append({
+                    label: resource_id,
+                    'operations': [self._summary(a[2]), self._summary(b[2])],
+                    'overlap_start': iso(max(a[0], b[0])),
+                    'overlap_end': iso(min(a[1], b[1])),
+                })
+        return conflicts
+
+    def _index(self, kind):
+        return self.agents if kind == 'agent' else self.assets
+
+    def is_free(self, kind, resource_id, t1, t2):
+        index = self._index(kind).get(resource_id)
+        return index is None or index.is_free(t1, t2)
+
+    def overlapping(self, kind, resource_id, t1, t2, exclude_operation=None):
+        index = self._index(kind).get(resource_id)
+        if index is None:
+            return []
+        return [
+            self._summary(key) for _, _, key in index.overlapping(t1, t2)
+            if key != exclude_operation
+        ]
+
+
+_engine = None
+_engine_version = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-local engine, rebuilt when a committed write has bumped the version."""
+    global _engine, _engine_version
+    version = SchedulingState.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+    with _engine_lock:
+        if _engine is None or _engine_version != version:
+            _engine = ConflictEngine()
+            _engine_version = version
+        return _engine
+
+
+def invalidate():
+    """Bump the schedule version in the current transaction; every process rebuilds once it commits."""
+    if not SchedulingState.objects.filter(pk=1).update(version=F('version') + 1):
+        SchedulingState.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+def conflicts_for(operation, kind, resource_id, span=None):
+    """Open operations that overlap `span` (default: `operation`'s window) and also hold the agent/asset."""
+    span = span or operation_window(operation)
+    if span is None:
+        return []
+    return get_engine().overlapping(kind, int(resource_id), span[0], span[1], exclude_operation=operation.pk)
@@ -0,0 +1,197 @@
+"""Operation dossier read model.
+
+The detail view of an operation is served from a precomputed JSON document
+(OperationDossier) that is cached and rebuilt section by section: a new log entry
+only rebuilds `logs`, editing a faction only rebuilds `targets` of the operations
+targeting it, and so on. Signals mark sections dirty and enqueue a background
+refresh; a read that finds dirty sections repairs them inline, so responses are
+never stale.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from rest_framework import serializers
+
+from api.tasks import enqueue
+from .models import Operation, OperationLog, AssetRequisition, OperationDossier
+
+SECTIONS = ('core', 'targets', 'personnel', 'contingencies', 'requisitions', 'logs')
+# Sections whose own endpoints are leadership-only; the cached document keeps them for everyone
+RESTRICTED_SECTIONS = ('requisitions', 'logs')
+LATEST_LOGS = 20
+CACHE_TTL = 600
+
+_dt = serializers.DateTimeField()
+
+
+def _ts(value):
+    return _dt.to_representation(value) if value else None
+
+
+def cache_key(operation_id):
+    return f"loom:dossier:{operation_id}"
+
+
+def _build_core(op):
+    return {
+        'id': op.id,
+        'codename': op.codename,
+        'objective': op.objective,
+        'status': op.status,
+        'success_probability': op.success_probability,
+        'collateral_risk': op.collateral_risk,
+        'assets': op.assets,
+        'after_action_report': op.after_action_report,
+        'created_at': _ts(op.created_at),
+        'updated_at': _ts(op.updated_at),
+        'planned_start': _ts(op.planned_start),
+        'planned_end': _ts(op.planned_end),
+        'started_at': _ts(op.started_at),
+        'ended_at': _ts(op.ended_at),
+    }
+
+
+def _build_targets(op):
+    factions = op.targets.annotate(
+        n_members=Count('members', filter=Q(members__deleted_at__isnull=True))
+    ).order_by('name')
+    return [
+        {
+            'id': f.id,
+            'name': f.name,
+            'threat_index': f.threat_index,
+            'is_active': f.is_active,
+            'picture_url': f.picture_url,
+            'member_count': f.n_members,
+        }
+        for f in factions
+    ]
+
+
+def _build_personnel(op):
+    return [
+        {
+            'id': a.id,
+            'alias': a.alias,
+            'status': a.status,
+            'key_skill': a.key_skill,
+            'picture_url': a.picture_url,
+        }
+        for a in op.personnel.order_by('alias')
+    ]
+
+
+def _build_contingencies(op):
+    return [
+        {'id': e.id, 'title': e.title, 'entry_type': e.entry_type, 'summary': e.summary}
+        for e in op.contingencies.order_by('title')
+    ]
+
+
+def _build_requisitions(op):
+    qs = AssetRequisition.objects.filter(operation=op).select_related('asset', 'requested_by').order_by('-created_at')
+    return [
+        {
+            'id': r.id,
+            'asset': r.asset_id,
+            'asset_name': r.asset.name,
+            'asset_type': r.asset.type,
+            'status': r.status,
+            'requested_by_username': getattr(r.requested_by, 'username', None),
+            'decided_at': _ts(r.decided_at),
+            'reserved_from': _ts(r.reserved_from),
+            'reserved_until': _ts(r.reserved_until),
+        }
+        for r in qs
+    ]
+
+
+def _build_logs(op):
+    latest = OperationLog.objects.filter(operation=op).select_related('user').order_by('-id')[:LATEST_LOGS]
+    return {
+        'total': OperationLog.objects.filter(operation=op).count(),
+        'latest': [
+            {
+                'id': log.id,
+                'user_username': getattr(log.user, 'username', None),
+                'message': log.message,
+                'timestamp': _ts(log.timestamp),
+            }
+            for log in latest
+        ],
+    }
+
+
+_BUILDERS = {
+    'core': _build_core,
+    'targets': _build_targets,
+    'personnel': _build_personnel,
+    'contingencies': _build_contingencies,
+    'requisitions': _build_requisitions,
+    'logs': _build_logs,
+}
+
+
+def _render(document):
+    data = dict(document.get('core', {}))
+    for section in SECTIONS[1:]:
+        data[section] = document.get(section)
+    return data
+
+
+def refresh(operation_id, sections=SECTIONS):
+    """Rebuild `sections` (plus anything already marked dirty) and re-cache the dossier."""
+    with transaction.atomic():
+        op = Operation.objects.filter(pk=operation_id).first()
+        if op is None:
+            cache.delete(cache_key(operation_id))
+            return None
+        dossier, created = OperationDossier.objects.select_for_update().get_or_create(operation=op)
+        todo = set(SECTIONS) if created else set(sections) | set(dossier.dirty_sections)
+        document = dict(dossier.document)
+        for section in SECTIONS:
+            if section in todo or section not in document:
+                document[section] = _BUILDERS[section](op)
+        dossier.document = document
+        dossier.dirty_sections = []
+        dossier.save(update_fields=['document', 'dirty_sections', 'built_at'])
+    data = _render(document)
+    cache.set(cache_key(operation_id), data, CACHE_TTL)
+    return data
+
+
+def get_dossier(operation_id):
+    """Cache → materialized row → build; dirty sections are repaired before returning."""
+    data = cache.get(cache_key(operation_id))
+    if data is not None:
+        return data
+    dossier = OperationDossier.objects.filter(pk=operation_id).first()
+    if dossier is None or dossier.dirty_sections or any(s not in dossier.document for s in SECTIONS):
+        return refresh(operation_id, dossier.dirty_sections if dossier else SECTIONS)
+    data = _render(dossier.document)
+    cache.set(cache_key(operation_id), data, CACHE_TTL)
+    return data
+
+
+def redact(data):
+    """The dossier as seen by a caller who may not read operation logs or requisitions."""
+    return {**data, **{section: None for section in RESTRICTED_SECTIONS}}
+
+
+def mark_dirty(operation_ids, sections):
+    """Flag sections of the given operations as stale and schedule their rebuild."""
+    operation_ids = sorted({int(i) for i in operation_ids if i is not None})
+    if not operation_ids:
+        return
+    sections = sorted(set(sections))
+    with transaction.atomic():
+        for dossier in OperationDossier.objects.select_for_update().filter(pk__in=operation_ids):
+            merged = sorted(set(dossier.dirty_sections) | set(sections))
+            if merged != dossier.dirty_sections:
+                dossier.dirty_sections = merged
+                dossier.save(update_fields=['dirty_sections'])
+    keys = [cache_key(i) for i in operation_ids]
+    cache.delete_many(keys)
+    # Drop again after commit in case a concurrent read re-cached the old document
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    enqueue('loom.refresh_dossiers', {'operation_ids': operation_ids, 'sections': sections})
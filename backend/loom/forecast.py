@@ -0,0 +1,262 @@
+"""Historical success model for operation planning.
+
+A regularised logistic regression fitted on concluded operations. Inputs per
+operation are the target factions' threat indexes, personnel count and skills,
+collateral risk and duration (actual once run, planned before). Fitting is a
+vectorised Newton (IRLS) solve over the whole design matrix. It runs on the task
+queue, once per burst of conclusions (see loom.tasks.REFIT_DELAY), and
+warm-starts from the previous coefficients, so it usually converges in one or
+two iterations.
+
+Predictions are stored per operation together with a hash of the inputs they
+were computed from. They are recomputed in the background when the model or an
+operation's inputs change; reading an estimate never writes.
+"""
+import hashlib
+import json
+import math
+from collections import Counter
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Operation, SuccessModel, SuccessPrediction
+
+SUCCESS_STATUS = 'CONCLUDED - SUCCESS'
+FAILURE_STATUSES = ('CONCLUDED - FAILURE', 'COMPROMISED')
+MIN_SAMPLES = 10
+MAX_SKILLS = 12
+L2_PENALTY = 1.0
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+KEEP_MODELS = 5
+
+BASE_FEATURES = [
+    'threat_mean', 'threat_max', 'target_count', 'personnel_count',
+    'risk_low', 'risk_high', 'duration', 'duration_known',
+]
+
+
+def _skills(key_skill):
+    return sorted({s.strip().lower() for s in (key_skill or '').split(',') if s.strip()})
+
+
+def _duration_days(row):
+    if row['started_at'] and row['ended_at']:
+        delta = row['ended_at'] - row['started_at']
+    elif row['planned_start'] and row['planned_end']:
+        delta = row['planned_end'] - row['planned_start']
+    else:
+        return None
+    return max(delta.total_seconds(), 0) / 86400
+
+
+def collect_inputs(operations):
+    """Raw model inputs for the given operations (a queryset), keyed by id; three queries."""
+    rows = operations.values('id', 'status', 'collateral_risk', 'started_at', 'ended_at', 'planned_start', 'planned_end')
+    inputs = {
+        r['id']: {
+            'status': r['status'],
+            'risk': r['collateral_risk'],
+            'duration_days': _duration_days(r),
+            'threats': [],
+            'skills': [],
+        }
+        for r in rows
+    }
+    if not inputs:
+        return inputs
+    ids = list(inputs)
+    for op_id, threat in Operation.targets.through.objects.filter(operation_id__in=ids).values_list(
+        'operation_id', 'faction__threat_index'
+    ):
+        inputs[op_id]['threats'].append(threat or 0)
+    for op_id, key_skill in Operation.personnel.through.objects.filter(operation_id__in=ids).values_list(
+        'operation_id', 'agent__key_skill'
+    ):
+        inputs[op_id]['skills'].append(_skills(key_skill))
+    for raw in inputs.values():
+        raw['threats'].sort()
+        raw['skills'].sort()
+    return inputs
+
+
+def input_hash(raw):
+    """Fingerprint of everything a prediction depends on (status excluded)."""
+    payload = {k: v for k, v in raw.items() if k != 'status'}
+    if payload['duration_days'] is not None:
+        payload['duration_days'] = round(payload['duration_days'], 4)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _raw_features(raws, vocabulary, duration_fill):
+    """Unscaled feature matrix, one row per raw input."""
+    width = len(BASE_FEATURES) + len(vocabulary)
+    X = np.zeros((len(raws), width))
+    slot = {skill: len(BASE_FEATURES) + i for i, skill in enumerate(vocabulary)}
+    for i, raw in enumerate(raws):
+        threats = raw['threats']
+        if threats:
+            X[i, 0] = sum(threats) / len(threats) / 100
+            X[i, 1] = max(threats) / 100
+        X[i, 2] = math.log1p(len(threats))
+        X[i, 3] = math.log1p(len(raw['skills']))
+        X[i, 4] = raw['risk'] == 'LOW'
+        X[i, 5] = raw['risk'] == 'HIGH'
+        days = raw['duration_days']
+        X[i, 6] = math.log1p(days) if days is not None else duration_fill
+        X[i, 7] = days is not None
+        if raw['skills']:
+            share = 1 / len(raw['skills'])
+            for agent_skills in raw['skills']:
+                for skill in agent_skills:
+                    if skill in slot:
+                        X[i, slot[skill]] += share
+    return X
+
+
+def _design(raws, params):
+    X = _raw_features(raws, params['vocabulary'], params['duration_fill'])
+    X = (X - np.asarray(params['mean'])) / np.asarray(params['scale'])
+    return np.hstack([np.ones((len(raws), 1)), X])
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-np.clip(z, -35, 35)))
+
+
+def _irls(X, y, w):
+    """Newton iterations for L2-penalised logistic regression (intercept unpenalised)."""
+    penalty = np.full(X.shape[1], L2_PENALTY)
+    penalty[0] = 0
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        p = _sigmoid(X @ w)
+        gradient = X.T @ (p - y) + penalty * w
+        hessian = (X.T * (p * (1 - p))) @ X + np.diag(penalty) + 1e-9 * np.eye(X.shape[1])
+        step = np.linalg.solve(hessian, gradient)
+        w = w - step
+        if np.max(np.abs(step)) < TOLERANCE:
+            break
+    return w, iteration
+
+
+def current_model():
+    return SuccessModel.objects.first()
+
+
+def fit(warm_start=True):
+    """Fit on every concluded operation; returns the new SuccessModel or None if data is too thin."""
+    training = Operation.objects.filter(status__in=(SUCCESS_STATUS,) + FAILURE_STATUSES)
+    inputs = collect_inputs(training)
+    if len(inputs) < MIN_SAMPLES:
+        return None
+    raws = list(inputs.values())
+    y = np.array([raw['status'] == SUCCESS_STATUS for raw in raws], dtype=float)
+    if y.min() == y.max():
+        return None
+
+    skill_counts = Counter(skill for raw in raws for agent_skills in raw['skills'] for skill in agent_skills)
+    vocabulary = sorted(skill for skill, _ in skill_counts.most_common(MAX_SKILLS))
+    known = [math.log1p(raw['duration_days']) for raw in raws if raw['duration_days'] is not None]
+    duration_fill = sum(known) / len(known) if known else 0.0
+    unscaled = _raw_features(raws, vocabulary, duration_fill)
+    scale = unscaled.std(axis=0)
+    scale[scale < 1e-6] = 1.0  # constant columns carry no signal
+    params = {
+        'vocabulary': vocabulary,
+        'duration_fill': duration_fill,
+        'mean': unscaled.mean(axis=0).tolist(),
+        'scale': scale.tolist(),
+    }
+    feature_names = ['intercept'] + BASE_FEATURES + [f'skill:{s}' for s in vocabulary]
+    X = _design(raws, params)
+
+    previous = current_model() if warm_start else None
+    if previous is not None and previous.feature_names == feature_names:
+        w0 = np.asarray(previous.coefficients, dtype=float)
+    else:
+        w0 = np.zeros(X.shape[1])
+    w, iterations = _irls(X, y, w0)
+
+    p = _sigmoid(X @ w)
+    eps = 1e-12
+    metrics = {
+        'log_loss': float(-np.mean(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps))),
+        'accuracy': float(np.mean((p >= 0.5) == (y == 1))),
+        'success_rate': float(y.mean()),
+        'iterations': iterations,
+        'warm_start': bool(np.any(w0)),
+    }
+    model = SuccessModel.objects.create(
+        coefficients=w.tolist(), feature_names=feature_names, parameters=params,
+        n_samples=len(raws), metrics=metrics,
+    )
+    # Older fits (and the predictions made with them) are stale now
+    SuccessModel.objects.filter(pk__lt=model.pk).exclude(
+        pk__in=list(SuccessModel.objects.values_list('pk', flat=True)[:KEEP_MODELS])
+    ).delete()
+    return model
+
+
+def _store(model, op_id, digest, probability):
+    SuccessPrediction.objects.update_or_create(
+        operation_id=op_id,
+        defaults={'model': model, 'input_hash': digest, 'probability': probability},
+    )
+
+
+def _as_dict(operation_id, probability, computed_at, model, cached):
+    return {
+        'operation': operation_id,
+        'probability': round(probability, 4),
+        'percent': round(probability * 100),
+        'model': model.pk,
+        'n_samples': model.n_samples,
+        'computed_at': computed_at,
+        'cached': cached,
+    }
+
+
+def predict(operation):
+    """Prediction for one operation, or None until a model has been fitted.
+
+    Returns the stored prediction when it matches the current model and inputs.
+    Otherwise (its refresh task has not run yet) the estimate is computed for
+    this response only; storing it is left to the refresh.
+    """
+    model = current_model()
+    if model is None:
+        return None
+    raw = collect_inputs(Operation.objects.filter(pk=operation.pk))[operation.pk]
+    digest = input_hash(raw)
+    stored = SuccessPrediction.objects.filter(pk=operation.pk).first()
+    if stored is not None and stored.model_id == model.pk and stored.input_hash == digest:
+        return _as_dict(stored.operation_id, stored.probability, stored.computed_at, model, cached=True)
+    X = _design([raw], model.parameters)
+    probability = float(_sigmoid(X @ np.asarray(model.coefficients))[0])
+    return _as_dict(operation.pk, probability, timezone.now(), model, cached=False)
+
+
+def refresh_predictions(operations=None):
+    """Recompute stale predictions for (by default) every PLANNING operation in one batch."""
+    model = current_model()
+    if model is None:
+        return 0
+    operations = operations if operations is not None else Operation.objects.filter(status='PLANNING')
+    inputs = collect_inputs(operations)
+    stored = {
+        p.operation_id: (p.model_id, p.input_hash)
+        for p in SuccessPrediction.objects.filter(operation_id__in=list(inputs))
+    }
+    stale = []
+    for op_id, raw in inputs.items():
+        digest = input_hash(raw)
+        if stored.get(op_id) != (model.pk, digest):
+            stale.append((op_id, digest, raw))
+    if not stale:
+        return 0
+    X = _design([raw for _, _, raw in stale], model.parameters)
+    probabilities = _sigmoid(X @ np.asarray(model.coefficients))
+    for (op_id, digest, _), probability in zip(stale, probabilities):
+        _store(model, op_id, digest, float(probability))
+    return len(stale)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from loom import forecast
+
+
+class Command(BaseCommand):
+    help = "Fits the operation success model on concluded operations and refreshes planning estimates."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cold', action='store_true', help='Fit from zero instead of warm-starting.')
+
+    def handle(self, *args, **options):
+        model = forecast.fit(warm_start=not options['cold'])
+        if model is None:
+            self.stdout.write(self.style.WARNING(
+                f'Not enough concluded operations with both outcomes (need {forecast.MIN_SAMPLES}).'
+            ))
+            return
+        refreshed = forecast.refresh_predictions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Fitted model #{model.pk} on {model.n_samples} operations '
+            f"(log loss {model.metrics['log_loss']:.3f}); refreshed {refreshed} predictions."
+        ))
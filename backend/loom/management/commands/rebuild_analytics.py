@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from loom import analytics
+from loom.models import OutcomeRollup, AssetUtilizationRollup
+
+
+class Command(BaseCommand):
+    help = "Recomputes every after-action analytics rollup from operation history."
+
+    def handle(self, *args, **options):
+        analytics.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {OutcomeRollup.objects.count()} outcome rows and '
+            f'{AssetUtilizationRollup.objects.count()} asset rows.'
+        ))
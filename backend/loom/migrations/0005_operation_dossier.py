@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0004_operation_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationDossier',
+            fields=[
+                ('operation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dossier', serialize=False, to='loom.operation')),
+                ('document', models.JSONField(blank=True, default=dict)),
+                ('dirty_sections', models.JSONField(blank=True, default=list)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
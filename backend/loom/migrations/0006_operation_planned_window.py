@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0005_operation_dossier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operation',
+            name='planned_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='operation',
+            name='planned_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0006_operation_planned_window'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuccessModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coefficients', models.JSONField(default=list)),
+                ('feature_names', models.JSONField(default=list)),
+                ('parameters', models.JSONField(default=dict)),
+                ('n_samples', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SuccessPrediction',
+            fields=[
+                ('operation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='success_prediction', serialize=False, to='loom.operation')),
+                ('input_hash', models.CharField(max_length=64)),
+                ('probability', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='loom.successmodel')),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0007_success_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetUtilizationRollup',
+            fields=[
+                ('asset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='utilization', serialize=False, to='loom.asset')),
+                ('requisitions', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('denied', models.PositiveIntegerField(default=0)),
+                ('operations_served', models.PositiveIntegerField(default=0)),
+                ('allocated_seconds', models.FloatField(default=0)),
+                ('first_allocated_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OutcomeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('OVERALL', 'Overall'), ('FACTION', 'Faction targeted'), ('AGENT', 'Agent assigned'), ('MONTH', 'Month ended')], max_length=10)),
+                ('key', models.CharField(max_length=32)),
+                ('label', models.CharField(blank=True, max_length=150)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('successes', models.PositiveIntegerField(default=0)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('compromised', models.PositiveIntegerField(default=0)),
+                ('timed', models.PositiveIntegerField(default=0)),
+                ('duration_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='loom_outcome_rollup_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_windows(apps, schema_editor):
+    """Existing requisitions book the asset from their operation's start (or creation) to its end."""
+    AssetRequisition = apps.get_model('loom', 'AssetRequisition')
+    Operation = apps.get_model('loom', 'Operation')
+    op = Operation.objects.filter(pk=OuterRef('operation_id'))
+    AssetRequisition.objects.update(
+        reserved_from=Coalesce(Subquery(op.values('started_at')[:1]), 'created_at'),
+        reserved_until=Subquery(op.values('ended_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0008_analytics_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetrequisition',
+            name='reserved_from',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='assetrequisition',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assetrequisition',
+            index=models.Index(fields=['asset', 'status', 'reserved_from'], name='loom_req_calendar_idx'),
+        ),
+        migrations.RunPython(backfill_windows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0009_asset_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operationlog',
+            index=models.Index(fields=['operation', 'id'], name='loom_oplog_tail_idx'),
+        ),
+    ]
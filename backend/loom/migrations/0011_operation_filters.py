@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codex', '0017_user_counters'),
+        ('lineage', '0008_agent_order_index'),
+        ('loom', '0010_operation_log_tail_index'),
+        ('scales', '0009_agent_surveillance_images_faction_picture_url'),
+    ]
+
+    operations = [
+        # The through tables already exist (auto-created by the M2M fields); only
+        # the migration state changes, so no table is rebuilt.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='OperationAssignment',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='lineage.agent')),
+                        ('operation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='loom.operation')),
+                    ],
+                    options={
+                        'db_table': 'loom_operation_personnel',
+                        'unique_together': {('operation', 'agent')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='operation',
+                    name='personnel',
+                    field=models.ManyToManyField(blank=True, related_name='operations', through='loom.OperationAssignment', to='lineage.agent'),
+                ),
+                migrations.CreateModel(
+                    name='OperationTarget',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('faction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='scales.faction')),
+                        ('operation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='loom.operation')),
+                    ],
+                    options={
+                        'db_table': 'loom_operation_targets',
+                        'unique_together': {('operation', 'faction')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='operation',
+                    name='targets',
+                    field=models.ManyToManyField(blank=True, related_name='operations', through='loom.OperationTarget', to='scales.faction'),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['status', '-created_at'], name='loom_op_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['started_at'], name='loom_op_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operation',
+            index=models.Index(fields=['collateral_risk', 'success_probability'], name='loom_op_risk_prob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationassignment',
+            index=models.Index(fields=['agent', 'operation'], name='loom_opassign_agent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operationtarget',
+            index=models.Index(fields=['faction', 'operation'], name='loom_optarget_faction_idx'),
+        ),
+    ]
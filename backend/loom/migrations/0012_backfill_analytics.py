@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def roll_up_history(apps, schema_editor):
+    from loom import analytics
+    analytics.rebuild(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0011_operation_filters'),
+        ('lineage', '0008_agent_order_index'),
+        ('scales', '0010_history_capture_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(roll_up_history, migrations.RunPython.noop),
+    ]
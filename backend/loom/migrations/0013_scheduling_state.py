@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+def create_state(apps, schema_editor):
+    apps.get_model('loom', 'SchedulingState').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loom', '0012_backfill_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_state, migrations.RunPython.noop),
+    ]
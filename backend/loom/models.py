@@ -26,8 +26,8 @@ class Operation(models.Model):
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='PLANNING')
     
     # Relationships
-    targets = models.ManyToManyField(Faction, related_name='operations', blank=True)
-    personnel = models.ManyToManyField(Agent, related_name='operations', blank=True)
+    targets = models.ManyToManyField(Faction, related_name='operations', blank=True, through='OperationTarget')
+    personnel = models.ManyToManyField(Agent, related_name='operations', blank=True, through='OperationAssignment')
     contingencies = models.ManyToManyField(CodexEntry, related_name='operations', blank=True)
     assets = models.TextField(blank=True, help_text="Placeholder for assets from The Vault.")
 
@@ -41,11 +41,44 @@ class Operation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     started_at = models.DateTimeField(null=True, blank=True)
     ended_at = models.DateTimeField(null=True, blank=True)
+    planned_start = models.DateTimeField(null=True, blank=True)
+    planned_end = models.DateTimeField(null=True, blank=True)
     after_action_report = models.TextField(blank=True)
 
     def __str__(self):
         return self.codename
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='loom_op_status_created_idx'),
+            models.Index(fields=['started_at'], name='loom_op_started_idx'),
+            models.Index(fields=['collateral_risk', 'success_probability'], name='loom_op_risk_prob_idx'),
+        ]
+
+# Explicit through models for Operation's M2M links (same tables as the former
+# auto-created ones) so the reverse lookups used by filters can be indexed.
+class OperationTarget(models.Model):
+    operation = models.ForeignKey(Operation, on_delete=models.CASCADE)
+    faction = models.ForeignKey(Faction, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'loom_operation_targets'
+        unique_together = ('operation', 'faction')
+        indexes = [
+            models.Index(fields=['faction', 'operation'], name='loom_optarget_faction_idx'),
+        ]
+
+class OperationAssignment(models.Model):
+    operation = models.ForeignKey(Operation, on_delete=models.CASCADE)
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'loom_operation_personnel'
+        unique_together = ('operation', 'agent')
+        indexes = [
+            models.Index(fields=['agent', 'operation'], name='loom_opassign_agent_idx'),
+        ]
+
 class OperationLog(models.Model):
     operation = models.ForeignKey(Operation, on_delete=models.CASCADE, related_name='logs')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -54,6 +87,10 @@ class OperationLog(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Cursor reads: WHERE operation_id = ? AND id > ? ORDER BY id
+            models.Index(fields=['operation', 'id'], name='loom_oplog_tail_idx'),
+        ]
 
     def __str__(self):
         return f"Log for {self.operation.codename} at {self.timestamp}"
@@ -85,9 +122,106 @@ class AssetRequisition(models.Model):
     decided_at = models.DateTimeField(null=True, blank=True)
     note = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Booking window on the asset's calendar; an empty end means "until the operation ends"
+    reserved_from = models.DateTimeField(null=True, blank=True)
+    reserved_until = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('operation', 'asset')
+        indexes = [
+            models.Index(fields=['asset', 'status', 'reserved_from'], name='loom_req_calendar_idx'),
+        ]
 
     def __str__(self):
         return f"{self.asset} for {self.operation} [{self.status}]"
+
+class OperationDossier(models.Model):
+    """Materialized read model for the operation detail view.
+
+    `document` holds one JSON section per input (core, targets, personnel,
+    contingencies, requisitions, logs); `dirty_sections` lists sections whose
+    inputs changed and are waiting to be rebuilt.
+    """
+    operation = models.OneToOneField(Operation, on_delete=models.CASCADE, primary_key=True, related_name='dossier')
+    document = models.JSONField(default=dict, blank=True)
+    dirty_sections = models.JSONField(default=list, blank=True)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dossier for {self.operation_id}"
+
+class SchedulingState(models.Model):
+    """Singleton row versioning the schedules of open operations (see loom.conflicts)."""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"SchedulingState(version={self.version})"
+
+class SuccessModel(models.Model):
+    """A fitted outcome model; the most recent row is the one used for predictions."""
+    coefficients = models.JSONField(default=list)
+    feature_names = models.JSONField(default=list)
+    # Feature scaling and skill vocabulary captured at fit time
+    parameters = models.JSONField(default=dict)
+    n_samples = models.PositiveIntegerField(default=0)
+    metrics = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Success model #{self.pk} ({self.n_samples} operations)"
+
+class SuccessPrediction(models.Model):
+    """Cached prediction for an operation, valid while `model` and `input_hash` still match."""
+    operation = models.OneToOneField(Operation, on_delete=models.CASCADE, primary_key=True, related_name='success_prediction')
+    model = models.ForeignKey(SuccessModel, on_delete=models.CASCADE, related_name='predictions')
+    input_hash = models.CharField(max_length=64)
+    probability = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.operation_id}: {self.probability:.2f}"
+
+class OutcomeRollup(models.Model):
+    """Precomputed outcome counts and durations of ended operations along one dimension."""
+    class Dimension(models.TextChoices):
+        OVERALL = 'OVERALL', 'Overall'
+        FACTION = 'FACTION', 'Faction targeted'
+        AGENT = 'AGENT', 'Agent assigned'
+        MONTH = 'MONTH', 'Month ended'
+
+    dimension = models.CharField(max_length=10, choices=Dimension.choices)
+    key = models.CharField(max_length=32)  # faction/agent id, 'YYYY-MM' or 'all'
+    label = models.CharField(max_length=150, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    successes = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    compromised = models.PositiveIntegerField(default=0)
+    timed = models.PositiveIntegerField(default=0)  # operations with both start and end recorded
+    duration_seconds = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='loom_outcome_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}"
+
+class AssetUtilizationRollup(models.Model):
+    """Precomputed requisition outcomes and allocated time per asset."""
+    asset = models.OneToOneField(Asset, on_delete=models.CASCADE, primary_key=True, related_name='utilization')
+    requisitions = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    denied = models.PositiveIntegerField(default=0)
+    operations_served = models.PositiveIntegerField(default=0)
+    allocated_seconds = models.FloatField(default=0)
+    first_allocated_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Utilization of {self.asset_id}"
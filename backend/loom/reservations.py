@@ -0,0 +1,224 @@
+"""Time-windowed asset reservations.
+
+Every requisition books its asset for [reserved_from, reserved_until); an empty
+end means the booking runs until the operation ends. Approved bookings of an
+asset form its calendar. Decisions lock the asset rows, so approvals of the same
+asset are serialised and an overlapping booking can never be approved twice.
+`Asset.status` mirrors the calendar: ALLOCATED while an approved booking covers
+the current time.
+"""
+import bisect
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .conflicts import INF, IntervalIndex, booking_span, iso
+from .dossier import mark_dirty
+from .models import Asset, AssetRequisition
+
+BOOKED = 'APPROVED'
+
+
+class AssetCalendar:
+    """Approved bookings of one asset.
+
+    Overlap queries go through an IntervalIndex; the bookings are also merged into
+    sorted disjoint busy blocks so the next free slot is a binary search followed
+    by a walk over the gaps.
+    """
+
+    def __init__(self, bookings):
+        self.index = IntervalIndex(bookings)
+        starts, ends = [], []
+        for start, end, _ in self.index.items:
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.block_starts = starts
+        self.block_ends = ends
+
+    @classmethod
+    def load(cls, asset_id, since=None, exclude=None):
+        """Calendar of approved bookings that end after `since` (all of them when None)."""
+        qs = AssetRequisition.objects.filter(asset_id=asset_id, status=BOOKED)
+        if since is not None:
+            qs = qs.filter(Q(reserved_until__isnull=True) | Q(reserved_until__gt=since))
+        if exclude is not None:
+            qs = qs.exclude(pk=exclude)
+        bookings = []
+        for pk, start, end, created_at in qs.values_list('pk', 'reserved_from', 'reserved_until', 'created_at'):
+            span = booking_span(start or created_at, end)
+            if span is not None:
+                bookings.append((span[0], span[1], pk))
+        return cls(bookings)
+
+    def is_free(self, t1, t2):
+        return self.index.is_free(t1, t2)
+
+    def clashes(self, t1, t2):
+        return [key for _, _, key in self.index.overlapping(t1, t2)]
+
+    def next_free(self, after, duration):
+        """Earliest start >= `after` of a free slot lasting `duration` seconds, or None."""
+        t = after
+        i = bisect.bisect_right(self.block_starts, t) - 1
+        if i >= 0 and self.block_ends[i] > t:
+            t = self.block_ends[i]
+        for j in range(i + 1, len(self.block_starts)):
+            if self.block_starts[j] - t >= duration:
+                break
+            t = max(t, self.block_ends[j])
+        return None if t == INF else t
+
+
+def booking_window(requisition):
+    return booking_span(requisition.reserved_from or requisition.created_at, requisition.reserved_until)
+
+
+def default_window(operation, reserved_from=None, reserved_until=None):
+    """Fill an unspecified booking window from the operation's actual or planned window."""
+    start = reserved_from or operation.started_at or operation.planned_start or timezone.now()
+    end = reserved_until
+    if end is None and operation.planned_end and operation.planned_end > start:
+        end = operation.planned_end
+    return start, end
+
+
+def covers(span, at):
+    return span[0] <= at.timestamp() < span[1]
+
+
+def _refusal(calendar, span):
+    slot = calendar.next_free(span[0], span[1] - span[0]) if span[1] != INF else None
+    return {
+        'error': 'Asset is already booked for part of this window.',
+        'clashing_requisitions': calendar.clashes(*span),
+        'next_free_from': iso(slot),
+    }
+
+
+def decide(decisions, user, now=None):
+    """Approve or deny many requisitions in one transaction.
+
+    `decisions` maps requisition id to 'APPROVED' or 'DENIED'. Asset rows are locked
+    first and requisition rows second, each in ascending id order, so overlapping
+    batches and single approvals always queue in the same order and cannot
+    deadlock. Approvals are checked against each asset's calendar, including
+    bookings approved earlier in the same batch.
+
+    Returns {requisition_id: (requisition or None, error dict or None)}.
+    """
+    now = now or timezone.now()
+    results = {}
+    with transaction.atomic():
+        asset_of = dict(AssetRequisition.objects.filter(pk__in=list(decisions)).values_list('pk', 'asset_id'))
+        for missing in set(decisions) - set(asset_of):
+            results[missing] = (None, {'error': 'Requisition not found.'})
+        assets = {
+            asset.pk: asset
+            for asset in Asset.objects.select_for_update().filter(pk__in=set(asset_of.values())).order_by('pk')
+        }
+        reqs = list(
+            AssetRequisition.objects.select_for_update(of=('self',)).select_related('operation')
+            .filter(pk__in=list(asset_of)).order_by('pk')
+        )
+        # Load each asset's calendar once, from the earliest window the batch asks about
+        since = {}
+        for req in reqs:
+            start = req.reserved_from or req.created_at
+            since[req.asset_id] = min(start, since.get(req.asset_id, start))
+        calendars = {}
+        allocate = set()
+        for req in reqs:
+            req.asset = assets[req.asset_id]
+            if req.status != 'PENDING':
+                results[req.pk] = (req, {'error': 'Requisition is not pending.'})
+                continue
+            if decisions[req.pk] == 'APPROVED':
+                span = booking_window(req)
+                if span is None:
+                    results[req.pk] = (req, {'error': 'Booking window is empty.'})
+                    continue
+                if req.asset_id not in calendars:
+                    calendars[req.asset_id] = AssetCalendar.load(req.asset_id, since=since[req.asset_id])
+                calendar = calendars[req.asset_id]
+                if not calendar.is_free(*span):
+                    results[req.pk] = (req, _refusal(calendar, span))
+                    continue
+                calendars[req.asset_id] = AssetCalendar(calendar.index.items + [(span[0], span[1], req.pk)])
+                if covers(span, now):
+                    allocate.add(req.asset_id)
+            req.status = decisions[req.pk]
+            req.approved_by = user
+            req.decided_at = now
+            req.save(update_fields=['status', 'approved_by', 'decided_at'])
+            results[req.pk] = (req, None)
+        if allocate:
+            Asset.objects.filter(pk__in=allocate, status='AVAILABLE').update(status='ALLOCATED')
+            for asset_id in allocate:
+                if assets[asset_id].status == 'AVAILABLE':
+                    assets[asset_id].status = 'ALLOCATED'
+    return results
+
+
+def approve(requisition_id, user, now=None):
+    """Approve one pending requisition if its window is free; returns (requisition, error)."""
+    return decide({requisition_id: 'APPROVED'}, user, now)[requisition_id]
+
+
+def deny(requisition_id, user, now=None):
+    return decide({requisition_id: 'DENIED'}, user, now)[requisition_id]
+
+
+def _current_bookings(at):
+    return AssetRequisition.objects.filter(
+        Q(reserved_until__isnull=True) | Q(reserved_until__gt=at),
+        status=BOOKED, reserved_from__lte=at, operation__status='ACTIVE',
+    )
+
+
+def activate_operation(operation, at=None):
+    """Mark assets ALLOCATED for the operation's bookings that have begun (one UPDATE)."""
+    at = at or timezone.now()
+    held = _current_bookings(at).filter(operation=operation).values('asset_id')
+    return Asset.objects.filter(pk__in=held, status='AVAILABLE').update(status='ALLOCATED')
+
+
+def release_operation(operation, at=None):
+    """End every booking of an operation at `at` and free its assets: one UPDATE for each table.
+
+    Bookings that had not started yet collapse to an empty window.
+    """
+    at = at or timezone.now()
+    held = AssetRequisition.objects.filter(operation=operation, status=BOOKED)
+    asset_ids = list(held.values_list('asset_id', flat=True))
+    if not asset_ids:
+        return 0
+    held.filter(Q(reserved_until__isnull=True) | Q(reserved_until__gt=at)).update(
+        reserved_until=Case(
+            When(reserved_from__gt=at, then=F('reserved_from')),
+            default=Value(at),
+        )
+    )
+    # Keep assets that another active operation is currently holding
+    still_held = _current_bookings(at).exclude(operation=operation).values('asset_id')
+    released = Asset.objects.filter(pk__in=asset_ids, status='ALLOCATED').exclude(pk__in=still_held).update(
+        status='AVAILABLE'
+    )
+    # Bulk updates skip model signals; refresh the read models that show bookings
+    mark_dirty([operation.pk], ['requisitions'])
+    return released
+
+
+def booking_dict(req):
+    return {
+        'requisition': req.pk,
+        'operation': req.operation_id,
+        'operation_codename': req.operation.codename,
+        'status': req.status,
+        'reserved_from': req.reserved_from or req.created_at,
+        'reserved_until': req.reserved_until,
+    }
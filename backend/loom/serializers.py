@@ -1,30 +1,22 @@
 from rest_framework import serializers
 from .models import Operation, OperationLog, Asset, AssetRequisition
-from lineage.serializers import AgentSerializer  # Assuming this exists for nesting
-from scales.serializers import FactionSerializer # Assuming this exists for nesting
-from codex.serializers import CodexEntrySerializer   # Assuming this exists for nesting
 
 class OperationSerializer(serializers.ModelSerializer):
     """Serializer for the list view of operations."""
-    class Meta:
-        model = Operation
-        fields = ['id', 'codename', 'objective', 'status', 'success_probability', 'started_at', 'ended_at']
-
-class OperationDetailSerializer(serializers.ModelSerializer):
-    """Detailed serializer for a single operation profile."""
-    targets = FactionSerializer(many=True, read_only=True)
-    personnel = AgentSerializer(many=True, read_only=True)
-    contingencies = CodexEntrySerializer(many=True, read_only=True)
-
     class Meta:
         model = Operation
         fields = [
-            'id', 'codename', 'objective', 'status', 
-            'success_probability', 'collateral_risk',
-            'targets', 'personnel', 'contingencies', 'assets', 'after_action_report',
-            'created_at', 'updated_at', 'started_at', 'ended_at'
+            'id', 'codename', 'objective', 'status', 'success_probability',
+            'planned_start', 'planned_end', 'started_at', 'ended_at'
         ]
 
+    def validate(self, attrs):
+        start = attrs.get('planned_start', getattr(self.instance, 'planned_start', None))
+        end = attrs.get('planned_end', getattr(self.instance, 'planned_end', None))
+        if start and end and end <= start:
+            raise serializers.ValidationError({'planned_end': 'Must be after planned_start.'})
+        return attrs
+
 class OperationLogSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
     class Meta:
@@ -47,6 +39,7 @@ class AssetRequisitionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'operation', 'asset', 'asset_name', 'asset_type',
             'requested_by', 'requested_by_username', 'status',
-            'approved_by', 'approved_by_username', 'decided_at', 'note', 'created_at'
+            'approved_by', 'approved_by_username', 'decided_at', 'note', 'created_at',
+            'reserved_from', 'reserved_until'
         ]
         read_only_fields = ['requested_by', 'status', 'approved_by', 'decided_at', 'created_at']
@@ -0,0 +1,151 @@
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from scales.models import Faction
+from .models import Operation, OperationLog, Asset, AssetRequisition
+from api.tasks import enqueue
+from .dossier import mark_dirty
+from . import analytics, conflicts
+
+# Dossier sections that depend on each M2M relation of Operation
+_M2M_SECTIONS = {
+    Operation.targets.through: 'targets',
+    Operation.personnel.through: 'personnel',
+    Operation.contingencies.through: 'contingencies',
+}
+# Dossier sections built from the same inputs as the success estimate
+_PREDICTION_SECTIONS = {'core', 'targets', 'personnel'}
+
+
+def _changed(operation_ids, sections):
+    """Mark dossier sections stale and, when estimate inputs changed, queue a prediction refresh."""
+    operation_ids = sorted({int(i) for i in operation_ids if i is not None})
+    mark_dirty(operation_ids, sections)
+    if operation_ids and _PREDICTION_SECTIONS & set(sections):
+        enqueue('loom.refresh_predictions', {'operation_ids': operation_ids})
+
+
+@receiver(pre_save, sender=Operation)
+def remember_schedule(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Stash the stored schedule so post_save only rebuilds conflict indexes when it changed
+    instance._stored_schedule = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(conflicts.SCHEDULING_FIELDS) & set(update_fields):
+        return
+    instance._stored_schedule = sender._base_manager.filter(pk=instance.pk).values_list(*conflicts.SCHEDULING_FIELDS).first()
+
+
+@receiver(post_save, sender=Operation)
+def operation_saved(sender, instance, created, **kwargs):
+    # A new operation has no personnel or requisitions yet, so it cannot conflict
+    stored = getattr(instance, '_stored_schedule', None)
+    if stored is not None and stored != tuple(getattr(instance, f) for f in conflicts.SCHEDULING_FIELDS):
+        conflicts.invalidate()
+    if created:
+        enqueue('loom.refresh_predictions', {'operation_ids': [instance.pk]})
+    else:
+        _changed([instance.pk], ['core'])
+
+
+@receiver(post_delete, sender=Operation)
+def operation_deleted(sender, instance, **kwargs):
+    conflicts.invalidate()
+
+
+def _operation_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    section = _M2M_SECTIONS[sender]
+    if section == 'personnel':
+        conflicts.invalidate()
+    if not reverse:
+        _changed([instance.pk], [section])
+    elif action == 'pre_clear':
+        # Reverse clear (e.g. faction.operations.clear()): pk_set is empty, collect first
+        _changed(instance.operations.values_list('pk', flat=True), [section])
+    elif pk_set:
+        _changed(pk_set, [section])
+
+
+for _through in _M2M_SECTIONS:
+    m2m_changed.connect(_operation_m2m_changed, sender=_through, dispatch_uid=f'dossier-{_through._meta.label}')
+
+
+@receiver(post_save, sender=OperationLog)
+@receiver(post_delete, sender=OperationLog)
+def operation_log_changed(sender, instance, **kwargs):
+    mark_dirty([instance.operation_id], ['logs'])
+
+
+@receiver(post_save, sender=OperationLog)
+def operation_log_created(sender, instance, created, **kwargs):
+    # Live tail: push new entries to clients streaming this operation's log
+    if created:
+        from api.realtime import publish, operation_channel
+        from .serializers import OperationLogSerializer
+        publish(operation_channel(instance.operation_id), 'log', OperationLogSerializer(instance).data)
+
+
+@receiver(post_save, sender=AssetRequisition)
+@receiver(post_delete, sender=AssetRequisition)
+def requisition_changed(sender, instance, **kwargs):
+    conflicts.invalidate()
+    mark_dirty([instance.operation_id], ['requisitions'])
+
+
+@receiver(post_save, sender=Asset)
+def asset_saved(sender, instance, **kwargs):
+    mark_dirty(instance.requisitions.values_list('operation_id', flat=True), ['requisitions'])
+
+
+# Inputs owned by other apps: targets (Scales factions), personnel (Lineage agents), contingencies (Codex)
+
+@receiver(post_save, sender='scales.Faction')
+@receiver(pre_delete, sender='scales.Faction')
+def faction_changed(sender, instance, **kwargs):
+    _changed(instance.operations.values_list('pk', flat=True), ['targets'])
+
+
+def _faction_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Target summaries carry member counts
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        faction_ids = pk_set if action != 'pre_clear' else instance.factions.values_list('pk', flat=True)
+        op_ids = Operation.objects.filter(targets__in=list(faction_ids or ())).values_list('pk', flat=True)
+    else:
+        op_ids = instance.operations.values_list('pk', flat=True)
+    mark_dirty(op_ids, ['targets'])
+
+
+@receiver(post_save, sender='lineage.Agent')
+@receiver(pre_delete, sender='lineage.Agent')
+def lineage_agent_changed(sender, instance, **kwargs):
+    _changed(instance.operations.values_list('pk', flat=True), ['personnel'])
+
+
+@receiver(post_save, sender='scales.Faction')
+def faction_saved(sender, instance, **kwargs):
+    analytics.relabel(analytics.Dimension.FACTION, instance.pk, instance.name)
+
+
+@receiver(post_save, sender='lineage.Agent')
+def lineage_agent_saved(sender, instance, **kwargs):
+    analytics.relabel(analytics.Dimension.AGENT, instance.pk, instance.alias)
+
+
+@receiver(post_save, sender='codex.CodexEntry')
+@receiver(pre_delete, sender='codex.CodexEntry')
+def codex_entry_changed(sender, instance, **kwargs):
+    mark_dirty(instance.operations.values_list('pk', flat=True), ['contingencies'])
+
+
+@receiver(post_save, sender='scales.Agent')
+def faction_member_saved(sender, instance, **kwargs):
+    # Soft-deleting a member changes the member counts of its factions
+    op_ids = Operation.objects.filter(targets__members=instance).values_list('pk', flat=True)
+    mark_dirty(op_ids, ['targets'])
+
+
+m2m_changed.connect(_faction_members_changed, sender=Faction.members.through, dispatch_uid='dossier-faction-members')
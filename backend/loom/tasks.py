@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from api.tasks import task
+from .models import Operation, OperationDossier
+from . import dossier
+
+# Conclusions within this window share one refit
+REFIT_DELAY = timedelta(minutes=1)
+
+
+@task('loom.refresh_dossiers')
+def refresh_dossiers(operation_ids, sections):
+    """Rebuild stale dossier sections; dossiers never opened are built on first read instead."""
+    existing = OperationDossier.objects.filter(pk__in=operation_ids).values_list('pk', flat=True)
+    for operation_id in existing:
+        dossier.refresh(operation_id, sections)
+
+
+@task('loom.refit_success_model')
+def refit_success_model():
+    """Warm-started refit after operations conclude, then refresh planning estimates."""
+    from . import forecast
+    if forecast.fit(warm_start=True) is not None:
+        forecast.refresh_predictions()
+
+
+@task('loom.refresh_predictions')
+def refresh_predictions(operation_ids):
+    """Recompute the stored estimates of operations whose inputs changed."""
+    from . import forecast
+    forecast.refresh_predictions(Operation.objects.filter(pk__in=operation_ids))
+
+
+@task('loom.record_operation_outcome')
+def record_operation_outcome(operation_id):
+    from . import analytics
+    analytics.record_operation(operation_id)
+
+
+@task('loom.refresh_asset_rollups')
+def refresh_asset_rollups(asset_ids):
+    from . import analytics
+    analytics.refresh_assets(asset_ids)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+
+from .conflicts import INF, IntervalIndex, window
+
+
+def keys(intervals):
+    return sorted(key for _, _, key in intervals)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = IntervalIndex([
+            (10, 20, 'a'),
+            (20, 30, 'b'),      # touches a
+            (25, 40, 'c'),      # overlaps b
+            (50, INF, 'open'),  # open-ended
+        ])
+
+    def test_touching_intervals_do_not_overlap(self):
+        self.assertTrue(self.index.is_free(0, 10))
+        self.assertTrue(self.index.is_free(40, 50))
+        self.assertEqual(keys(self.index.overlapping(20, 25)), ['b'])
+        self.assertEqual(keys(self.index.overlapping(0, 10)), [])
+
+    def test_point_inside_interval_conflicts(self):
+        self.assertFalse(self.index.is_free(19, 21))
+        self.assertEqual(keys(self.index.overlapping(19, 21)), ['a', 'b'])
+
+    def test_open_ended_interval_blocks_everything_after_its_start(self):
+        self.assertFalse(self.index.is_free(1000, 1001))
+        self.assertEqual(keys(self.index.overlapping(45, INF)), ['open'])
+
+    def test_query_spanning_everything_reports_all(self):
+        self.assertEqual(keys(self.index.overlapping(0, INF)), ['a', 'b', 'c', 'open'])
+
+    def test_overlapping_pairs_skip_touching_intervals(self):
+        pairs = {tuple(sorted((x[2], y[2]))) for x, y in self.index.overlapping_pairs()}
+        self.assertEqual(pairs, {('b', 'c')})
+
+    def test_nested_and_identical_intervals(self):
+        index = IntervalIndex([(0, 100, 'outer'), (10, 20, 'inner'), (10, 20, 'twin')])
+        self.assertEqual(keys(index.overlapping(15, 16)), ['inner', 'outer', 'twin'])
+        pairs = {tuple(sorted((x[2], y[2]))) for x, y in index.overlapping_pairs()}
+        self.assertEqual(pairs, {('inner', 'outer'), ('outer', 'twin'), ('inner', 'twin')})
+        self.assertFalse(index.is_free(50, 60))  # only the long interval covers it
+
+    def test_empty_and_single_item_indexes(self):
+        self.assertTrue(IntervalIndex([]).is_free(0, INF))
+        self.assertEqual(IntervalIndex([]).overlapping(0, INF), [])
+        single = IntervalIndex([(5, 6, 'x')])
+        self.assertEqual(keys(single.overlapping(5, 6)), ['x'])
+        self.assertTrue(single.is_free(6, 7))
+
+    def test_matches_brute_force(self):
+        intervals = [(s, s + d, i) for i, (s, d) in enumerate(
+            (s, d) for s in range(0, 60, 7) for d in (1, 5, 13)
+        )]
+        index = IntervalIndex(intervals)
+        for t1 in range(-5, 80, 3):
+            for t2 in (t1 + 1, t1 + 4, t1 + 20):
+                expected = sorted(k for s, e, k in intervals if s < t2 and e > t1)
+                self.assertEqual(keys(index.overlapping(t1, t2)), expected)
+                self.assertEqual(index.is_free(t1, t2), not expected)
+
+
+class WindowTests(SimpleTestCase):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def test_unscheduled_operation_has_no_window(self):
+        self.assertIsNone(window())
+
+    def test_actual_times_win_over_planned_ones(self):
+        actual = self.start + timedelta(hours=1)
+        self.assertEqual(window(started_at=actual, planned_start=self.start)[0], actual.timestamp())
+
+    def test_missing_or_inverted_end_is_open_ended(self):
+        self.assertEqual(window(planned_start=self.start)[1], INF)
+        self.assertEqual(window(planned_start=self.start, planned_end=self.start - timedelta(hours=1))[1], INF)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OperationViewSet, AssetViewSet, AssetRequisitionViewSet
+from .views import OperationViewSet, AssetViewSet, AssetRequisitionViewSet, operation_log_stream
 
 router = DefaultRouter()
 router.register(r'operations', OperationViewSet)
@@ -8,5 +8,7 @@ router.register(r'assets', AssetViewSet, basename='asset')
 router.register(r'requisitions', AssetRequisitionViewSet, basename='asset-requisition')
 
 urlpatterns = [
+    # Live tail of an operation log (Server-Sent Events; requires ASGI)
+    path('operations/<int:pk>/logs/stream/', operation_log_stream, name='operation-log-stream'),
     path('', include(router.urls)),
 ]
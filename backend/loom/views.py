@@ -1,30 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
 
 from django.utils import timezone
-from .models import Operation, OperationLog, Asset, AssetRequisition
+from django.utils.dateparse import parse_datetime
+from .models import Operation, OperationLog, Asset, AssetRequisition, OperationTarget, OperationAssignment
 from .serializers import (
-    OperationSerializer, OperationDetailSerializer,
+    OperationSerializer,
     OperationLogSerializer, AssetSerializer, AssetRequisitionSerializer
 )
 from scales.models import Faction
 from lineage.models import Agent
 from api.permissions import get_user_role, IsProtector, IsProtectorOrHeir
 from audit.utils import log_action
+from codex.models import Notification
+from codex.notifications import broadcast
+from api.tasks import enqueue
+from .tasks import REFIT_DELAY
+from api.realtime import get_broker, operation_channel
+from api.views import authenticate_stream, sse_event, stream_response
+from .dossier import get_dossier, redact
+from . import reservations
+from . import conflicts as scheduling
+
+LOG_PAGE_SIZE = 500
+LOG_STREAM_BACKLOG = 1000
+
+def _parse_time(value):
+    """Parse an ISO 8601 parameter into an aware datetime; None when absent, ValueError when malformed."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+def _param_list(params, name):
+    """Comma-separated (or repeated) query parameter as a list of non-empty strings."""
+    return [v.strip() for raw in params.getlist(name) for v in raw.split(',') if v.strip()]
+
+def _param_ids(params, name):
+    try:
+        return [int(v) for v in _param_list(params, name)]
+    except ValueError:
+        raise ValidationError({'error': f"'{name}' must be a comma-separated list of ids."})
 
 class OperationViewSet(viewsets.ModelViewSet):
     queryset = Operation.objects.all().order_by('-created_at')
     serializer_class = OperationSerializer
 
-    def get_serializer_class(self):
-        if self.action == 'retrieve':
-            return OperationDetailSerializer
-        return OperationSerializer
-
     def get_permissions(self):
         """Assign permissions based on action."""
         if self.action in ['list', 'retrieve']:
@@ -33,12 +64,60 @@ class OperationViewSet(viewsets.ModelViewSet):
             self.permission_classes = [IsProtectorOrHeir]
         elif self.action == 'commence':
             self.permission_classes = [IsProtector]
-        elif self.action in ['conclude', 'abort', 'logs', 'requisitions']:
+        elif self.action in ['conclude', 'abort', 'logs', 'requisitions', 'conflicts', 'availability', 'prediction', 'analytics']:
             self.permission_classes = [IsProtectorOrHeir]
         else: # update, partial_update, destroy
             self.permission_classes = [IsProtectorOrHeir] # Logic inside methods will handle finer details
         return super().get_permissions()
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action != 'list':
+            return qs
+        params = self.request.query_params
+        statuses = _param_list(params, 'status')
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+        risks = _param_list(params, 'collateral_risk')
+        if risks:
+            qs = qs.filter(collateral_risk__in=risks)
+        # EXISTS against the through tables' (faction|agent, operation) indexes; no join fan-out to de-duplicate
+        targets = _param_ids(params, 'targets')
+        if targets:
+            qs = qs.filter(Exists(OperationTarget.objects.filter(operation=OuterRef('pk'), faction_id__in=targets)))
+        personnel = _param_ids(params, 'personnel')
+        if personnel:
+            qs = qs.filter(Exists(OperationAssignment.objects.filter(operation=OuterRef('pk'), agent_id__in=personnel)))
+        try:
+            for name, lookup in (('success_min', 'success_probability__gte'), ('success_max', 'success_probability__lte')):
+                if params.get(name):
+                    qs = qs.filter(**{lookup: int(params[name])})
+        except ValueError:
+            raise ValidationError({'error': 'success_min and success_max must be integers.'})
+        for name, lookup in (
+            ('created_after', 'created_at__gte'), ('created_before', 'created_at__lt'),
+            ('started_after', 'started_at__gte'), ('started_before', 'started_at__lt'),
+        ):
+            try:
+                value = _parse_time(params.get(name))
+            except ValueError:
+                raise ValidationError({'error': f"'{name}' must be an ISO 8601 datetime."})
+            if value is not None:
+                qs = qs.filter(**{lookup: value})
+        q = params.get('search')
+        if q:
+            qs = qs.filter(Q(codename__icontains=q) | Q(objective__icontains=q))
+        return qs
+
+    def retrieve(self, request, *args, **kwargs):
+        # Served from the cached dossier read model (see loom/dossier.py)
+        operation = self.get_object()
+        data = get_dossier(operation.pk)
+        # Logs and requisitions are only shown to those allowed on their own endpoints
+        if not IsProtectorOrHeir().has_permission(request, self):
+            data = redact(data)
+        return Response(data)
+
     def perform_create(self, serializer):
         op = serializer.save()
         log_action(self.request.user, f"Created operation '{op.codename}'", target=op)
@@ -90,7 +169,10 @@ class OperationViewSet(viewsets.ModelViewSet):
         agent = get_object_or_404(Agent, pk=request.data.get('agent_id'))
         operation.personnel.add(agent)
         log_action(request.user, f"Assigned agent '{agent.alias}' to operation '{operation.codename}'", target=operation)
-        return Response({'status': 'personnel assigned'}, status=status.HTTP_200_OK)
+        return Response({
+            'status': 'personnel assigned',
+            'conflicts': scheduling.conflicts_for(operation, 'agent', agent.pk),
+        }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='unassign-personnel')
     def unassign_personnel(self, request, pk=None):
@@ -102,106 +184,120 @@ class OperationViewSet(viewsets.ModelViewSet):
         log_action(request.user, f"Unassigned agent '{agent.alias}' from operation '{operation.codename}'", target=operation)
         return Response({'status': 'personnel unassigned'}, status=status.HTTP_200_OK)
 
+    def _lock_operation(self):
+        """The requested operation re-read under a row lock; call inside `transaction.atomic()`.
+
+        Status transitions check the status under this lock, so concurrent commence,
+        conclude or abort requests apply once and their reservation changes commit
+        or roll back together with the status.
+        """
+        return Operation.objects.select_for_update().get(pk=self.get_object().pk)
+
     @action(detail=True, methods=['post'], url_path='commence')
     def commence(self, request, pk=None):
         """Protector-only action to begin an operation."""
-        operation = self.get_object()
-        if operation.status != 'PLANNING':
-            return Response({'error': 'Operation is not in the PLANNING stage.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        operation.status = 'ACTIVE'
-        operation.started_at = timezone.now()
-        operation.save()
+        with transaction.atomic():
+            operation = self._lock_operation()
+            if operation.status != 'PLANNING':
+                return Response({'error': 'Operation is not in the PLANNING stage.'}, status=status.HTTP_400_BAD_REQUEST)
+            operation.status = 'ACTIVE'
+            operation.started_at = timezone.now()
+            operation.save()
+            reservations.activate_operation(operation, operation.started_at)
         log_action(request.user, f"Commenced operation '{operation.codename}'", target=operation)
         # Notify leadership about operation status change
-        try:
-            from django.contrib.auth.models import User as DjangoUser
-            from codex.models import Notification
-            recipients = DjangoUser.objects.filter(profile__role__in=['PROTECTOR', 'HEIR']).distinct()
-            Notification.objects.bulk_create([
-                Notification(
-                    user=u,
-                    notif_type=Notification.Type.OPERATION_STATUS,
-                    message=f"Operation '{operation.codename}' commenced",
-                    metadata={'operation_id': operation.id, 'status': operation.status}
-                ) for u in recipients
-            ])
-        except Exception:
-            pass
+        broadcast(
+            ['PROTECTOR', 'HEIR'], Notification.Type.OPERATION_STATUS, f"Operation '{operation.codename}' commenced",
+            {'operation_id': operation.id, 'status': operation.status},
+        )
         return Response(self.get_serializer(operation).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='conclude')
     def conclude(self, request, pk=None):
-        operation = self.get_object()
-        if operation.status != 'ACTIVE':
-            return Response({'error': 'Only ACTIVE operations can be concluded.'}, status=status.HTTP_400_BAD_REQUEST)
         outcome = request.data.get('outcome')  # 'SUCCESS' or 'FAILURE'
         report = request.data.get('report', '')
-        if outcome not in ['SUCCESS', 'FAILURE']:
-            return Response({'error': 'Invalid outcome. Use SUCCESS or FAILURE.'}, status=status.HTTP_400_BAD_REQUEST)
-        operation.status = 'CONCLUDED - SUCCESS' if outcome == 'SUCCESS' else 'CONCLUDED - FAILURE'
-        operation.after_action_report = report
-        operation.ended_at = timezone.now()
-        operation.save()
-        # Release allocated assets for this operation
-        approved = AssetRequisition.objects.filter(operation=operation, status='APPROVED').select_related('asset')
-        for req in approved:
-            req.asset.status = 'AVAILABLE'
-            req.asset.save(update_fields=['status'])
+        with transaction.atomic():
+            operation = self._lock_operation()
+            if operation.status != 'ACTIVE':
+                return Response({'error': 'Only ACTIVE operations can be concluded.'}, status=status.HTTP_400_BAD_REQUEST)
+            if outcome not in ['SUCCESS', 'FAILURE']:
+                return Response({'error': 'Invalid outcome. Use SUCCESS or FAILURE.'}, status=status.HTTP_400_BAD_REQUEST)
+            operation.status = 'CONCLUDED - SUCCESS' if outcome == 'SUCCESS' else 'CONCLUDED - FAILURE'
+            operation.after_action_report = report
+            operation.ended_at = timezone.now()
+            operation.save()
+            # Release this operation's bookings and free its assets
+            reservations.release_operation(operation, operation.ended_at)
         log_action(request.user, f"Concluded operation '{operation.codename}' ({outcome})", target=operation)
-        try:
-            from django.contrib.auth.models import User as DjangoUser
-            from codex.models import Notification
-            recipients = DjangoUser.objects.filter(profile__role__in=['PROTECTOR', 'HEIR']).distinct()
-            Notification.objects.bulk_create([
-                Notification(
-                    user=u,
-                    notif_type=Notification.Type.OPERATION_STATUS,
-                    message=f"Operation '{operation.codename}' concluded: {outcome}",
-                    metadata={'operation_id': operation.id, 'status': operation.status}
-                ) for u in recipients
-            ])
-        except Exception:
-            pass
+        enqueue('loom.refit_success_model', delay=REFIT_DELAY, coalesce=True)
+        enqueue('loom.record_operation_outcome', {'operation_id': operation.id})
+        broadcast(
+            ['PROTECTOR', 'HEIR'], Notification.Type.OPERATION_STATUS, f"Operation '{operation.codename}' concluded: {outcome}",
+            {'operation_id': operation.id, 'status': operation.status},
+        )
         return Response(self.get_serializer(operation).data)
 
     @action(detail=True, methods=['post'], url_path='abort')
     def abort(self, request, pk=None):
-        operation = self.get_object()
-        if operation.status != 'ACTIVE':
-            return Response({'error': 'Only ACTIVE operations can be aborted.'}, status=status.HTTP_400_BAD_REQUEST)
         reason = request.data.get('reason', '')
-        operation.status = 'COMPROMISED'
-        operation.after_action_report = (operation.after_action_report or '') + (f"\nABORTED: {reason}" if reason else '')
-        operation.ended_at = timezone.now()
-        operation.save()
-        approved = AssetRequisition.objects.filter(operation=operation, status='APPROVED').select_related('asset')
-        for req in approved:
-            req.asset.status = 'AVAILABLE'
-            req.asset.save(update_fields=['status'])
+        with transaction.atomic():
+            operation = self._lock_operation()
+            if operation.status != 'ACTIVE':
+                return Response({'error': 'Only ACTIVE operations can be aborted.'}, status=status.HTTP_400_BAD_REQUEST)
+            operation.status = 'COMPROMISED'
+            operation.after_action_report = (operation.after_action_report or '') + (f"\nABORTED: {reason}" if reason else '')
+            operation.ended_at = timezone.now()
+            operation.save()
+            reservations.release_operation(operation, operation.ended_at)
         log_action(request.user, f"Aborted operation '{operation.codename}'", target=operation)
-        try:
-            from django.contrib.auth.models import User as DjangoUser
-            from codex.models import Notification
-            recipients = DjangoUser.objects.filter(profile__role__in=['PROTECTOR', 'HEIR']).distinct()
-            Notification.objects.bulk_create([
-                Notification(
-                    user=u,
-                    notif_type=Notification.Type.OPERATION_STATUS,
-                    message=f"Operation '{operation.codename}' aborted",
-                    metadata={'operation_id': operation.id, 'status': operation.status}
-                ) for u in recipients
-            ])
-        except Exception:
-            pass
+        enqueue('loom.refit_success_model', delay=REFIT_DELAY, coalesce=True)
+        enqueue('loom.record_operation_outcome', {'operation_id': operation.id})
+        broadcast(
+            ['PROTECTOR', 'HEIR'], Notification.Type.OPERATION_STATUS, f"Operation '{operation.codename}' aborted",
+            {'operation_id': operation.id, 'status': operation.status},
+        )
         return Response(self.get_serializer(operation).data)
 
+    @action(detail=False, methods=['get'], url_path='analytics')
+    def analytics(self, request):
+        """After-action figures per faction, agent, month and asset, read from rollup tables."""
+        from .analytics import summary
+        return Response(summary())
+
+    @action(detail=True, methods=['get'], url_path='prediction')
+    def prediction(self, request, pk=None):
+        """Success estimate from the historical model, stored whenever the model or the operation's inputs change."""
+        from .forecast import predict
+        operation = self.get_object()
+        result = predict(operation)
+        if result is None:
+            return Response({
+                'operation': operation.pk, 'probability': None,
+                'detail': 'Not enough concluded operations to fit a model yet.',
+            })
+        return Response(result)
+
     @action(detail=True, methods=['get', 'post'], url_path='logs')
     def logs(self, request, pk=None):
         operation = self.get_object()
         if request.method.lower() == 'get':
-            qs = operation.logs.all()
-            return Response(OperationLogSerializer(qs, many=True).data)
+            after = request.query_params.get('after')
+            if after is None:
+                qs = operation.logs.select_related('user')
+                return Response(OperationLogSerializer(qs, many=True).data)
+            # Incremental read: entries after the cursor, served from the (operation, id) index
+            try:
+                after = int(after)
+                limit = min(max(int(request.query_params.get('limit', LOG_PAGE_SIZE)), 1), LOG_PAGE_SIZE)
+            except ValueError:
+                return Response({'error': 'after and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+            qs = OperationLog.objects.filter(operation=operation, id__gt=after).select_related('user').order_by('id')[:limit]
+            entries = OperationLogSerializer(qs, many=True).data
+            return Response({
+                'results': entries,
+                'next_after': entries[-1]['id'] if entries else after,
+                'has_more': len(entries) == limit,
+            })
         # POST: add log entry
         if operation.status != 'ACTIVE':
             return Response({'error': 'Logs can only be added while operation is ACTIVE.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -223,16 +319,64 @@ class OperationViewSet(viewsets.ModelViewSet):
         if not asset_id:
             return Response({'error': 'asset_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         asset = get_object_or_404(Asset, pk=asset_id)
-        if asset.status != 'AVAILABLE':
+        if asset.status == 'UNAVAILABLE':
             return Response({'error': 'Asset is not available'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reserved_from, reserved_until = reservations.default_window(
+                operation, _parse_time(request.data.get('reserved_from')), _parse_time(request.data.get('reserved_until'))
+            )
+        except ValueError:
+            return Response({'error': 'reserved_from and reserved_until must be ISO 8601 datetimes'}, status=status.HTTP_400_BAD_REQUEST)
+        if reserved_until is not None and reserved_until <= reserved_from:
+            return Response({'error': 'reserved_until must be after reserved_from'}, status=status.HTTP_400_BAD_REQUEST)
         req, created = AssetRequisition.objects.get_or_create(
             operation=operation, asset=asset,
-            defaults={'requested_by': request.user, 'status': 'PENDING'}
+            defaults={
+                'requested_by': request.user, 'status': 'PENDING',
+                'reserved_from': reserved_from, 'reserved_until': reserved_until,
+            }
         )
         if not created:
             return Response({'error': 'Requisition already exists for this asset.'}, status=status.HTTP_400_BAD_REQUEST)
         log_action(request.user, f"Requested asset '{asset.name}' for operation '{operation.codename}'", target=operation)
-        return Response(AssetRequisitionSerializer(req).data, status=status.HTTP_201_CREATED)
+        span = reservations.booking_window(req)
+        data = AssetRequisitionSerializer(req).data
+        data['available'] = reservations.AssetCalendar.load(asset.pk, since=reserved_from).is_free(*span)
+        data['conflicts'] = scheduling.conflicts_for(operation, 'asset', asset.pk, span=span)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='conflicts')
+    def conflicts(self, request):
+        """Every overlapping pair of open operations sharing an agent or an asset."""
+        return Response(scheduling.get_engine().conflicts)
+
+    @action(detail=False, methods=['get'], url_path='availability')
+    def availability(self, request):
+        """Whether an agent (`agent_id`) or asset (`asset_id`) is free between `start` and `end`."""
+        if request.query_params.get('agent_id'):
+            kind, resource_id = 'agent', request.query_params.get('agent_id')
+        elif request.query_params.get('asset_id'):
+            kind, resource_id = 'asset', request.query_params.get('asset_id')
+        else:
+            return Response({'error': 'agent_id or asset_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resource_id = int(resource_id)
+        except ValueError:
+            return Response({'error': f'{kind}_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = _parse_time(request.query_params.get('start'))
+            end = _parse_time(request.query_params.get('end'))
+        except ValueError:
+            start = None
+        if start is None:
+            return Response({'error': 'start must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        t1 = start.timestamp()
+        t2 = end.timestamp() if end else scheduling.INF
+        if t2 <= t1:
+            return Response({'error': 'end must be after start'}, status=status.HTTP_400_BAD_REQUEST)
+        engine = scheduling.get_engine()
+        busy = engine.overlapping(kind, resource_id, t1, t2)
+        return Response({f'{kind}_id': resource_id, 'free': not busy, 'operations': busy})
 
 class AssetViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Asset.objects.all().order_by('name')
@@ -246,33 +390,169 @@ class AssetViewSet(viewsets.ReadOnlyModelViewSet):
             qs = qs.filter(status=status_filter)
         return qs
 
+    @action(detail=True, methods=['get'], url_path='calendar')
+    def calendar(self, request, pk=None):
+        """Bookings of this asset (approved and pending) overlapping [`from`, `until`)."""
+        asset = self.get_object()
+        try:
+            start = _parse_time(request.query_params.get('from')) or timezone.now()
+            end = _parse_time(request.query_params.get('until'))
+        except ValueError:
+            return Response({'error': 'from and until must be ISO 8601 datetimes'}, status=status.HTTP_400_BAD_REQUEST)
+        qs = asset.requisitions.filter(status__in=['PENDING', 'APPROVED']).filter(
+            Q(reserved_until__isnull=True) | Q(reserved_until__gt=start)
+        )
+        if end is not None:
+            qs = qs.filter(reserved_from__lt=end)
+        qs = qs.select_related('operation').order_by('reserved_from')
+        return Response({
+            'asset': asset.pk,
+            'status': asset.status,
+            'bookings': [reservations.booking_dict(req) for req in qs],
+        })
+
+    @action(detail=True, methods=['get'], url_path='availability')
+    def availability(self, request, pk=None):
+        """Whether the asset is free of approved bookings between `start` and `end`."""
+        asset = self.get_object()
+        try:
+            start = _parse_time(request.query_params.get('start'))
+            end = _parse_time(request.query_params.get('end'))
+        except ValueError:
+            start = None
+        if start is None:
+            return Response({'error': 'start must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        t1 = start.timestamp()
+        t2 = end.timestamp() if end else reservations.INF
+        if t2 <= t1:
+            return Response({'error': 'end must be after start'}, status=status.HTTP_400_BAD_REQUEST)
+        calendar = reservations.AssetCalendar.load(asset.pk, since=start)
+        return Response({'asset': asset.pk, 'free': calendar.is_free(t1, t2), 'clashing_requisitions': calendar.clashes(t1, t2)})
+
+    @action(detail=True, methods=['get'], url_path='next-free')
+    def next_free(self, request, pk=None):
+        """Earliest free slot of `hours` length starting no sooner than `after` (default now)."""
+        asset = self.get_object()
+        try:
+            after = _parse_time(request.query_params.get('after')) or timezone.now()
+            hours = float(request.query_params.get('hours', 1))
+        except ValueError:
+            return Response({'error': 'after must be an ISO 8601 datetime and hours a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if hours <= 0:
+            return Response({'error': 'hours must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        calendar = reservations.AssetCalendar.load(asset.pk, since=after)
+        slot = calendar.next_free(after.timestamp(), hours * 3600)
+        return Response({'asset': asset.pk, 'hours': hours, 'next_free_from': reservations.iso(slot)})
+
 class AssetRequisitionViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AssetRequisition.objects.select_related('asset', 'operation', 'requested_by', 'approved_by').all()
     serializer_class = AssetRequisitionSerializer
     permission_classes = [IsProtector]
+    MAX_BATCH = 500
 
     @action(detail=True, methods=['post'], url_path='approve')
     def approve(self, request, pk=None):
-        req = self.get_object()
-        if req.status != 'PENDING':
-            return Response({'error': 'Requisition is not pending.'}, status=status.HTTP_400_BAD_REQUEST)
-        req.status = 'APPROVED'
-        req.approved_by = request.user
-        req.decided_at = timezone.now()
-        req.save(update_fields=['status', 'approved_by', 'decided_at'])
-        req.asset.status = 'ALLOCATED'
-        req.asset.save(update_fields=['status'])
+        req, error = reservations.approve(self.get_object().pk, request.user)
+        if error:
+            code = status.HTTP_409_CONFLICT if 'clashing_requisitions' in error else status.HTTP_400_BAD_REQUEST
+            return Response(error, status=code)
         log_action(request.user, f"Approved asset '{req.asset.name}' for operation '{req.operation.codename}'", target=req.operation)
+        enqueue('loom.refresh_asset_rollups', {'asset_ids': [req.asset_id]})
         return Response(AssetRequisitionSerializer(req).data)
 
     @action(detail=True, methods=['post'], url_path='deny')
     def deny(self, request, pk=None):
-        req = self.get_object()
-        if req.status != 'PENDING':
-            return Response({'error': 'Requisition is not pending.'}, status=status.HTTP_400_BAD_REQUEST)
-        req.status = 'DENIED'
-        req.approved_by = request.user
-        req.decided_at = timezone.now()
-        req.save(update_fields=['status', 'approved_by', 'decided_at'])
+        req, error = reservations.deny(self.get_object().pk, request.user)
+        if error:
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
         log_action(request.user, f"Denied asset '{req.asset.name}' for operation '{req.operation.codename}'", target=req.operation)
+        enqueue('loom.refresh_asset_rollups', {'asset_ids': [req.asset_id]})
         return Response(AssetRequisitionSerializer(req).data)
+
+    @action(detail=False, methods=['post'], url_path='batch-decide')
+    def batch_decide(self, request):
+        """Approve/deny many requisitions in one transaction: {"approve": [ids], "deny": [ids]}."""
+        decisions = {}
+        try:
+            for key, decision in (('approve', 'APPROVED'), ('deny', 'DENIED')):
+                ids = request.data.get(key) or []
+                if not isinstance(ids, list):
+                    raise TypeError(key)
+                for req_id in ids:
+                    decisions[int(req_id)] = decision
+        except (TypeError, ValueError):
+            return Response({'error': 'approve and deny must be lists of requisition ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if not decisions:
+            return Response({'error': 'No requisitions given.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(decisions) > self.MAX_BATCH:
+            return Response({'error': f'At most {self.MAX_BATCH} requisitions per batch.'}, status=status.HTTP_400_BAD_REQUEST)
+        outcomes = reservations.decide(decisions, request.user)
+        results, decided_assets = [], set()
+        for req_id in sorted(outcomes):
+            req, error = outcomes[req_id]
+            if error:
+                results.append({'id': req_id, 'ok': False, **error})
+                continue
+            decided_assets.add(req.asset_id)
+            verb = 'Approved' if req.status == 'APPROVED' else 'Denied'
+            log_action(request.user, f"{verb} asset '{req.asset.name}' for operation '{req.operation.codename}'", target=req.operation)
+            results.append({'id': req_id, 'ok': True, 'status': req.status})
+        if decided_assets:
+            enqueue('loom.refresh_asset_rollups', {'asset_ids': sorted(decided_assets)})
+        return Response({
+            'decided': sum(1 for r in results if r['ok']),
+            'failed': sum(1 for r in results if not r['ok']),
+            'results': results,
+        })
+
+
+def _log_backlog(operation_id, after, limit):
+    qs = OperationLog.objects.filter(operation_id=operation_id, id__gt=after).select_related('user').order_by('id')[:limit]
+    return list(OperationLogSerializer(qs, many=True).data)
+
+
+async def operation_log_stream(request, pk):
+    """Live tail of an operation's log over Server-Sent Events.
+
+    Sends entries after `?after=<id>` (or the `Last-Event-ID` header on reconnect),
+    then pushes new entries as they are written. Each event carries the entry id, so
+    EventSource resumes where it left off. Requires an ASGI server.
+    """
+    user, expires_at = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if await sync_to_async(get_user_role)(user) not in ['PROTECTOR', 'HEIR', 'HQ']:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    if not await Operation.objects.filter(pk=pk).aexists():
+        return JsonResponse({'error': 'Operation not found'}, status=404)
+    try:
+        after = int(request.GET.get('after') or request.META.get('HTTP_LAST_EVENT_ID') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'after must be an integer'}, status=400)
+
+    # Subscribe before reading the backlog so nothing written in between is missed
+    subscription = get_broker().subscribe([operation_channel(pk)])
+    try:
+        backlog = await sync_to_async(_log_backlog)(pk, after, LOG_STREAM_BACKLOG + 1)
+    except Exception:
+        subscription.close()
+        raise
+    truncated = len(backlog) > LOG_STREAM_BACKLOG
+    backlog = backlog[:LOG_STREAM_BACKLOG]
+    cutoff = backlog[-1]['id'] if backlog else after
+
+    opening = [sse_event('ready', {'operation': pk, 'after': after})]
+    opening += [sse_event('log', entry, entry['id']) for entry in backlog]
+    if truncated:
+        # Too far behind to replay here; the client pages the gap through ?after=
+        opening.append(sse_event('backlog_truncated', {'next_after': cutoff}))
+
+    def transform(message):
+        entry = message['data']
+        if message['event'] == 'log':
+            if entry['id'] <= cutoff:
+                return None  # already sent as part of the backlog
+            return sse_event('log', entry, entry['id'])
+        return sse_event(message['event'], entry)
+
+    return stream_response(subscription, expires_at, opening=opening, transform=transform)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scales', '0009_agent_surveillance_images_faction_picture_url'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='factionhistory',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
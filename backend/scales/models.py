@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class SoftDeleteManager(models.Manager):
     def get_queryset(self):
@@ -64,7 +65,7 @@ from django.contrib.auth.models import User
 class FactionHistory(models.Model):
     """Historical snapshots for a faction's key indicators."""
     faction = models.ForeignKey(Faction, related_name='history', on_delete=models.CASCADE)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
     threat_index = models.IntegerField(null=True, blank=True)
     member_count = models.IntegerField(null=True, blank=True)
     updated_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
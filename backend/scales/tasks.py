@@ -0,0 +1,16 @@
+from django.utils.dateparse import parse_datetime
+
+from api.tasks import task
+from .models import Faction, FactionHistory
+
+
+@task('scales.snapshot_faction')
+def snapshot_faction(faction_id, threat_index, member_count, timestamp, user_id=None):
+    """Persist a FactionHistory point captured by the view at change time; a retried task does not add a second one."""
+    if not Faction.all_objects.filter(pk=faction_id).exists():
+        return
+    FactionHistory.objects.get_or_create(
+        faction_id=faction_id,
+        timestamp=parse_datetime(timestamp),
+        defaults={'threat_index': threat_index, 'member_count': member_count, 'updated_by_id': user_id},
+    )
@@ -10,6 +10,19 @@ from audit.models import AuditLog
 from .serializers import FactionSerializer, AgentSerializer, ConnectionSerializer
 from api.permissions import get_user_role, IsProtectorOrHeir
 from audit.utils import log_action
+from api.tasks import enqueue
+
+def _snapshot(faction, user, count_source='members'):
+    """Queue a history point with the values as of now; member count comes from Scales members or linked Index profiles."""
+    member_count = faction.index_profiles.count() if count_source == 'index_profiles' else faction.members.count()
+    enqueue('scales.snapshot_faction', {
+        'faction_id': faction.id,
+        'threat_index': faction.threat_index,
+        'member_count': member_count,
+        'timestamp': timezone.now().isoformat(),
+        'user_id': user.id,
+    })
+
 
 class FactionViewSet(viewsets.ModelViewSet):
     """
@@ -37,12 +50,7 @@ class FactionViewSet(viewsets.ModelViewSet):
         log_action(self.request.user, f"Updated faction '{faction.name}'", target=faction)
         # Log history if key indicators changed
         if faction.threat_index != prev_threat:
-            FactionHistory.objects.create(
-                faction=faction,
-                threat_index=faction.threat_index,
-                member_count=faction.member_count,
-                updated_by=self.request.user,
-            )
+            _snapshot(faction, self.request.user)
 
     def perform_destroy(self, instance):
         role = get_user_role(self.request.user)
@@ -77,15 +85,7 @@ class FactionViewSet(viewsets.ModelViewSet):
             obj, _ = IndexAffiliation.objects.update_or_create(profile=profile, faction=faction, defaults={'level': level})
             log_action(request.user, f"Linked profile '{profile.full_name}' to faction '{faction.name}'", target=faction)
             # Optional: history snapshot for member count using index profiles length
-            try:
-                FactionHistory.objects.create(
-                    faction=faction,
-                    threat_index=faction.threat_index,
-                    member_count=faction.index_profiles.count(),
-                    updated_by=request.user,
-                )
-            except Exception:
-                pass
+            _snapshot(faction, request.user, count_source='index_profiles')
             return Response({'status': 'linked'}, status=status.HTTP_200_OK)
         except Exception:
             return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -105,15 +105,7 @@ class FactionViewSet(viewsets.ModelViewSet):
             profile = IndexProfile.objects.get(id=profile_id)
             IndexAffiliation.objects.filter(profile=profile, faction=faction).delete()
             log_action(request.user, f"Unlinked profile '{profile.full_name}' from faction '{faction.name}'", target=faction)
-            try:
-                FactionHistory.objects.create(
-                    faction=faction,
-                    threat_index=faction.threat_index,
-                    member_count=faction.index_profiles.count(),
-                    updated_by=request.user,
-                )
-            except Exception:
-                pass
+            _snapshot(faction, request.user, count_source='index_profiles')
             return Response({'status': 'unlinked'}, status=status.HTTP_200_OK)
         except Exception:
             return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -39,6 +39,30 @@ class Mantle(models.Model):
         status = "Active" if self.is_currently_active() else "Expired"
         return f"Mantle for {self.user.username} until {self.end_time} ({status})"
 
+class Unavailability(models.Model):
+    """A window (leave, deep cover, ...) during which a user receives no role-assigned tasks."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unavailability')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    reason = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['starts_at']
+        indexes = [
+            models.Index(fields=['ends_at', 'starts_at'], name='users_unavail_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} unavailable {self.starts_at} – {self.ends_at}"
+
+    @classmethod
+    def away_now(cls, now=None):
+        """User ids unavailable at `now`, as a subquery."""
+        now = now or timezone.now()
+        return cls.objects.filter(starts_at__lte=now, ends_at__gt=now).values('user_id')
+
 class SiteState(models.Model):
     """Singleton-like state record to control global site availability."""
     is_shutdown = models.BooleanField(default=False)
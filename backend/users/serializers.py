@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import UserProfile, Mantle
+from django.utils import timezone
+from .models import UserProfile, Mantle, Unavailability
 
 class UserProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -22,3 +23,20 @@ class MantleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Mantle
         fields = ['heir_id', 'heir_username', 'granted_by_id', 'granted_by_username', 'end_time', 'is_active']
+
+class UnavailabilitySerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    starts_at = serializers.DateTimeField(required=False)
+
+    class Meta:
+        model = Unavailability
+        fields = ['id', 'user', 'username', 'starts_at', 'ends_at', 'reason', 'created_by', 'created_at']
+        read_only_fields = ['created_by', 'created_at']
+        extra_kwargs = {'user': {'required': False}}
+
+    def validate(self, attrs):
+        starts_at = attrs.get('starts_at') or timezone.now()
+        if attrs['ends_at'] <= starts_at:
+            raise serializers.ValidationError({'ends_at': 'Must be after starts_at.'})
+        attrs['starts_at'] = starts_at
+        return attrs
@@ -5,11 +5,13 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import UserProfile, Mantle, SiteState, PanicAlert
+from .models import UserProfile, Mantle, SiteState, PanicAlert, Unavailability
 from django.db import transaction, IntegrityError, DatabaseError
-from .serializers import UserProfileSerializer
+from .serializers import UserProfileSerializer, UnavailabilitySerializer
 from api.permissions import IsProtector, IsTrueProtector
 from api.permissions import get_user_role
+from audit.utils import log_action
+from api.realtime import publish, role_channel, ALL_CHANNEL
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
@@ -84,11 +86,12 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         # Notify heir of mantle grant
         try:
             from codex.models import Notification
-            Notification.objects.create(
-                user=heir_user,
-                notif_type=Notification.Type.MANTLE,
-                message="Protector's Mantle granted",
-                metadata={'heir_id': heir_user.id, 'end_time': end_time.isoformat(), 'action': 'granted'}
+            from codex.notifications import notify
+            notify(
+                heir_user,
+                Notification.Type.MANTLE,
+                "Protector's Mantle granted",
+                {'heir_id': heir_user.id, 'end_time': end_time.isoformat(), 'action': 'granted'},
             )
         except Exception:
             pass
@@ -118,6 +121,39 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         except Exception:
             return Response({'error': 'Unable to update display name.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    # --- Availability for role-based task assignment ---
+    @action(detail=False, methods=['get', 'post'], permission_classes=[IsAuthenticated], url_path='unavailability')
+    def unavailability(self, request):
+        """Current and upcoming unavailability windows. POST {ends_at, starts_at?, reason?, user?} adds one.
+
+        Users manage their own windows; Protector/HQ see and manage everyone's.
+        """
+        manager = get_user_role(request.user) in ['PROTECTOR', 'HQ']
+        if request.method == 'GET':
+            qs = Unavailability.objects.select_related('user').filter(ends_at__gt=timezone.now())
+            if not manager:
+                qs = qs.filter(user=request.user)
+            return Response(UnavailabilitySerializer(qs, many=True).data)
+        serializer = UnavailabilitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data.get('user') or request.user
+        if user != request.user and not manager:
+            return Response({'error': 'Only Protector or HQ may set availability for others.'}, status=status.HTTP_403_FORBIDDEN)
+        window = serializer.save(user=user, created_by=request.user)
+        log_action(request.user, f"Marked {user.username} unavailable until {window.ends_at.isoformat()}", target=window)
+        return Response(UnavailabilitySerializer(window).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['delete'], permission_classes=[IsAuthenticated], url_path=r'unavailability/(?P<entry_id>\d+)')
+    def remove_unavailability(self, request, entry_id=None):
+        window = Unavailability.objects.filter(pk=entry_id).select_related('user').first()
+        if window is None:
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+        if window.user != request.user and get_user_role(request.user) not in ['PROTECTOR', 'HQ']:
+            return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
+        log_action(request.user, f"Removed unavailability of {window.user.username}", target=window)
+        window.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     # --- Panic and Shutdown Controls ---
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated], url_path='panic')
     def panic(self, request):
@@ -127,16 +163,16 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         # Record the alert
         alert = PanicAlert.objects.create(user=request.user, message=message)
         # Notify leadership
-        try:
-            from codex.models import Notification
-            from django.contrib.auth.models import User as DjangoUser
-            recipients = DjangoUser.objects.filter(profile__role__in=['PROTECTOR', 'HQ']).distinct()
-            Notification.objects.bulk_create([
-                Notification(user=u, notif_type='MANTLE', message=f"{role or 'User'} initiated a panic alert", metadata={'alert_id': alert.id, 'message': message})
-                for u in recipients
-            ])
-        except Exception:
-            pass
+        from codex.notifications import broadcast
+        broadcast(['PROTECTOR', 'HQ'], 'MANTLE', f"{role or 'User'} initiated a panic alert", {'alert_id': alert.id, 'message': message})
+        alert_event = {
+            'id': alert.id,
+            'user_username': request.user.username,
+            'message': message,
+            'created_at': alert.created_at,
+        }
+        for r in ['PROTECTOR', 'HQ']:
+            publish(role_channel(r), 'panic_alert', alert_event)
         # If Protector/HQ, immediately shutdown
         if role in ['PROTECTOR', 'HQ']:
             state = SiteState.get_state()
@@ -149,6 +185,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
                 a.resolved_at = djtz.now()
                 a.resolved_by = request.user
                 a.save(update_fields=['resolved_at', 'resolved_by'])
+            publish(ALL_CHANNEL, 'site_status', {'shutdown': True})
         return Response({'status': 'ok', 'shutdown': role in ['PROTECTOR', 'HQ']})
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated], url_path='panic-alerts')
@@ -182,6 +219,8 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         alert.resolved_at = timezone.now()
         alert.resolved_by = request.user
         alert.save(update_fields=['resolved_at', 'resolved_by'])
+        for r in ['PROTECTOR', 'HQ']:
+            publish(role_channel(r), 'panic_resolved', {'id': alert.id})
         return Response({'status': 'resolved'})
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated], url_path='site-status')
@@ -202,6 +241,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             a.resolved_at = djtz.now()
             a.resolved_by = request.user
             a.save(update_fields=['resolved_at', 'resolved_by'])
+        publish(ALL_CHANNEL, 'site_status', {'shutdown': True})
         return Response({'status': 'shutdown'})
 
     @action(detail=False, methods=['post'], permission_classes=[IsTrueProtector], url_path='bring-online')
@@ -216,6 +256,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         st = SiteState.get_state()
         st.is_shutdown = False
         st.save(update_fields=['is_shutdown'])
+        publish(ALL_CHANNEL, 'site_status', {'shutdown': False})
         return Response({'status': 'online'})
 
     @action(detail=False, methods=['get'], permission_classes=[IsTrueProtector], url_path='mantles')
@@ -255,11 +296,12 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         # Notify heir of revocation
         try:
             from codex.models import Notification
-            Notification.objects.create(
-                user=heir_user,
-                notif_type=Notification.Type.MANTLE,
-                message="Protector's Mantle revoked",
-                metadata={'heir_id': heir_user.id, 'action': 'revoked'}
+            from codex.notifications import notify
+            notify(
+                heir_user,
+                Notification.Type.MANTLE,
+                "Protector's Mantle revoked",
+                {'heir_id': heir_user.id, 'action': 'revoked'},
             )
         except Exception:
             pass
@@ -301,10 +343,17 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'error': 'Forbidden'}, status=status.HTTP_403_FORBIDDEN)
 
         try:
-            from codex.models import Notification, Bulletin, BulletinAck
-            # Note: Deleting Bulletins will cascade and delete BulletinAcks
-            notif_count, _ = Notification.objects.all().delete()
-            bulletin_count, _ = Bulletin.objects.all().delete()
+            from codex.models import Notification, Bulletin, BulletinAck, BroadcastNotification, BroadcastCursor
+            from codex import counters
+            with transaction.atomic():
+                # Note: Deleting Bulletins will cascade and delete BulletinAcks
+                notif_count, _ = Notification.objects.all().delete()
+                broadcast_count, _ = BroadcastNotification.objects.all().delete()
+                # Read cursors point at broadcast ids that no longer exist
+                BroadcastCursor.objects.all().delete()
+                notif_count += broadcast_count
+                bulletin_count, _ = Bulletin.objects.all().delete()
+                counters.reset('unread_notifications', 'unacked_bulletins')
             total_cleared = notif_count + bulletin_count
 
             return Response({'status': 'ok', 'count': total_cleared})